@@ -0,0 +1,18 @@
+"""
+Async version of GET /api/subjects/grouped/ (see university_timetable/async_views.py).
+"""
+from university_timetable.async_views import async_read_view, json_response
+
+from .views import SubjectViewSet
+
+
+@async_read_view
+async def grouped_subjects(request):
+    """
+    SubjectViewSet.grouped on the async ORM (same role filtering and ?year filter)
+    """
+    queryset = SubjectViewSet.grouped_queryset(request.user)
+    if queryset is None:
+        return json_response({'semesters': []})
+    subjects = [subject async for subject in queryset]
+    return json_response(SubjectViewSet.grouped_payload(subjects, request.GET.get('year')))
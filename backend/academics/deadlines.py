@@ -0,0 +1,187 @@
+"""
+Assessment deadline load per student group.
+
+A student group is (course, semester, year), with the year taken from the
+subject code as in the timetable solver (CST201 -> year 2). DeadlineLoad
+holds, per group, how many assessments of each type fall due on each day
+and in each ISO week. It is built from one aggregated query (counts grouped
+by course, semester, subject code, due date and type; cancelled
+assessments excluded) and is used to:
+
+- flag overloads when lecturers create or move assessments
+  (AssessmentViewSet.create/update, load_check);
+- build the students' deadline calendar (AssessmentViewSet.calendar).
+
+Overload limits are ASSESSMENT_LOAD_LIMITS: assessments due per group on one
+day ('day') and in one week ('week'), and exams on one day ('exam_day').
+
+Each process keeps one index and rebuilds it when the shared version stamp
+in Django's cache changes (bumped by academics/signals.py when assessments
+or subjects are written), in the same way as academics/settings_cache.py:
+
+- Stamp checks happen at most once every ASSESSMENT_LOAD_CACHE_TTL seconds.
+- The index is rebuilt unconditionally after ASSESSMENT_LOAD_MAX_AGE seconds.
+
+The returned index is shared: treat it as read-only.
+"""
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db.models import Count
+
+VERSION_KEY = 'academics:deadline_load:version'
+
+DEFAULT_LIMITS = {'day': 2, 'week': 4, 'exam_day': 1}
+
+_lock = threading.Lock()
+_state = {
+    'index': None,
+    'version': None,
+    'loaded_at': 0.0,
+    'checked_at': 0.0,
+}
+
+
+def subject_group(course_id, semester, code):
+    """Student group key of a subject: (course id, semester, year from code)."""
+    from timetable.grid import get_year_from_code
+    return (course_id, semester, get_year_from_code(code))
+
+
+def week_of(day):
+    """ISO (year, week) of a date."""
+    year, week, _ = day.isocalendar()
+    return (year, week)
+
+
+def load_limits():
+    return {**DEFAULT_LIMITS, **getattr(django_settings, 'ASSESSMENT_LOAD_LIMITS', {})}
+
+
+class DeadlineLoad:
+    """Assessment counts by type per group and due day / ISO week."""
+
+    def __init__(self, rows):
+        """rows: (course id, semester, subject code, due date, assessment type, count)"""
+        self.days = {}   # group -> {date: Counter(type -> n)}
+        self.weeks = {}  # group -> {(iso year, week): Counter(type -> n)}
+        for course_id, semester, code, due_date, assessment_type, count in rows:
+            group = subject_group(course_id, semester, code)
+            self.days.setdefault(group, {}).setdefault(due_date, Counter())[assessment_type] += count
+            self.weeks.setdefault(group, {}).setdefault(week_of(due_date), Counter())[assessment_type] += count
+
+    def day(self, group, day):
+        return self.days.get(group, {}).get(day, Counter())
+
+    def week(self, group, day):
+        return self.weeks.get(group, {}).get(week_of(day), Counter())
+
+    def check(self, group, day, assessment_type=None, limits=None):
+        """
+        Load of `group` on `day` and in its week. With `assessment_type`, one
+        more assessment of that type is counted (the one being planned).
+        Returns {'day', 'week', 'exams', 'overloaded', 'warnings'}.
+        """
+        limits = limits or load_limits()
+        on_day, in_week = Counter(self.day(group, day)), Counter(self.week(group, day))
+        if assessment_type:
+            on_day[assessment_type] += 1
+            in_week[assessment_type] += 1
+
+        day_total, week_total, exams = sum(on_day.values()), sum(in_week.values()), on_day['Exam']
+        warnings = []
+        if day_total > limits['day']:
+            warnings.append(f"{day_total} assessments due on {day.isoformat()} (limit {limits['day']})")
+        if exams > limits['exam_day']:
+            warnings.append(f"{exams} exams on {day.isoformat()} (limit {limits['exam_day']})")
+        if week_total > limits['week']:
+            year, week = week_of(day)
+            warnings.append(f"{week_total} assessments due in week {year}-W{week:02d} (limit {limits['week']})")
+        return {
+            'day': day_total,
+            'week': week_total,
+            'exams': exams,
+            'types': dict(on_day),
+            'overloaded': bool(warnings),
+            'warnings': warnings,
+        }
+
+    def calendar(self, group, start, end, limits=None):
+        """Per-day and per-week load of `group` between two dates (inclusive), busy days only."""
+        limits = limits or load_limits()
+        days = []
+        for day, types in sorted(self.days.get(group, {}).items()):
+            if start <= day <= end:
+                total = sum(types.values())
+                days.append({
+                    'date': day.isoformat(),
+                    'count': total,
+                    'types': dict(types),
+                    'overloaded': total > limits['day'] or types['Exam'] > limits['exam_day'],
+                })
+        weeks = []
+        for (year, week), types in sorted(self.weeks.get(group, {}).items()):
+            if week_of(start) <= (year, week) <= week_of(end):
+                total = sum(types.values())
+                weeks.append({
+                    'week': f'{year}-W{week:02d}',
+                    'count': total,
+                    'types': dict(types),
+                    'overloaded': total > limits['week'],
+                })
+        return {'days': days, 'weeks': weeks}
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _build():
+    from .models import Assessment
+
+    return DeadlineLoad(
+        Assessment.objects.exclude(status='Cancelled')
+        .values_list('subject__course_id', 'subject__semester', 'subject__code', 'due_date', 'assessment_type')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def get_deadline_load():
+    """Return the DeadlineLoad index, rebuilding it only when stale."""
+    now = time.monotonic()
+    ttl = getattr(django_settings, 'ASSESSMENT_LOAD_CACHE_TTL', 5)
+    max_age = getattr(django_settings, 'ASSESSMENT_LOAD_MAX_AGE', 300)
+
+    index = _state['index']
+    if index is not None and now - _state['loaded_at'] < max_age:
+        if now - _state['checked_at'] < ttl:
+            return index
+        version = _current_version()
+        if version == _state['version']:
+            _state['checked_at'] = now
+            return index
+
+    # Read the stamp before the rows (see settings_cache.get_system_settings)
+    version = _current_version()
+    index = _build()
+    with _lock:
+        _state.update(index=index, version=version, loaded_at=now, checked_at=now)
+    return index
+
+
+def invalidate_deadline_load():
+    """
+    Drop this process's index and bump the shared stamp so other processes rebuild.
+    """
+    with _lock:
+        _state.update(index=None, version=None, loaded_at=0.0, checked_at=0.0)
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
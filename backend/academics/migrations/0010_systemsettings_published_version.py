@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def point_at_initial_version(apps, schema_editor):
+    """A timetable that was already published stays published (as the initial version)."""
+    SystemSettings = apps.get_model('academics', 'SystemSettings')
+    TimetableVersion = apps.get_model('timetable', 'TimetableVersion')
+    version = TimetableVersion.objects.order_by('-id').first()
+    if version is not None:
+        SystemSettings.objects.filter(is_timetable_published=True).update(published_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0009_systemsettings_is_timetable_published'),
+        ('timetable', '0003_timetableversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemsettings',
+            name='published_version',
+            field=models.ForeignKey(blank=True, help_text='Timetable version shown to students and lecturers when published', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='timetable.timetableversion'),
+        ),
+        migrations.RunPython(point_at_initial_version, migrations.RunPython.noop),
+    ]
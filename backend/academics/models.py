@@ -51,6 +51,10 @@ class SystemSettings(models.Model):
     academic_year = models.CharField(max_length=20, default='2024/2025', help_text="Current academic year (e.g., 2024/2025)")
     updated_at = models.DateTimeField(auto_now=True)
     is_timetable_published = models.BooleanField(default=False, help_text="If true, timetable is visible to students and lecturers")
+    published_version = models.ForeignKey(
+        'timetable.TimetableVersion', on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text="Timetable version shown to students and lecturers when published"
+    )
 
     class Meta:
         verbose_name = "System Settings"
@@ -64,6 +68,45 @@ class SystemSettings(models.Model):
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
 
+    @classmethod
+    def publication(cls):
+        """
+        (is_timetable_published, published_version_id), read fresh in one query.
+        Timetable reads use this rather than get_cached(): the cached copy can
+        lag a publish or rollback by up to SYSTEM_SETTINGS_MAX_AGE on other
+        workers, while this switches every worker on the next request.
+        """
+        return (cls.objects.filter(pk=1).values_list('is_timetable_published', 'published_version_id').first()
+                or (False, None))
+
+    @classmethod
+    async def apublication(cls):
+        """publication() for async views."""
+        return (await cls.objects.filter(pk=1).values_list('is_timetable_published', 'published_version_id').afirst()
+                or (False, None))
+
+    @classmethod
+    def visible_version_id(cls):
+        """Version students and lecturers read: the published one, None while unpublished."""
+        published, version_id = cls.publication()
+        return version_id if published else None
+
+    @classmethod
+    def get_cached(cls):
+        """
+        Read-only settings for hot paths (no query while the cached copy is current).
+        Invalidated on save via academics/signals.py. Not for the published
+        version: see publication().
+        """
+        from .settings_cache import get_system_settings
+        return get_system_settings()
+
+    @classmethod
+    async def aget_cached(cls):
+        """get_cached() for async views."""
+        from .settings_cache import aget_system_settings
+        return await aget_system_settings()
+
 class Assessment(models.Model):
     ASSESSMENT_TYPES = (
         ('Assignment', 'Assignment'),
@@ -0,0 +1,120 @@
+"""
+Process-local cache for the SystemSettings singleton.
+
+The settings row changes a few times a year but is read on every timetable
+request. Each process keeps its own copy and only re-reads the database when
+the shared version stamp (stored in Django's cache) changes. The stamp is
+bumped by the post_save/post_delete signals in academics/signals.py.
+
+- Version checks against the shared cache happen at most once every
+  SYSTEM_SETTINGS_CACHE_TTL seconds.
+- The copy is reloaded unconditionally after SYSTEM_SETTINGS_MAX_AGE seconds,
+  which bounds staleness when the cache backend is per-process (LocMem).
+
+Timetable reads do not take the published version from here: a lagging
+copy would keep serving the old timetable after a publish or rollback, so
+they read it fresh with SystemSettings.publication().
+
+The returned instance is shared: treat it as read-only. Use
+SystemSettings.get_settings() when you need to modify and save.
+
+aget_system_settings() is the same for async views (async cache and ORM).
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+
+VERSION_KEY = 'academics:system_settings:version'
+
+_lock = threading.Lock()
+_state = {
+    'obj': None,
+    'version': None,
+    'loaded_at': 0.0,
+    'checked_at': 0.0,
+}
+
+
+def _current_version():
+    """Read the shared version stamp, creating one if the cache is empty."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def _acurrent_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, uuid.uuid4().hex, None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def get_system_settings():
+    """
+    Return the cached SystemSettings instance, reloading only when stale.
+    """
+    now = time.monotonic()
+    ttl = getattr(django_settings, 'SYSTEM_SETTINGS_CACHE_TTL', 5)
+    max_age = getattr(django_settings, 'SYSTEM_SETTINGS_MAX_AGE', 60)
+
+    obj = _state['obj']
+    if obj is not None and now - _state['loaded_at'] < max_age:
+        if now - _state['checked_at'] < ttl:
+            return obj
+
+        # Cheap cross-process check: has anyone saved the settings since we loaded?
+        version = _current_version()
+        if version == _state['version']:
+            _state['checked_at'] = now
+            return obj
+
+    # Read the stamp BEFORE the row: a save racing with this load bumps the
+    # stamp afterwards, so the next check reloads instead of keeping old data.
+    version = _current_version()
+
+    from .models import SystemSettings
+    obj = SystemSettings.get_settings()
+
+    with _lock:
+        _state.update(obj=obj, version=version, loaded_at=now, checked_at=now)
+    return obj
+
+
+async def aget_system_settings():
+    """get_system_settings() for async views."""
+    now = time.monotonic()
+    ttl = getattr(django_settings, 'SYSTEM_SETTINGS_CACHE_TTL', 5)
+    max_age = getattr(django_settings, 'SYSTEM_SETTINGS_MAX_AGE', 60)
+
+    obj = _state['obj']
+    if obj is not None and now - _state['loaded_at'] < max_age:
+        if now - _state['checked_at'] < ttl:
+            return obj
+        version = await _acurrent_version()
+        if version == _state['version']:
+            _state['checked_at'] = now
+            return obj
+
+    version = await _acurrent_version()
+
+    from .models import SystemSettings
+    obj, _ = await SystemSettings.objects.aget_or_create(pk=1)
+
+    with _lock:
+        _state.update(obj=obj, version=version, loaded_at=now, checked_at=now)
+    return obj
+
+
+def invalidate_system_settings():
+    """
+    Drop this process's copy and bump the shared stamp so other processes reload.
+    """
+    with _lock:
+        _state.update(obj=None, version=None, loaded_at=0.0, checked_at=0.0)
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .deadlines import invalidate_deadline_load
+from .models import SystemSettings, Assessment, Subject
+from .settings_cache import invalidate_system_settings
+
+
+@receiver(post_save, sender=SystemSettings)
+@receiver(post_delete, sender=SystemSettings)
+def system_settings_changed(sender, instance, **kwargs):
+    # Invalidate after commit so no process can reload the old row under the new stamp
+    transaction.on_commit(invalidate_system_settings)
+
+
+@receiver(post_save, sender=Assessment)
+@receiver(post_delete, sender=Assessment)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def deadline_source_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_deadline_load)
@@ -1,3 +1,170 @@
-from django.test import TestCase
+from datetime import date, time
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient, APITestCase
+
+from timetable.models import TimetableSlot, TimetableVersion
+from users.models import StudentProfile, User
+from .deadlines import invalidate_deadline_load
+from .models import Assessment, Classroom, Course, Subject, SystemSettings
+from .settings_cache import VERSION_KEY, invalidate_system_settings
+
+
+class PublishTimetableTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='adm', email='adm@example.com', password='Pw@12345x',
+                                              role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.version = TimetableVersion.objects.create(semester=1)
+
+    def publish(self, **data):
+        return self.client.post('/api/settings/publish_timetable/', {'publish': True, **data}, format='json')
+
+    def test_publishes_the_requested_version(self):
+        response = self.publish(version=str(self.version.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SystemSettings.publication(), (True, self.version.id))
+
+    def test_rejects_bad_and_unknown_versions(self):
+        self.assertEqual(self.publish(version='abc').status_code, 400)
+        self.assertEqual(self.publish(version=self.version.id + 100).status_code, 404)
+        self.assertEqual(SystemSettings.publication(), (False, None))
+
+    def test_only_admins_publish(self):
+        student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                           role='student')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.publish().status_code, 403)
+
+
+@override_settings(SYSTEM_SETTINGS_CACHE_TTL=0, SYSTEM_SETTINGS_MAX_AGE=3600)
+class CachedSystemSettingsTests(APITestCase):
+    def setUp(self):
+        invalidate_system_settings()
+        self.addCleanup(invalidate_system_settings)  # the copy outlives the test's transaction
+        self.admin = User.objects.create_user(username='adm', email='adm@example.com', password='Pw@12345x',
+                                              role='admin')
+        self.client.force_authenticate(self.admin)
+
+    def update_semester(self, semester):
+        return self.client.post('/api/settings/update_semester/', {'semester': semester}, format='json')
+
+    def test_saves_are_seen_and_reads_are_cached(self):
+        self.assertEqual(SystemSettings.get_cached().current_semester, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.update_semester(2).status_code, 200)
+        self.assertEqual(self.client.get('/api/settings/').data['current_semester'], 2)
+        with self.assertNumQueries(0):
+            SystemSettings.get_cached()
+
+    def test_reloads_only_when_the_shared_stamp_changes(self):
+        SystemSettings.get_cached()
+        SystemSettings.objects.filter(pk=1).update(current_semester=2)  # no signal: as if in another process
+        self.assertEqual(SystemSettings.get_cached().current_semester, 1)
+        cache.set(VERSION_KEY, 'saved-elsewhere', None)
+        self.assertEqual(SystemSettings.get_cached().current_semester, 2)
+
+    def test_rejected_updates_leave_the_cache_alone(self):
+        self.assertEqual(self.update_semester(3).status_code, 400)
+        student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                           role='student')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.update_semester(2).status_code, 403)
+        self.assertEqual(SystemSettings.get_cached().current_semester, 1)
+
+
+class FreeRoomTests(APITestCase):
+    def setUp(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        subject = Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1)
+        self.busy = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        self.free = Classroom.objects.create(room_number='H2', room_type='Lecture Hall', capacity=50)
+        version = TimetableVersion.objects.create(semester=1)
+        # A two-hour manual slot: both hours are taken
+        TimetableSlot.objects.create(version=version, subject=subject, classroom=self.busy, day='Monday',
+                                     start_time=time(9), end_time=time(11))
+        SystemSettings.objects.update_or_create(pk=1, defaults={'is_timetable_published': True,
+                                                                'published_version': version})
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='stu', email='stu@example.com', password='Pw@12345x', role='student'))
+
+    def rooms(self, **params):
+        response = self.client.get('/api/classrooms/free/', params)
+        self.assertEqual(response.status_code, 200)
+        return [room['room_number'] for room in response.json()['results']]
+
+    def test_every_hour_of_a_slot_is_occupied(self):
+        self.assertEqual(self.rooms(day='Monday', start_time='10:00', end_time='11:00'), ['H2'])
+        self.assertEqual(self.rooms(day='Monday', start_time='11:00', end_time='12:00'), ['H1', 'H2'])
+        self.assertEqual(self.rooms(day='Tuesday', start_time='09:00', end_time='10:00', min_capacity=60), [])
+
+    def test_rejects_bad_queries(self):
+        for params in ({'day': 'Sunday'}, {'room_type': 'Pool'}, {'start_time': '12:00', 'end_time': '10:00'},
+                       {'min_capacity': 'many'}):
+            self.assertEqual(self.client.get('/api/classrooms/free/', params).status_code, 400, params)
+
+
+class DeadlineLoadTests(APITestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Computing', code='CS')
+        self.lecturer = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                                 role='lecturer')
+        self.algorithms, databases, networks = (
+            Subject.objects.create(name=name, code=code, course=self.course, semester=1, lecturer=self.lecturer)
+            for name, code in (('Algorithms', 'CST101'), ('Databases', 'CST102'), ('Networks', 'CST201'))
+        )
+        for subject, due, kind, state in ((self.algorithms, 2, 'Assignment', 'Active'),
+                                          (databases, 2, 'Quiz', 'Active'),
+                                          (databases, 2, 'Quiz', 'Cancelled'),
+                                          (networks, 2, 'Exam', 'Active'),  # year 2: another group
+                                          (self.algorithms, 4, 'Exam', 'Active')):
+            Assessment.objects.create(title=f'{subject.code} {kind}', assessment_type=kind, subject=subject,
+                                      lecturer=self.lecturer, due_date=date(2026, 3, due), status=state)
+        invalidate_deadline_load()
+        self.client.force_authenticate(self.lecturer)
+
+    def check(self, **params):
+        return self.client.get('/api/assessments/load_check/', {'subject': self.algorithms.id, **params})
+
+    def test_load_check_counts_the_planned_assessment(self):
+        response = self.check(due_date='2026-03-02')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['day'], response.data['week'], response.data['exams']), (3, 4, 0))
+        self.assertEqual(response.data['warnings'], ['3 assessments due on 2026-03-02 (limit 2)'])
+        self.assertTrue(self.check(due_date='2026-03-04', assessment_type='Exam').data['overloaded'])
+        self.assertFalse(self.check(due_date='2026-03-05').data['overloaded'])
+
+    def test_load_check_errors(self):
+        self.assertEqual(self.check(due_date='02/03/2026').status_code, 400)
+        self.assertEqual(self.check(due_date='2026-03-02', assessment_type='Essay').status_code, 400)
+        self.assertEqual(self.check(due_date='2026-03-02', subject=self.algorithms.id + 100).status_code, 404)
+        student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                           role='student')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.check(due_date='2026-03-02').status_code, 403)
+
+    def test_student_calendar(self):
+        student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                           role='student')
+        StudentProfile.objects.filter(user=student).update(course=self.course, year=1, semester=1)
+        self.client.force_authenticate(User.objects.get(pk=student.pk))
+        response = self.client.get('/api/assessments/calendar/', {'start': '2026-03-01', 'end': '2026-03-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(d['date'], d['count'], d['overloaded']) for d in response.data['days']],
+                         [('2026-03-02', 2, False), ('2026-03-04', 1, False)])
+        self.assertEqual([a['title'] for a in response.data['days'][0]['assessments']], ['CST101 Assignment',
+                                                                                         'CST102 Quiz'])
+        self.assertEqual([(w['week'], w['count']) for w in response.data['weeks']], [('2026-W10', 3)])
+
+    def test_calendar_errors(self):
+        url = '/api/assessments/calendar/'
+        self.assertEqual(self.client.get(url).status_code, 400)  # lecturers name the group
+        self.assertEqual(self.client.get(url, {'course': self.course.id, 'year': 1, 'start': '2026-03-31',
+                                               'end': '2026-03-01'}).status_code, 400)
+        response = self.client.get(url, {'course': self.course.id, 'year': 1, 'start': '2026-03-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['days']), 2)
 
-# Create your tests here.
@@ -4,6 +4,8 @@ from rest_framework.decorators import action
 from .models import Course, Subject, Classroom, SystemSettings, Assessment
 from .serializers import CourseSerializer, SubjectSerializer, ClassroomSerializer, AssessmentSerializer
 from collections import defaultdict
+from datetime import date, datetime, timedelta
+from university_timetable.db_router import ReplicaReadMixin
 
 
 class CourseViewSet(viewsets.ModelViewSet):
@@ -28,16 +30,17 @@ class CourseViewSet(viewsets.ModelViewSet):
         
         # Students see only their course (if authenticated)
         if user.is_authenticated and user.role == 'student' and hasattr(user, 'student_profile'):
-            if user.student_profile.course:
-                queryset = queryset.filter(id=user.student_profile.course.id)
+            if user.student_profile.course_id:
+                queryset = queryset.filter(id=user.student_profile.course_id)
         
         return queryset
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'grouped')
     
     def get_queryset(self):
         """
@@ -48,8 +51,8 @@ class SubjectViewSet(viewsets.ModelViewSet):
         
         # Students see only their course subjects
         if user.role == 'student' and hasattr(user, 'student_profile'):
-            if user.student_profile.course:
-                queryset = queryset.filter(course=user.student_profile.course)
+            if user.student_profile.course_id:
+                queryset = queryset.filter(course_id=user.student_profile.course_id)
         
         # Lecturers see only their assigned subjects
         elif user.role == 'lecturer':
@@ -63,19 +66,31 @@ class SubjectViewSet(viewsets.ModelViewSet):
         Get subjects grouped by semester for the current user
         Supports optional year filtering via query param
         """
-        user = request.user
-        year_param = request.query_params.get('year')
-        
-        # Get subjects based on user role
+        subjects = self.grouped_queryset(request.user)
+        if subjects is None:
+            return Response({'semesters': []})
+        return Response(self.grouped_payload(subjects, request.query_params.get('year')))
+
+    @staticmethod
+    def grouped_queryset(user):
+        """
+        SECURITY: Subjects the user may browse (None: a student without a course)
+        """
         if user.role == 'student' and hasattr(user, 'student_profile'):
-            if not user.student_profile.course:
-                return Response({'semesters': []})
-            subjects = Subject.objects.filter(course=user.student_profile.course)
+            if not user.student_profile.course_id:
+                return None
+            subjects = Subject.objects.filter(course_id=user.student_profile.course_id)
         elif user.role == 'lecturer':
             subjects = Subject.objects.filter(lecturer=user)
         else:
             subjects = Subject.objects.all()
-        
+        return subjects.select_related('course', 'lecturer')
+
+    @staticmethod
+    def grouped_payload(subjects, year_param=None):
+        """
+        BACKEND LOGIC: Group subjects (with course and lecturer loaded) by semester
+        """
         # Apply year filtering if provided
         if year_param:
             try:
@@ -103,7 +118,7 @@ class SubjectViewSet(viewsets.ModelViewSet):
             for sem, subjs in sorted(grouped.items())
         ]
         
-        return Response({'semesters': result})
+        return {'semesters': result}
 
 
 class ClassroomViewSet(viewsets.ModelViewSet):
@@ -111,6 +126,67 @@ class ClassroomViewSet(viewsets.ModelViewSet):
     serializer_class = ClassroomSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @action(detail=False, methods=['get'])
+    def free(self, request):
+        """
+        Find free rooms, e.g. "a Computer Lab for 40 people, Tuesday 14:00-16:00"
+
+        Query params:
+        - day: Monday..Friday (default: every day)
+        - start_time / end_time: HH:MM (default: the whole teaching day)
+        - room_type: Lecture Hall | Computer Lab
+        - min_capacity: minimum seats
+        - version (admins only): timetable version, id | published | latest (default: published)
+
+        BACKEND LOGIC: answered from the cached per-room hour bitmaps of the
+        timetable (timetable/occupancy_cache.py), not by querying slots.
+        """
+        from timetable.availability import free_rooms, window_mask
+        from timetable.grid import DAYS, DAY_INDEX, START_HOUR, END_HOUR
+        from timetable.models import TimetableVersion
+        from timetable.occupancy_cache import get_occupancy_index
+
+        params = request.query_params
+        day = params.get('day')
+        if day and day not in DAY_INDEX:
+            return Response({'error': f"Invalid day. Must be one of: {', '.join(DAYS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        days = [DAY_INDEX[day]] if day else list(range(len(DAYS)))
+
+        room_type = params.get('room_type')
+        if room_type and room_type not in dict(Classroom.ROOM_TYPES):
+            return Response({'error': 'Invalid room_type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            min_capacity = int(params.get('min_capacity', 0))
+            start = datetime.strptime(params.get('start_time', f"{START_HOUR:02d}:00"), '%H:%M').time()
+            end = datetime.strptime(params.get('end_time', f"{END_HOUR:02d}:00"), '%H:%M').time()
+            mask = window_mask(start, end)
+        except ValueError as e:
+            return Response({'error': f'Invalid query: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Everyone searches against the published timetable; admins may check a draft
+        if request.user.role == 'admin' and params.get('version'):
+            version_id = TimetableVersion.resolve(params.get('version'))
+        else:
+            version_id = SystemSettings.visible_version_id()
+
+        index = get_occupancy_index(version_id)
+        matches = free_rooms(index.occupancy, index.rooms, days, mask, room_type, min_capacity)
+        return Response({
+            'version': version_id,
+            'day': day,
+            'start_time': start.strftime('%H:%M'),
+            'end_time': end.strftime('%H:%M'),
+            'count': len(matches),
+            'results': [{
+                'id': room.id,
+                'room_number': room.room_number,
+                'room_type': room.room_type,
+                'capacity': room.capacity,
+                'free_days': [DAYS[d] for d in free_days],
+            } for room, free_days in matches],
+        })
+
 
 class SystemSettingsViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -119,11 +195,13 @@ class SystemSettingsViewSet(viewsets.ViewSet):
         """
         Get current system settings
         """
-        settings = SystemSettings.get_settings()
+        settings = SystemSettings.get_cached()
+        published, version_id = SystemSettings.publication()
         return Response({
             'current_semester': settings.current_semester,
             'academic_year': settings.academic_year,
-            'is_timetable_published': settings.is_timetable_published,
+            'is_timetable_published': published,
+            'published_version': version_id,
             'updated_at': settings.updated_at
         })
     
@@ -165,6 +243,14 @@ class SystemSettingsViewSet(viewsets.ViewSet):
         """
         Toggle timetable publication status
         Only admins can do this
+
+        Publishing points the settings row at one timetable version
+        (`version` id, default: the latest generated). This is a single-row
+        update, so students switch atomically; publishing an older version
+        id rolls back instantly. Timetable reads fetch the published version
+        fresh (SystemSettings.publication), not from the per-process
+        settings cache, so every worker switches on its next request.
+        An unparseable `version` is a 400, an unknown one a 404.
         """
         if request.user.role != 'admin':
             return Response(
@@ -181,13 +267,37 @@ class SystemSettingsViewSet(viewsets.ViewSet):
             )
             
         settings = SystemSettings.get_settings()
+        if publish:
+            from timetable.models import TimetableVersion
+
+            version_id = request.data.get('version')
+            if version_id in (None, ''):
+                version_id = TimetableVersion.latest_id()
+                if version_id is None:
+                    return Response(
+                        {'error': 'No timetable version to publish. Generate a timetable first.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            else:
+                try:
+                    if isinstance(version_id, bool):
+                        raise ValueError
+                    version_id = int(version_id)
+                except (TypeError, ValueError):
+                    return Response({'error': 'version must be a timetable version id'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if not TimetableVersion.objects.filter(pk=version_id).exists():
+                    return Response({'error': f'Timetable version {version_id} not found'},
+                                    status=status.HTTP_404_NOT_FOUND)
+            settings.published_version_id = version_id
         settings.is_timetable_published = publish
         settings.save()
         
         status_msg = "published" if publish else "unpublished"
         return Response({
             'message': f'Timetable {status_msg} successfully',
-            'is_timetable_published': settings.is_timetable_published
+            'is_timetable_published': settings.is_timetable_published,
+            'published_version': settings.published_version_id
         })
 
 
@@ -207,9 +317,9 @@ class AssessmentViewSet(viewsets.ModelViewSet):
         if user.role == 'lecturer':
             return Assessment.objects.filter(lecturer=user).select_related('subject', 'subject__course', 'lecturer')
         elif user.role == 'student' and hasattr(user, 'student_profile'):
-            if user.student_profile.course:
+            if user.student_profile.course_id:
                 return Assessment.objects.filter(
-                    subject__course=user.student_profile.course
+                    subject__course_id=user.student_profile.course_id
                 ).select_related('subject', 'subject__course', 'lecturer')
         elif user.role == 'admin':
             return Assessment.objects.all().select_related('subject', 'subject__course', 'lecturer')
@@ -221,6 +331,136 @@ class AssessmentViewSet(viewsets.ModelViewSet):
         Automatically set the lecturer to the current user
         """
         serializer.save(lecturer=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create, then flag deadline overloads for the subject's student group
+        (academics/deadlines.py). The assessment is saved either way.
+        """
+        response = super().create(request, *args, **kwargs)
+        response.data['deadline_load'] = self._deadline_load(response.data)
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response.data['deadline_load'] = self._deadline_load(response.data)
+        return response
+
+    def _deadline_load(self, data):
+        """Load of the assessment's group on its due day and week, now that it's saved."""
+        from .deadlines import get_deadline_load, subject_group
+
+        if data.get('status') == 'Cancelled':
+            return None
+        subject = Subject.objects.filter(pk=data['subject']).values_list('course_id', 'semester', 'code').first()
+        if subject is None:
+            return None
+        due_date = datetime.strptime(str(data['due_date']), '%Y-%m-%d').date()
+        return get_deadline_load().check(subject_group(*subject), due_date)
+
+    @action(detail=False, methods=['get'])
+    def load_check(self, request):
+        """
+        Lecturers/admins: would one more assessment overload the students?
+        Query params: subject (id), due_date (YYYY-MM-DD), assessment_type (default: Assignment)
+
+        BACKEND LOGIC: counts from the cached deadline-load index, plus the
+        planned assessment, against ASSESSMENT_LOAD_LIMITS
+        """
+        from .deadlines import get_deadline_load, subject_group, load_limits
+
+        if request.user.role not in ('lecturer', 'admin'):
+            return Response(
+                {'error': 'Only lecturers and admins can access this endpoint'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        params = request.query_params
+        assessment_type = params.get('assessment_type', 'Assignment')
+        if assessment_type not in dict(Assessment.ASSESSMENT_TYPES):
+            return Response({'error': 'Invalid assessment_type'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            due_date = datetime.strptime(params.get('due_date', ''), '%Y-%m-%d').date()
+            subject_id = int(params.get('subject', ''))
+        except ValueError:
+            return Response({'error': 'subject (id) and due_date (YYYY-MM-DD) are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        subject = Subject.objects.filter(pk=subject_id).values_list('course_id', 'semester', 'code').first()
+        if subject is None:
+            return Response({'error': 'Subject not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        group = subject_group(*subject)
+        return Response({
+            'group': {'course': group[0], 'semester': group[1], 'year': group[2]},
+            'due_date': due_date.isoformat(),
+            'limits': load_limits(),
+            **get_deadline_load().check(group, due_date, assessment_type),
+        })
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Deadline calendar of a student group: assessments due per day, with
+        per-day and per-week counts by type and overload flags.
+
+        Query params:
+        - start / end: YYYY-MM-DD (default: today and 8 weeks later; at most a year)
+        - course, year, semester (lecturers/admins; students always get their own group;
+          semester defaults to the current semester)
+        """
+        from .deadlines import get_deadline_load, load_limits, subject_group
+
+        user = request.user
+        params = request.query_params
+        try:
+            start = datetime.strptime(params['start'], '%Y-%m-%d').date() if params.get('start') else date.today()
+            end = datetime.strptime(params['end'], '%Y-%m-%d').date() if params.get('end') else start + timedelta(weeks=8)
+            if user.role == 'student':
+                profile = getattr(user, 'student_profile', None)
+                if profile is None or not profile.course_id:
+                    return Response({'error': 'No course assigned to this student'}, status=status.HTTP_400_BAD_REQUEST)
+                group = (profile.course_id, profile.semester, profile.year)
+            else:
+                group = (int(params['course']), int(params.get('semester') or SystemSettings.get_cached().current_semester),
+                         int(params['year']))
+        except KeyError:
+            return Response({'error': 'course and year are required'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': f'Invalid query: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days > 366:
+            return Response({'error': 'end must be after start and at most a year later'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        limits = load_limits()
+        load = get_deadline_load().calendar(group, start, end, limits)
+
+        # The group's own assessments in the range (its subjects are matched on the code's year)
+        subject_ids = [
+            subject_id for subject_id, code in
+            Subject.objects.filter(course_id=group[0], semester=group[1]).values_list('id', 'code')
+            if subject_group(group[0], group[1], code) == group
+        ]
+        items = {}
+        for assessment in (Assessment.objects.filter(subject_id__in=subject_ids, due_date__range=(start, end))
+                           .exclude(status='Cancelled').select_related('subject').order_by('due_date', 'id')):
+            items.setdefault(assessment.due_date.isoformat(), []).append({
+                'id': assessment.id,
+                'title': assessment.title,
+                'assessment_type': assessment.assessment_type,
+                'status': assessment.status,
+                'subject_code': assessment.subject.code,
+                'subject_name': assessment.subject.name,
+            })
+        for day in load['days']:
+            day['assessments'] = items.get(day['date'], [])
+
+        return Response({
+            'group': {'course': group[0], 'semester': group[1], 'year': group[2]},
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'limits': limits,
+            **load,
+        })
     
     @action(detail=False, methods=['get'])
     def my_subjects(self, request):
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TimetableConfig(AppConfig):
     name = 'timetable'
+
+    def ready(self):
+        import timetable.signals
@@ -0,0 +1,99 @@
+"""
+Async timetable views (see university_timetable/async_views.py):
+- GET /api/timetable/formatted/, async version
+- GET /api/timetable/events/, the server-sent event stream (timetable/events.py)
+"""
+import functools
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from academics.models import SystemSettings
+from university_timetable.async_views import async_read_view, json_response
+
+from .events import aredeem_ticket, event_stream
+from .models import TimetableSlot, TimetableVersion
+from .views import TimetableViewSet
+
+# Formatting helpers only: no request state
+_formatter = TimetableViewSet()
+
+
+@async_read_view
+async def formatted_timetable(request):
+    """
+    TimetableViewSet.get_formatted_timetable on the async ORM
+    - Non-admins read the published version; admins ?version=<id> | published | latest
+    - Same query params and payload
+    """
+    params = request.GET
+    if request.user.role == 'admin':
+        version_id = await TimetableVersion.aresolve(params.get('version', 'latest'))
+    else:
+        published, version_id = await SystemSettings.apublication()
+        version_id = version_id if published else None
+
+    queryset = TimetableSlot.objects.none()
+    if version_id is not None:
+        queryset = TimetableViewSet.filter_by_params(
+            TimetableSlot.objects.select_related(
+                'subject', 'subject__course', 'subject__lecturer', 'classroom'
+            ).filter(version_id=version_id),
+            params,
+        )
+
+    view_type = params.get('view', 'calendar')
+    if params.get('compact', '').lower() in ('1', 'true', 'yes'):
+        rows = [row async for row in queryset.values_list(*TimetableViewSet.COMPACT_FIELDS)]
+        return json_response(_formatter.compact_payload(rows, view_type))
+    slots = [slot async for slot in queryset]
+    return json_response(_formatter.formatted_payload(slots, view_type))
+
+
+def _ticket_auth(view):
+    """
+    EventSource can't send headers: accept ?ticket=<stream ticket> too
+    (events.issue_ticket). Tokens themselves are never taken from the URL.
+    """
+    @functools.wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        ticket = request.GET.get('ticket')
+        if ticket and 'HTTP_AUTHORIZATION' not in request.META:
+            claims = await aredeem_ticket(ticket)
+            if claims is None:
+                return json_response({'detail': 'Stream ticket is invalid, expired or already used.'}, 401,
+                                     {'WWW-Authenticate': 'Bearer realm="api"'})
+            request.verified_claims = claims
+        return await view(request, *args, **kwargs)
+    return wrapped
+
+
+@_ticket_auth
+@async_read_view
+async def timetable_events(request):
+    """
+    Server-sent events: timetable published / unpublished (with whether the
+    user's own timetable changed) and, for admins, new generated versions.
+    See timetable/events.py for the event format.
+
+    Auth: the Authorization header, or ?ticket=<id> for EventSource (POST
+    /api/timetable/events/ticket/ first; each ticket opens one stream).
+    The stream ends when the access token expires; reconnect with a new
+    ticket (Last-Event-ID replays what was missed).
+    """
+    if not isinstance(request, ASGIRequest):
+        # A worker thread would be held for as long as the browser stays connected
+        return json_response({'error': 'The event stream needs the ASGI server (university_timetable.asgi)'},
+                             503)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0) or None
+    except ValueError:
+        return json_response({'error': 'Last-Event-ID must be an event id'}, 400)
+
+    response = StreamingHttpResponse(
+        event_stream(request.user, last_event_id, request.auth.get('exp')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    return response
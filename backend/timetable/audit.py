@@ -0,0 +1,179 @@
+"""
+Whole-timetable conflict audit.
+
+Manual edits can break rules the generator enforces, so this re-checks a
+stored timetable version in one pass:
+
+- lecturer_clash / group_clash / room_clash: overlapping slots for the same
+  lecturer, student group (course + semester + year) or room
+- break_hour:    a class during the group's break (Year 1: 12-13, others: 13-14)
+- outside_hours: a class outside 08:00-17:00 or not Monday-Friday
+- room_type:     subject needs a different room type than it got
+- capacity:      room smaller than the group (grid.seats_needed: enrolled
+                 students, or the default batch size when nobody is
+                 enrolled; the generator places rooms by the same rule)
+- inactive_room: slot in a room that is no longer active
+
+The database is read with two queries (slots with their subject/room
+columns, and enrolment counts per group). Everything else is a single
+bucketing pass plus a sort-and-sweep per bucket, so clashes are found in
+O(n log n) without comparing every slot against every other.
+"""
+from collections import defaultdict, namedtuple
+
+from .grid import DAYS, START_HOUR, END_HOUR, break_hour_for_year, get_year_from_code, seats_needed
+
+AuditSlot = namedtuple('AuditSlot', [
+    'id', 'subject_id', 'subject_code', 'lecturer_id', 'course_id', 'semester', 'year',
+    'required_room_type', 'room_id', 'room_number', 'room_type', 'capacity', 'room_active',
+    'day', 'start', 'end',  # start/end in minutes since midnight
+])
+
+CONFLICT_TYPES = (
+    'lecturer_clash', 'group_clash', 'room_clash', 'break_hour',
+    'outside_hours', 'room_type', 'capacity', 'inactive_room',
+)
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def _time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def audit_slots_from_queryset(queryset):
+    """Load TimetableSlot rows as AuditSlot tuples with a single values_list query."""
+    return [
+        AuditSlot(
+            slot_id, subject_id, code, lecturer_id, course_id, semester, get_year_from_code(code),
+            required_type, room_id, room_number, room_type, capacity, room_active,
+            day, _minutes(start), _minutes(end),
+        )
+        for (slot_id, subject_id, code, lecturer_id, course_id, semester, required_type,
+             room_id, room_number, room_type, capacity, room_active, day, start, end)
+        in queryset.values_list(
+            'id', 'subject_id', 'subject__code', 'subject__lecturer_id', 'subject__course_id',
+            'subject__semester', 'subject__room_type', 'classroom_id', 'classroom__room_number',
+            'classroom__room_type', 'classroom__capacity', 'classroom__is_active',
+            'day', 'start_time', 'end_time',
+        )
+    ]
+
+
+def group_sizes():
+    """Enrolled students per (course, semester, year), in one GROUP BY query."""
+    from django.db.models import Count
+    from users.models import StudentProfile
+
+    return {
+        (row['course_id'], row['semester'], row['year']): row['n']
+        for row in StudentProfile.objects.filter(course__isnull=False)
+        .values('course_id', 'semester', 'year').annotate(n=Count('id'))
+    }
+
+
+def _conflict(kind, slots, detail, **extra):
+    return {
+        'type': kind,
+        'day': slots[0].day,
+        'start_time': _time(min(s.start for s in slots)),
+        'end_time': _time(max(s.end for s in slots)),
+        'slots': sorted(s.id for s in slots),
+        'detail': detail,
+        **extra,
+    }
+
+
+def _overlapping_clusters(slots):
+    """Groups of (transitively) overlapping slots, by sort-and-sweep."""
+    clusters, current, current_end = [], [], None
+    for slot in sorted(slots, key=lambda s: (s.start, s.end)):
+        if current and slot.start < current_end:
+            current.append(slot)
+            current_end = max(current_end, slot.end)
+        else:
+            if len(current) > 1:
+                clusters.append(current)
+            current, current_end = [slot], slot.end
+    if len(current) > 1:
+        clusters.append(current)
+    return clusters
+
+
+def find_conflicts(slots, sizes=None):
+    """
+    Every rule violation among AuditSlot tuples, as a list of dicts with
+    type, day, start_time, end_time, slot ids and a readable detail.
+    """
+    sizes = sizes or {}
+    conflicts = []
+    buckets = defaultdict(list)
+
+    for s in slots:
+        group = (s.course_id, s.semester, s.year)
+        buckets[('room_clash', s.room_id, s.day)].append(s)
+        buckets[('group_clash', group, s.day)].append(s)
+        if s.lecturer_id:
+            buckets[('lecturer_clash', s.lecturer_id, s.day)].append(s)
+
+        if s.day not in DAYS or s.start < START_HOUR * 60 or s.end > END_HOUR * 60 or s.end <= s.start:
+            conflicts.append(_conflict('outside_hours', [s], f"{s.subject_code} is outside Mon-Fri 08:00-17:00"))
+        break_start = break_hour_for_year(s.year) * 60
+        if s.start < break_start + 60 and s.end > break_start:
+            conflicts.append(_conflict(
+                'break_hour', [s], f"{s.subject_code} overlaps the Year {s.year} break ({_time(break_start)})"
+            ))
+        if s.required_room_type != s.room_type:
+            conflicts.append(_conflict(
+                'room_type', [s], f"{s.subject_code} needs a {s.required_room_type}, room {s.room_number} is a {s.room_type}"
+            ))
+        needed = seats_needed(sizes, group)
+        if s.capacity < needed:
+            conflicts.append(_conflict(
+                'capacity', [s], f"Room {s.room_number} seats {s.capacity}, {s.subject_code} needs {needed}"
+            ))
+        if not s.room_active:
+            conflicts.append(_conflict('inactive_room', [s], f"Room {s.room_number} is inactive"))
+
+    for (kind, key, _), bucket in buckets.items():
+        if len(bucket) < 2:
+            continue
+        for cluster in _overlapping_clusters(bucket):
+            codes = ', '.join(sorted({s.subject_code for s in cluster}))
+            if kind == 'room_clash':
+                conflicts.append(_conflict(kind, cluster, f"Room {cluster[0].room_number} double-booked: {codes}", room=key))
+            elif kind == 'group_clash':
+                course_id, semester, year = key
+                conflicts.append(_conflict(
+                    kind, cluster, f"Course {course_id} Year {year} has overlapping classes: {codes}",
+                    group={'course': course_id, 'semester': semester, 'year': year},
+                ))
+            else:
+                conflicts.append(_conflict(kind, cluster, f"Lecturer {key} double-booked: {codes}", lecturer=key))
+
+    day_order = {day: i for i, day in enumerate(DAYS)}
+    conflicts.sort(key=lambda c: (day_order.get(c['day'], len(DAYS)), c['start_time'], CONFLICT_TYPES.index(c['type'])))
+    return conflicts
+
+
+def audit_version(version_id):
+    """
+    Audit one stored timetable version. Returns {'version', 'total_slots',
+    'summary': {type: count}, 'conflicts': [...]}.
+    """
+    from .models import TimetableSlot
+
+    slots = audit_slots_from_queryset(TimetableSlot.objects.filter(version_id=version_id))
+    conflicts = find_conflicts(slots, group_sizes())
+    summary = {kind: 0 for kind in CONFLICT_TYPES}
+    for conflict in conflicts:
+        summary[conflict['type']] += 1
+    return {
+        'version': version_id,
+        'total_slots': len(slots),
+        'total_conflicts': len(conflicts),
+        'summary': summary,
+        'conflicts': conflicts,
+    }
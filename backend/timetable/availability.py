@@ -0,0 +1,104 @@
+"""
+Availability queries over an Occupancy index (see occupancy_cache.py).
+
+All checks are bit operations on one mask per room/lecturer/group per day,
+so a campus-wide search is a loop over rooms with no database access.
+Pure Python (no Django imports).
+"""
+from .grid import DAYS, START_HOUR, END_HOUR, break_hour_for_year
+from .occupancy import hour_bit
+
+TEACHING_DAY = sum(1 << i for i in range(END_HOUR - START_HOUR))
+
+
+def window_mask(start_time, end_time):
+    """
+    Bitmask of the teaching hours overlapping [start_time, end_time).
+    Raises ValueError if the window is empty or outside the teaching day.
+    """
+    first = start_time.hour
+    last = end_time.hour + (1 if end_time.minute or end_time.second else 0)
+    if not START_HOUR <= first < last <= END_HOUR:
+        raise ValueError(f"Time range must be within {START_HOUR:02d}:00-{END_HOUR:02d}:00 and end after it starts")
+    return sum(hour_bit(hour) for hour in range(first, last))
+
+
+def free_rooms(occupancy, rooms, days, mask, room_type=None, min_capacity=0):
+    """
+    Rooms free for the whole window `mask` on at least one of `days` (indexes).
+    Returns a list of (RoomSpec, [free day indexes]), smallest suitable room first.
+    """
+    results = []
+    for room in rooms:
+        if room_type and room.room_type != room_type:
+            continue
+        if room.capacity < min_capacity:
+            continue
+        row = occupancy.rooms.get(room.id)
+        free_days = [day for day in days if not (row and row[day] & mask)]
+        if free_days:
+            results.append((room, free_days))
+    results.sort(key=lambda item: (item[0].capacity, item[0].room_number))
+    return results
+
+
+def _runs(free):
+    """(start hour, end hour) for each run of set bits in a day mask."""
+    runs, start = [], None
+    for hour in range(START_HOUR, END_HOUR + 1):
+        is_free = hour < END_HOUR and free & hour_bit(hour)
+        if is_free and start is None:
+            start = hour
+        elif not is_free and start is not None:
+            runs.append((start, hour))
+            start = None
+    return runs
+
+
+def common_free_periods(occupancy, days, lecturer_ids=(), groups=(), availability=None,
+                        rooms=None, room_type=None, min_hours=1):
+    """
+    Periods when every lecturer and student group is free.
+
+    - groups: (course_id, semester, year) keys; their break hour counts as busy
+    - availability: {lecturer id: per-day masks of available hours} (None = no restriction)
+    - room_type: also require a free room of that type; periods are split
+      so that each lists the rooms free for all of it
+
+    Returns a list of (day index, start hour, end hour, rooms or None).
+    """
+    periods = []
+    typed_rooms = [room for room in rooms or () if room.room_type == room_type] if room_type else None
+    for day in days:
+        free = TEACHING_DAY
+        for lecturer_id in lecturer_ids:
+            free &= ~occupancy.lecturer_mask(lecturer_id, day)
+            if availability and availability.get(lecturer_id):
+                free &= availability[lecturer_id][day]
+        for group in groups:
+            free &= ~occupancy.group_mask(group, day) & ~hour_bit(break_hour_for_year(group[2]))
+
+        if typed_rooms is not None:
+            # Hours at which at least one room of the type is free
+            room_free = 0
+            for room in typed_rooms:
+                room_free |= ~occupancy.room_mask(room.id, day)
+            free &= room_free
+
+        for start, end in _runs(free):
+            if typed_rooms is None:
+                if end - start >= min_hours:
+                    periods.append((day, start, end, None))
+                continue
+            # Split the run wherever no single room stays free throughout
+            segments, seg_start, seg_rooms = [], start, None
+            for hour in range(start, end):
+                here = [room for room in typed_rooms if not occupancy.room_mask(room.id, day) & hour_bit(hour)]
+                shared = here if seg_rooms is None else [room for room in seg_rooms if room in here]
+                if not shared:
+                    segments.append((seg_start, hour, seg_rooms))
+                    seg_start, shared = hour, here
+                seg_rooms = shared
+            segments.append((seg_start, end, seg_rooms))
+            periods.extend((day, a, b, rs) for a, b, rs in segments if b - a >= min_hours)
+    return periods
@@ -0,0 +1,274 @@
+"""
+Subject conflict structure used to decompose the scheduling problem.
+
+Two subjects conflict when they can never share an hour: same lecturer or
+same student group. Room pools are a softer link: subjects that need the
+same room type only compete if that type is scarce. When it isn't, the
+rooms can be split between the subjects' components up front, and each
+component can then be solved on its own.
+
+components() does this with a union-find over lecturer and group keys,
+which is linear in the number of subjects (no pairwise comparison).
+
+The same lecturer/group links, as an explicit adjacency graph, drive
+DSaturOrder: a most-constrained-first subject ordering for the solver.
+Pure Python (no Django imports).
+"""
+import heapq
+from collections import defaultdict
+
+from .grid import DAYS, START_HOUR, END_HOUR, HOURS_PER_DAY
+from .occupancy import hour_bit
+
+# Teachable hours per room per week (the break hour is never used)
+ROOM_HOURS_PER_WEEK = len(DAYS) * (HOURS_PER_DAY - 1)
+
+# Room types booked above this share of their capacity are not split between components
+SCARCITY_THRESHOLD = 0.75
+
+
+class UnionFind:
+    def __init__(self, items):
+        self.parent = {item: item for item in items}
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:  # path compression
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[b] = a
+
+
+def shared_resources(task):
+    """Keys of the resources a task can clash on (lecturer, student group)."""
+    keys = [('G', task.group)]
+    if task.lecturer_id:
+        keys.append(('L', task.lecturer_id))
+    return keys
+
+
+def _apportion(rooms, demands):
+    """
+    Split rooms between components in proportion to their demand (hours).
+    Returns {component: [rooms]} or None if some component would get less
+    capacity than it needs.
+    """
+    total = sum(demands.values())
+    shares = {c: len(rooms) * hours / total for c, hours in demands.items()}
+    counts = {c: max(1, int(share)) for c, share in shares.items()}
+    # Largest remainder for whatever is left over
+    for c in sorted(shares, key=lambda c: shares[c] - int(shares[c]), reverse=True):
+        if sum(counts.values()) >= len(rooms):
+            break
+        counts[c] += 1
+    if sum(counts.values()) > len(rooms):
+        return None
+
+    allocation, start = {}, 0
+    for c in sorted(demands, key=lambda c: -demands[c]):
+        allocation[c] = rooms[start:start + counts[c]]
+        start += counts[c]
+        if len(allocation[c]) * ROOM_HOURS_PER_WEEK < demands[c]:
+            return None
+    return allocation
+
+
+def components(tasks, rooms, scarcity=SCARCITY_THRESHOLD):
+    """
+    Split a problem into independent sub-problems.
+
+    Returns a list of (tasks, rooms) pairs. Subjects sharing a lecturer or
+    student group always end up in the same pair. Rooms of a type are
+    divided between the pairs that need it, unless the type is scarce (or
+    can't be split fairly), in which case those pairs are merged and keep
+    the whole pool. A split shares out only the rooms that seat every group
+    needing the type; smaller rooms are left to parallel.repair().
+    """
+    uf = UnionFind(task.id for task in tasks)
+    owner = {}
+    for task in tasks:
+        for key in shared_resources(task):
+            if key in owner:
+                uf.union(owner[key], task.id)
+            else:
+                owner[key] = task.id
+
+    seats = defaultdict(int)  # room type -> largest group needing it
+    for task in tasks:
+        seats[task.room_type] = max(seats[task.room_type], task.students)
+    everything, pools = defaultdict(list), defaultdict(list)
+    for room in rooms:
+        everything[room.room_type].append(room)
+        if room.capacity >= seats[room.room_type]:
+            pools[room.room_type].append(room)
+
+    # Merge components over scarce room types until the room split is stable
+    while True:
+        demand = defaultdict(lambda: defaultdict(int))  # room type -> component -> hours
+        for task in tasks:
+            demand[task.room_type][uf.find(task.id)] += task.weekly_hours
+
+        allocation, merged = {}, False
+        for room_type, per_component in demand.items():
+            pool = pools.get(room_type, [])
+            if len(per_component) == 1 or not everything.get(room_type):
+                allocation[room_type] = {c: everything.get(room_type, []) for c in per_component}
+                continue
+            split = None
+            if pool and sum(per_component.values()) <= scarcity * len(pool) * ROOM_HOURS_PER_WEEK:
+                split = _apportion(pool, per_component)
+            if split is None:
+                first, *rest = per_component
+                for c in rest:
+                    uf.union(first, c)
+                merged = True
+            else:
+                allocation[room_type] = split
+        if not merged:
+            break
+
+    buckets = defaultdict(list)
+    for task in tasks:  # keeps the input order within each component
+        buckets[uf.find(task.id)].append(task)
+    position = {room.id: i for i, room in enumerate(rooms)}
+
+    result = []
+    for root, sub_tasks in buckets.items():
+        sub_rooms = []
+        for room_type in {task.room_type for task in sub_tasks}:
+            sub_rooms.extend(allocation[room_type][root])
+        sub_rooms.sort(key=lambda room: position[room.id])
+        result.append((sub_tasks, sub_rooms))
+    result.sort(key=lambda pair: -sum(task.weekly_hours for task in pair[0]))
+    return result
+
+
+def build_conflict_graph(tasks):
+    """
+    Adjacency sets {subject id: {conflicting subject ids}}, built by
+    bucketing subjects per lecturer and per student group.
+    """
+    buckets = defaultdict(list)
+    for task in tasks:
+        for key in shared_resources(task):
+            buckets[key].append(task.id)
+    graph = {task.id: set() for task in tasks}
+    for members in buckets.values():
+        for subject_id in members:
+            graph[subject_id].update(members)
+    for subject_id, neighbours in graph.items():
+        neighbours.discard(subject_id)
+    return graph
+
+
+class DSaturOrder:
+    """
+    Dynamic most-constrained-first ordering (DSatur adapted to timetabling).
+
+    A subject's saturation is the set of allowed hours it has lost because a
+    conflicting subject (same lecturer or group) was placed there, or every
+    room of its type is taken. The next subject is the one with the least
+    slack (free hours minus hours needed); ties go to the highest degree in
+    the conflict graph, then the most weekly hours.
+
+    After each placement only the neighbours of the placed subject (and,
+    when a room type fills up at some hour, the subjects needing that type)
+    are re-scored, using the Occupancy bitmasks. Stale heap entries are
+    skipped lazily.
+    """
+
+    def __init__(self, tasks, candidates_by_type, occupancy, graph=None):
+        self.tasks = {task.id: task for task in tasks}
+        self.graph = graph if graph is not None else build_conflict_graph(tasks)
+        self.occupancy = occupancy
+        self.room_count = {room_type: len(rooms) for room_type, rooms in candidates_by_type.items()}
+        self.pending = set(self.tasks)
+        self.by_type = defaultdict(set)
+        for task in tasks:
+            self.by_type[task.room_type].add(task.id)
+        self.position = {task.id: i for i, task in enumerate(tasks)}
+
+        n_days = len(DAYS)
+        self.allowed = {}
+        for task in tasks:
+            if task.break_hour not in self.allowed:
+                self.allowed[task.break_hour] = sum(
+                    hour_bit(hour) for hour in range(START_HOUR, END_HOUR) if hour != task.break_hour
+                )
+
+        # Hours at which every room of a type is booked
+        self.used = defaultdict(int)  # (room type, day, hour) -> rooms booked
+        self.full = defaultdict(lambda: [0] * n_days)
+        for room_type, rooms in candidates_by_type.items():
+            for room in rooms:
+                for day in range(n_days):
+                    mask = occupancy.room_mask(room.id, day)
+                    for hour in range(START_HOUR, END_HOUR):
+                        if mask & hour_bit(hour):
+                            self._use(room_type, day, hour)
+
+        self.stamp = {}
+        self.heap = []
+        for task in tasks:
+            self._push(task.id)
+
+    def _use(self, room_type, day, hour):
+        self.used[(room_type, day, hour)] += 1
+        if self.used[(room_type, day, hour)] >= self.room_count.get(room_type, 0):
+            self.full[room_type][day] |= hour_bit(hour)
+            return True
+        return False
+
+    def free_hours(self, task):
+        occ = self.occupancy
+        allowed = self.allowed[task.break_hour]
+        if not self.room_count.get(task.room_type):
+            return 0
+        full = self.full[task.room_type]
+        lecturer_row = occ.lecturers.get(task.lecturer_id) if task.lecturer_id else None
+        blocked_row = occ.lecturer_blocked.get(task.lecturer_id) if task.lecturer_id else None
+        free = 0
+        for day in range(len(DAYS)):
+            busy = occ.group_mask(task.group, day) | full[day]
+            if lecturer_row:
+                busy |= lecturer_row[day]
+            if blocked_row:
+                busy |= blocked_row[day]
+            free += (allowed & ~busy).bit_count()
+        return free
+
+    def _push(self, subject_id):
+        task = self.tasks[subject_id]
+        stamp = self.stamp.get(subject_id, 0) + 1
+        self.stamp[subject_id] = stamp
+        key = (
+            self.free_hours(task) - task.weekly_hours,
+            -len(self.graph[subject_id]),
+            -task.weekly_hours,
+            self.position[subject_id],
+        )
+        heapq.heappush(self.heap, (key, stamp, subject_id))
+
+    def pop(self):
+        """Next subject to schedule, or None when all are done."""
+        while self.heap:
+            _, stamp, subject_id = heapq.heappop(self.heap)
+            if subject_id in self.pending and stamp == self.stamp[subject_id]:
+                self.pending.discard(subject_id)
+                return self.tasks[subject_id]
+        return None
+
+    def placed(self, task, placements):
+        """Update saturation after task's hours were booked at placements."""
+        affected = set(self.graph[task.id])
+        for p in placements:
+            if self._use(task.room_type, p.day, p.hour):
+                affected |= self.by_type[task.room_type]
+        for subject_id in affected & self.pending:
+            self._push(subject_id)
@@ -0,0 +1,76 @@
+"""
+Differences between two timetable versions.
+
+Each slot is reduced to a key (subject, day, first hour, hours, room), so
+lengthening or shortening a slot is a change too. The keys of both
+versions go into sets, so added/removed slots are two set differences
+(O(n + m)) rather than comparing every slot with every other. Removed and
+added hours of the same subject are then paired up as moves, using a dict
+keyed by subject. Works on metrics.SlotRow tuples, so there are no Django
+imports here.
+"""
+from collections import defaultdict
+
+from .grid import DAY_INDEX
+
+
+def slot_key(row):
+    return (row.subject_id, row.day, row.hour, row.hours, row.room_id)
+
+
+def _order(row):
+    return (DAY_INDEX.get(row.day, len(DAY_INDEX)), row.hour, row.room_id)
+
+
+def diff_rows(old_rows, new_rows):
+    """
+    Compare two lists of SlotRow.
+
+    Returns a dict with:
+    - added / removed: SlotRows only in the new / old version
+      (excluding hours that are reported as moves)
+    - moved: (old SlotRow, new SlotRow) pairs for the same subject
+      (including slots that only changed length)
+    - unchanged: number of identical slots
+    - groups / lecturers: student groups (course_id, semester, year) and
+      lecturer ids touched by any change
+    """
+    old = {slot_key(row): row for row in old_rows}
+    new = {slot_key(row): row for row in new_rows}
+    old_keys, new_keys = old.keys(), new.keys()
+
+    removed_by_subject = defaultdict(list)
+    for key in old_keys - new_keys:
+        removed_by_subject[key[0]].append(old[key])
+    added_by_subject = defaultdict(list)
+    for key in new_keys - old_keys:
+        added_by_subject[key[0]].append(new[key])
+
+    added, removed, moved = [], [], []
+    for subject_id in removed_by_subject.keys() | added_by_subject.keys():
+        # Pair in time order so Monday's lost hour matches Monday's new hour where possible
+        gone = sorted(removed_by_subject.get(subject_id, ()), key=_order)
+        came = sorted(added_by_subject.get(subject_id, ()), key=_order)
+        pairs = min(len(gone), len(came))
+        moved.extend(zip(gone[:pairs], came[:pairs]))
+        removed.extend(gone[pairs:])
+        added.extend(came[pairs:])
+
+    added.sort(key=_order)
+    removed.sort(key=_order)
+    moved.sort(key=lambda pair: _order(pair[0]))
+
+    groups, lecturers = set(), set()
+    for row in added + removed + [row for pair in moved for row in pair]:
+        groups.add((row.course_id, row.semester, row.year))
+        if row.lecturer_id:
+            lecturers.add(row.lecturer_id)
+
+    return {
+        'added': added,
+        'removed': removed,
+        'moved': moved,
+        'unchanged': len(old_keys & new_keys),
+        'groups': groups,
+        'lecturers': lecturers,
+    }
@@ -0,0 +1,264 @@
+"""
+Timetable change events, pushed to browsers over server-sent events.
+
+Publishing, unpublishing and generating a timetable each record one
+TimetableEvent row (timetable/signals.py). Publication events list the
+student groups (course, semester, year) and lecturers whose classes differ
+between the previously published version and the new one
+(diff.diff_rows), so a browser can refetch /timetable/formatted/ only when
+its own schedule changed instead of polling it.
+
+The table is the event bus, so every worker process sees every event,
+whatever the cache backend. Each process runs one EventBus poller for all
+its open streams: one indexed query every TIMETABLE_EVENTS_POLL_INTERVAL
+seconds while anyone is connected, not one per client. Events recorded
+in the same process wake the poller straight away. Events are deleted
+after TIMETABLE_EVENTS_RETENTION days.
+
+GET /api/timetable/events/ (timetable/async_views.py) streams them:
+
+- ``published`` / ``unpublished``: to everyone, with ``affected`` true when
+  the user's timetable changed (students: their own group, i.e. course,
+  semester and year; lecturers: their own classes; admins: always, with the
+  group and lecturer lists);
+- ``generated``: a new draft version, to admins only.
+
+Reconnecting browsers send Last-Event-ID and get the events they missed
+(up to REPLAY_LIMIT; beyond that a ``reset`` event tells them to refetch).
+A stream that falls QUEUE_SIZE events behind is closed and replays on
+reconnect the same way.
+
+EventSource can't send an Authorization header, and a token in the URL ends
+up in access and proxy logs. So browsers first POST to
+/api/timetable/events/ticket/ for a stream ticket, then open
+/api/timetable/events/?ticket=<ticket>. A ticket is the user id, the access
+token's expiry and a nonce, signed with SECRET_KEY (TimestampSigner) and
+valid for TIMETABLE_EVENTS_TICKET_TTL seconds, so any worker can check it
+without shared state; it can't be turned back into the token. The user is
+loaded and checked on redemption as for a token, and the stream still ends
+when the access token expires. Reuse of a ticket within its lifetime is
+refused through the cache: across workers only with a shared cache backend.
+"""
+import asyncio
+import json
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TimetableEvent, TimetableSlot
+
+# Events buffered per open stream before it is dropped (the browser reconnects and replays)
+QUEUE_SIZE = 100
+
+# Missed events replayed on reconnect; older gaps get a `reset` event
+REPLAY_LIMIT = 100
+
+# Browser reconnection delay sent with the stream (EventSource `retry`)
+RETRY_MS = 5000
+
+TICKET_SALT = 'timetable.events.ticket'
+TICKET_KEY = 'timetable:events:ticket:{}'  # spent nonces
+
+
+def _slot_rows(version_id):
+    from .metrics import slot_rows_from_queryset
+
+    if version_id is None:
+        return []
+    return slot_rows_from_queryset(TimetableSlot.objects.filter(version_id=version_id))
+
+
+def record_event(kind, version_id=None, previous_id=None):
+    """
+    Store an event and wake this process's streams. For publication events
+    `version_id` / `previous_id` are the published versions after and before
+    (None: unpublished).
+    """
+    groups, lecturers = [], []
+    if kind in ('published', 'unpublished'):
+        from .diff import diff_rows
+
+        changes = diff_rows(_slot_rows(previous_id), _slot_rows(version_id))
+        groups = sorted(list(group) for group in changes['groups'])
+        lecturers = sorted(changes['lecturers'])
+
+    event = TimetableEvent.objects.create(
+        kind=kind, version_id=version_id, previous_version_id=previous_id, groups=groups, lecturers=lecturers,
+    )
+    retention = timedelta(days=getattr(settings, 'TIMETABLE_EVENTS_RETENTION', 7))
+    TimetableEvent.objects.filter(created_at__lt=timezone.now() - retention).delete()
+    bus.wake()
+    return event
+
+
+def affects(event, user):
+    """Whether the event changes what `user` sees on their dashboard."""
+    if user.role == 'admin':
+        return True
+    if user.role == 'lecturer':
+        return user.pk in event.lecturers
+    profile = getattr(user, 'student_profile', None) if user.role == 'student' else None
+    if profile is None or profile.course_id is None:
+        return False
+    group = [profile.course_id, profile.semester, profile.year]
+    return group in event.groups
+
+
+def event_message(event, user):
+    """The SSE message for `user`, or None when the event isn't for them."""
+    if event.kind == 'generated':
+        if user.role != 'admin':
+            return None
+        data = {'version': event.version_id}
+    else:
+        data = {
+            'published': event.kind == 'published',
+            'version': event.version_id,
+            'affected': affects(event, user),
+        }
+        if user.role == 'admin':
+            data.update(previous=event.previous_version_id, groups=event.groups, lecturers=event.lecturers)
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {json.dumps(data)}\n\n"
+
+
+def issue_ticket(access_token):
+    """A signed stream ticket for the user of `access_token` (a validated token)."""
+    claims = {api_settings.USER_ID_CLAIM: access_token[api_settings.USER_ID_CLAIM], 'exp': access_token['exp']}
+    if api_settings.REVOKE_TOKEN_CLAIM in access_token:
+        claims[api_settings.REVOKE_TOKEN_CLAIM] = access_token[api_settings.REVOKE_TOKEN_CLAIM]
+    claims['nonce'] = secrets.token_urlsafe(12)
+    return signing.TimestampSigner(salt=TICKET_SALT).sign_object(claims)
+
+
+async def aredeem_ticket(ticket):
+    """The token claims of a valid, unexpired and unused ticket (then spent), else None."""
+    ttl = getattr(settings, 'TIMETABLE_EVENTS_TICKET_TTL', 30)
+    try:
+        claims = signing.TimestampSigner(salt=TICKET_SALT).unsign_object(ticket, max_age=ttl)
+    except (signing.BadSignature, ValueError):  # SignatureExpired is a BadSignature
+        return None
+    if not isinstance(claims, dict) or claims.get('exp', 0) <= time.time():
+        return None
+    # Only the first redemption may add the nonce
+    if not await cache.aadd(TICKET_KEY.format(claims.get('nonce')), True, ttl):
+        return None
+    return claims
+
+
+class EventBus:
+    """Fans new TimetableEvents out to this process's open streams (one poller per process)."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        self._last_id = None
+
+    async def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            if self._loop is not loop:
+                self._subscribers = set()  # streams of a previous event loop are gone
+            # A restarted poller starts from the newest event, not from where it stopped
+            self._last_id = None
+            self._loop, self._wakeup = loop, asyncio.Event()
+            self._task = loop.create_task(self._poll())
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def wake(self):
+        """Poll now (callable from any thread, e.g. after a publish commits)."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:  # loop closed
+                pass
+
+    async def _poll(self):
+        while True:
+            try:
+                if self._last_id is None:
+                    self._last_id = await TimetableEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+                events = [event async for event in TimetableEvent.objects.filter(id__gt=self._last_id)]
+            except DatabaseError:
+                events = []  # retried next interval
+            for event in events:
+                self._last_id = event.id
+                for queue in list(self._subscribers):
+                    try:
+                        queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        # Too slow: drop it; the browser reconnects and replays from Last-Event-ID
+                        self._subscribers.discard(queue)
+                        while not queue.empty():
+                            queue.get_nowait()
+                        queue.put_nowait(None)
+
+            if not self._subscribers:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), getattr(settings, 'TIMETABLE_EVENTS_POLL_INTERVAL', 2))
+            except asyncio.TimeoutError:
+                pass
+
+
+bus = EventBus()
+
+
+async def event_stream(user, last_event_id=None, expires_at=None):
+    """
+    Async iterator of SSE messages for `user` until `expires_at` (a Unix
+    time, e.g. the access token's expiry) or until the client goes away.
+    """
+    queue = await bus.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        sent = last_event_id or 0
+        if last_event_id is not None:
+            missed = [event async for event in
+                      TimetableEvent.objects.filter(id__gt=last_event_id)[:REPLAY_LIMIT + 1]]
+            if len(missed) > REPLAY_LIMIT:
+                sent = missed[-1].id
+                yield f"id: {sent}\nevent: reset\ndata: {{}}\n\n"
+            else:
+                for event in missed:
+                    sent = event.id
+                    message = event_message(event, user)
+                    if message:
+                        yield message
+
+        keepalive = getattr(settings, 'TIMETABLE_EVENTS_KEEPALIVE', 15)
+        while True:
+            timeout = keepalive if expires_at is None else min(keepalive, expires_at - time.time())
+            if timeout <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            if event.id <= sent:
+                continue
+            sent = event.id
+            message = event_message(event, user)
+            if message:
+                yield message
+    finally:
+        bus.unsubscribe(queue)
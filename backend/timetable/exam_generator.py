@@ -0,0 +1,159 @@
+"""
+Exam period scheduling: loads exams, cohorts, rooms and sessions, runs
+exams.schedule_exams and saves the result as ExamSitting rows.
+
+- Exams are the semester's Exam assessments that are Active or Scheduled.
+  Each is sat by exactly one student group, its subject's (course, semester,
+  year from the code), sized by the number of StudentProfiles in that group:
+  a Subject belongs to one course and there is no enrolment table, so
+  students outside the group (e.g. repeating the subject) are not counted
+  and their clashes are not seen. exams.schedule_exams accepts several
+  groups per exam once that data exists.
+- Rooms are the active classrooms, the same pool as the teaching timetable.
+  The teaching timetable itself is not consulted: it is suspended during
+  the exam period.
+- Sessions are every weekday from start to end at each EXAM_SESSIONS time.
+- Sittings already stored in the period for other exams (e.g. completed
+  ones, or another semester's) keep their rooms and groups.
+
+A run replaces the sittings of every exam in it. Scheduled exams get their
+due date moved to the exam day and status 'Scheduled'; exams that could not
+be placed go back to 'Active' and keep their due date. Every due date that
+changes, including ones set by hand, is listed in the result's 'moved'.
+"""
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models import Count
+
+from academics.models import Assessment, Classroom, SystemSettings
+from users.models import StudentProfile
+from .exams import ExamSession, ExamTask, schedule_exams
+from .grid import get_year_from_code
+from .models import ExamSitting
+
+DEFAULT_SESSIONS = [('09:00', '12:00'), ('14:00', '17:00')]
+
+
+def exam_sessions(start, end):
+    """ExamSessions for every weekday from start to end (inclusive), in time order."""
+    times = [
+        (datetime.strptime(begin, '%H:%M').time(), datetime.strptime(finish, '%H:%M').time())
+        for begin, finish in getattr(django_settings, 'EXAM_SESSIONS', DEFAULT_SESSIONS)
+    ]
+    times.sort()
+    sessions = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            sessions.extend(ExamSession(day, begin, finish) for begin, finish in times)
+        day += timedelta(days=1)
+    return sessions
+
+
+def _busy(sessions, batch_ids):
+    """{session index: (room ids, groups)} of stored sittings of exams outside the batch."""
+    by_day = {}
+    for index, session in enumerate(sessions):
+        by_day.setdefault(session.day, []).append(index)
+
+    busy = {}
+    sittings = (
+        ExamSitting.objects.filter(date__range=(sessions[0].day, sessions[-1].day))
+        .exclude(assessment_id__in=batch_ids)
+        .values_list('date', 'start_time', 'end_time', 'classroom_id',
+                     'assessment__subject__course_id', 'assessment__subject__semester', 'assessment__subject__code')
+    )
+    for day, begin, finish, room_id, course_id, semester, code in sittings:
+        for index in by_day.get(day, ()):
+            session = sessions[index]
+            if begin < session.end and session.start < finish:
+                rooms, groups = busy.setdefault(index, (set(), set()))
+                rooms.add(room_id)
+                groups.add((course_id, semester, get_year_from_code(code)))
+    return busy
+
+
+def schedule_exam_period(start, end, semester=None):
+    """
+    Schedule the semester's exams (default: the current semester) between
+    two dates. Returns {'statistics', 'unscheduled', 'moved', 'duration_ms'}.
+    """
+    started = time.perf_counter()
+    if semester is None:
+        semester = SystemSettings.get_cached().current_semester
+
+    exams = list(
+        Assessment.objects.filter(assessment_type='Exam', status__in=('Active', 'Scheduled'),
+                                  subject__semester=semester)
+        .select_related('subject').order_by('id')
+    )
+    cohorts = dict(
+        ((course_id, group_semester, year), count) for course_id, group_semester, year, count in
+        StudentProfile.objects.filter(course__isnull=False)
+        .values_list('course_id', 'semester', 'year').annotate(count=Count('id')).order_by()
+    )
+    rooms = list(Classroom.objects.filter(is_active=True).values_list('id', 'capacity'))
+    sessions = exam_sessions(start, end)
+    if not sessions:
+        raise ValueError('The exam period has no weekdays')
+
+    groups = {
+        exam.id: (exam.subject.course_id, exam.subject.semester, get_year_from_code(exam.subject.code))
+        for exam in exams
+    }
+    tasks = [ExamTask(exam.id, (groups[exam.id],), cohorts.get(groups[exam.id], 0)) for exam in exams]
+
+    batch_ids = [exam.id for exam in exams]
+    result = schedule_exams(tasks, rooms, sessions, _busy(sessions, batch_ids))
+
+    by_id = {exam.id: exam for exam in exams}
+    sittings, updated, moved = [], [], []
+    for assignment in result['assignments']:
+        session = sessions[assignment.session]
+        for room_id, seats in assignment.rooms:
+            sittings.append(ExamSitting(
+                assessment_id=assignment.exam_id, classroom_id=room_id, date=session.day,
+                start_time=session.start, end_time=session.end, seats=seats,
+            ))
+        exam = by_id[assignment.exam_id]
+        if exam.due_date != session.day:
+            moved.append({
+                'assessment_id': exam.id,
+                'title': exam.title,
+                'code': exam.subject.code,
+                'from': exam.due_date.isoformat() if exam.due_date else None,
+                'to': session.day.isoformat(),
+            })
+        exam.due_date, exam.status = session.day, 'Scheduled'
+        updated.append(exam)
+
+    unscheduled = []
+    for exam_id, reason in result['unscheduled']:
+        exam = by_id[exam_id]
+        exam.status = 'Active'
+        updated.append(exam)
+        unscheduled.append({
+            'assessment_id': exam.id,
+            'title': exam.title,
+            'code': exam.subject.code,
+            'students': cohorts.get(groups[exam_id], 0),
+            'reason': reason,
+        })
+
+    with transaction.atomic():
+        ExamSitting.objects.filter(assessment_id__in=batch_ids).delete()
+        ExamSitting.objects.bulk_create(sittings, batch_size=1000)
+        Assessment.objects.bulk_update(updated, ['due_date', 'status'], batch_size=1000)
+        # bulk_update skips the Assessment signals that refresh the deadline index
+        from academics.deadlines import invalidate_deadline_load
+        transaction.on_commit(invalidate_deadline_load)
+
+    return {
+        'statistics': {**result['statistics'], 'sessions': len(sessions), 'sittings': len(sittings)},
+        'unscheduled': unscheduled,
+        'moved': moved,
+        'duration_ms': int((time.perf_counter() - started) * 1000),
+    }
@@ -1,18 +1,53 @@
 from academics.models import Subject, Classroom, SystemSettings
-from timetable.models import TimetableSlot
-from django.db.models import Q
+from users.models import LecturerProfile
+from timetable.models import TimetableSlot, TimetableVersion, GenerationRun
+from django.conf import settings as django_settings
+from django.db import transaction
+from .audit import group_sizes
+from .grid import DAYS, get_year_from_code, seats_needed
+from .metrics import compute_timetable_metrics, slot_rows_from_placements
+from .problem import task_from_subject, room_from_classroom, parse_availability
+from .soft_constraints import resolve_weights
+from .parallel import solve_problem
+from .profiling import GenerationProfiler, ProfilingUnavailable
 import datetime
 
-def get_year_from_code(code):
+def load_problem(semester):
     """
-    Extract year level from subject code (e.g., CST101 -> 1, CST201 -> 2)
-    Defaults to 1 if parsing fails.
+    Load everything the solver needs, one query each for subjects (with
+    course), active rooms, lecturer availability and enrolment per student
+    group (the seats each subject's room must have).
+
+    Returns (subjects, classrooms, tasks, rooms): model instances for
+    reporting plus the plain in-memory tuples the solver works on.
     """
-    if code and len(code) > 3 and code[3].isdigit():
-        return int(code[3])
-    return 1
+    # Subjects for the CURRENT SEMESTER only
+    # This significantly reduces conflicts by not scheduling off-semester classes
+    subjects = list(
+        Subject.objects.filter(semester=semester).select_related('course').order_by('-weekly_hours')
+    )
+
+    # Filter for ACTIVE rooms only
+    classrooms = list(Classroom.objects.filter(is_active=True))
 
-def generate_timetable_algo():
+    # Lecturer preferred times (LecturerProfile.availability)
+    lecturer_ids = {s.lecturer_id for s in subjects if s.lecturer_id}
+    availability = dict(
+        LecturerProfile.objects.filter(user_id__in=lecturer_ids).values_list('user_id', 'availability')
+    )
+
+    sizes = group_sizes()
+    tasks = []
+    for subject in subjects:
+        group = (subject.course_id, subject.semester, get_year_from_code(subject.code))
+        tasks.append(task_from_subject(
+            subject, parse_availability(availability.get(subject.lecturer_id)), seats_needed(sizes, group)
+        ))
+    rooms = [room_from_classroom(room) for room in classrooms]
+    return subjects, classrooms, tasks, rooms
+
+
+def generate_timetable_algo(weights=None, local_search=None, time_budget=None, profile=False):
     """
     Enhanced timetable generator with comprehensive conflict detection.
     
@@ -25,181 +60,175 @@ def generate_timetable_algo():
     4. Room Availability:
        - Must be Active (is_active=True)
        - Must match Room Type (Lecture Hall / Computer Lab)
-       - Must have sufficient capacity (assumed default batch size = 30)
+       - Must seat the student group (enrolled students, or 30 when nobody
+         is enrolled: grid.seats_needed, the rule the audit checks)
        - No double booking.
     5. Lecturer Availability:
        - No double booking for lecturers.
     6. Student Group Availability:
        - No double booking for students (Course + Year/Semester).
+    7. Soft Constraints (see soft_constraints.py):
+       - Among allowed slots, pick the one with the lowest weighted penalty
+         (subject spread, lecturer consecutive hours, student gaps, preferred times).
+       - `weights` overrides the configured weights for this run.
+    8. Local Search (optional, see local_search.py):
+       - `local_search` = 'annealing' or 'tabu' improves the greedy result
+         for up to `time_budget` seconds (fewer unscheduled hours first,
+         then lower soft-constraint penalty).
+    9. Subject Ordering (TIMETABLE_SUBJECT_ORDERING, see solver.py):
+       - 'dsatur' places the most constrained subject next (fewest free
+         hours left for its lecturer, group and room type), re-evaluated
+         after each placement; 'static' keeps the weekly-hours order.
+    10. Parallel Solving (optional, see parallel.py):
+       - With TIMETABLE_SOLVER_WORKERS > 1, subjects that share no lecturer,
+         student group or scarce room type are solved as independent
+         components in worker processes, then merged and repaired.
+    11. Profiling (see profiling.py):
+       - Every run records per-phase timings and search counters
+         (candidates examined, rejections by clash type, rooms probed);
+         `profile=True` also captures a cProfile of the run (one at a time
+         per process, and only with TIMETABLE_SOLVER_WORKERS = 1; otherwise
+         ProfilingUnavailable is raised).
+
+    Clash checks run against an in-memory occupancy model; the database is
+    read once up front and written once at the end, as a new draft
+    TimetableVersion (publish it via /api/settings/publish_timetable/).
     """
     
-    # Clear existing timetable for regeneration
-    TimetableSlot.objects.all().delete()
-    
+    workers = getattr(django_settings, 'TIMETABLE_SOLVER_WORKERS', 1)
+    if profile and workers > 1:
+        # cProfile sees only this process, not the workers doing the solving
+        raise ProfilingUnavailable('profile needs TIMETABLE_SOLVER_WORKERS = 1')
+    profiler = GenerationProfiler(capture=profile)
+    profiler.start()
+    try:
+        return _generate(profiler, weights, local_search, time_budget, workers)
+    finally:
+        profiler.stop()  # no-op after a normal run; releases the capture if generation failed
+
+
+def _generate(profiler, weights, local_search, time_budget, workers):
+    """generate_timetable_algo() with the profiler running."""
+    weights = resolve_weights(weights)
+
     # Get active semester from settings
     try:
-        settings = SystemSettings.objects.first()
-        current_semester = settings.current_semester if settings else 1
+        settings = SystemSettings.get_cached()
+        current_semester = settings.current_semester
     except:
         current_semester = 1 # Fallback
-        
-    # Get subjects for the CURRENT SEMESTER only
-    # This significantly reduces conflicts by not scheduling off-semester classes
-    subjects = Subject.objects.filter(semester=current_semester).order_by('-weekly_hours')
-    
-    # Filter for ACTIVE rooms only
-    classrooms = list(Classroom.objects.filter(is_active=True))
-    
-    # Track scheduling results
+
+    with profiler.phase('load'):
+        subjects, classrooms, tasks, rooms = load_problem(current_semester)
+    if local_search and time_budget is None:
+        time_budget = getattr(django_settings, 'TIMETABLE_LOCAL_SEARCH_BUDGET', 5)
+    with profiler.phase('solve'):
+        solution = solve_problem(
+            tasks, rooms, weights, local_search=local_search, time_budget=time_budget,
+            workers=workers,
+            ordering=getattr(django_settings, 'TIMETABLE_SUBJECT_ORDERING', 'static'),
+        )
+    search_stats = solution['stats']
+    profiler.add_counters(solution['counters'])
+    if search_stats:
+        profiler.timings['local_search'] = search_stats['elapsed_ms']
+
+    # Store the result as a new draft version (the published version is untouched)
+    with profiler.phase('persist'), transaction.atomic():
+        version = TimetableVersion.objects.create(semester=current_semester)
+        TimetableSlot.objects.bulk_create([
+            TimetableSlot(
+                version=version,
+                subject_id=p.subject_id,
+                classroom_id=p.room_id,
+                day=DAYS[p.day],
+                start_time=datetime.time(p.hour, 0),
+                end_time=datetime.time(p.hour + 1, 0),
+            )
+            for p in solution['placements']
+        ], batch_size=500)
+    with profiler.phase('prune'):
+        prune_versions()
+
+    # Track subjects that couldn't be fully scheduled
     unscheduled = []
-    scheduled_count = 0
-    
-    # Define time constraints
-    START_HOUR = 8  # 8 AM
-    END_HOUR = 17   # 5 PM (classes end at 17:00, so last slot starts at 16:00)
-    DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    
-    # Default student batch size assumption (since not in Subject model)
-    DEFAULT_BATCH_SIZE = 30
-    
-    for subject in subjects:
-        hours_needed = subject.weekly_hours
-        hours_scheduled = 0
-        
-        # Determine Year Level for Break Time Logic
-        year_level = get_year_from_code(subject.code)
-        
-        # Determine Break Hour
-        # Year 1: 12:00 - 13:00
-        # Others: 13:00 - 14:00
-        break_hour = 12 if year_level == 1 else 13
-        
-        # Try to schedule each hour for this subject
-        for _ in range(hours_needed):
-            placed = False
-            
-            # Try each day
-            for day in DAYS:
-                if placed:
-                    break
-                
-                # Try each hour slot
-                for hour in range(START_HOUR, END_HOUR):
-                    if placed:
-                        break
-                    
-                    # ===== CONFLICT CHECK 1: Break Times =====
-                    if hour == break_hour:
-                        continue
-                    
-                    start_time = datetime.time(hour, 0)
-                    end_time_val = datetime.time(hour + 1, 0)
-                    
-                    # ===== CONFLICT CHECK 2: Lecturer Availability =====
-                    if subject.lecturer:
-                        lecturer_busy = TimetableSlot.objects.filter(
-                            subject__lecturer=subject.lecturer,
-                            day=day,
-                            start_time=start_time
-                        ).exists()
-                        
-                        if lecturer_busy:
-                            continue  # Lecturer has another class
-                    
-                    # ===== CONFLICT CHECK 3: Student Group Availability =====
-                    # Students in the same Course + Semester + Year cannot be in two places
-                    # We approximate "Student Group" using Course + Semester + Code Year
-                    
-                    # Find slots for same course & semester
-                    potential_clashes = TimetableSlot.objects.filter(
-                        subject__course=subject.course,
-                        subject__semester=subject.semester,
-                        day=day,
-                        start_time=start_time
-                    )
-                    
-                    # Filter further by Year (don't block Year 1 if Year 2 has class)
-                    group_busy = False
-                    for slot in potential_clashes:
-                        slot_year = get_year_from_code(slot.subject.code)
-                        if slot_year == year_level:
-                            group_busy = True
-                            break
-                    
-                    if group_busy:
-                        continue
-                    
-                    # ===== CONFLICT CHECK 4: Find Available Room =====
-                    required_room_type = subject.room_type
-                    
-                    for room in classrooms:
-                        # 4a. Check Room Type Matching
-                        # Strict check based on Subject preference
-                        if room.room_type != required_room_type:
-                            continue
-                            
-                        # 4b. Check Capacity
-                        if room.capacity < DEFAULT_BATCH_SIZE:
-                            continue
-                            
-                        # 4c. Check Room Availability (Double Booking)
-                        room_busy = TimetableSlot.objects.filter(
-                            classroom=room,
-                            day=day,
-                            start_time=start_time
-                        ).exists()
-                        
-                        if room_busy:
-                            continue
-                        
-                        # ALL CHECKS PASSED - Assign Slot
-                        TimetableSlot.objects.create(
-                            subject=subject,
-                            classroom=room,
-                            day=day,
-                            start_time=start_time,
-                            end_time=end_time_val
-                        )
-                        placed = True
-                        hours_scheduled += 1
-                        scheduled_count += 1
-                        break # Break room loop
-            
-        # End of subject scheduling loop
-        
-        # Track subjects that couldn't be fully scheduled
-        if hours_scheduled < hours_needed:
-            unscheduled.append({
-                'subject': subject.name,
-                'code': subject.code,
-                'course': subject.course.name if subject.course else 'N/A',
-                'semester': subject.semester,
-                'year': year_level,
-                'needed': hours_needed,
-                'scheduled': hours_scheduled,
-                'missing': hours_needed - hours_scheduled,
-                'reason': _diagnose_failure(subject, classrooms, year_level)
-            })
-    
-    return {
+    seats = {task.id: task.students for task in tasks}
+    with profiler.phase('diagnose'):
+        for subject in subjects:
+            hours_needed = subject.weekly_hours
+            hours_scheduled = solution['scheduled'].get(subject.id, 0)
+            if hours_scheduled < hours_needed:
+                year_level = get_year_from_code(subject.code)
+                unscheduled.append({
+                    'subject': subject.name,
+                    'code': subject.code,
+                    'course': subject.course.name if subject.course else 'N/A',
+                    'semester': subject.semester,
+                    'year': year_level,
+                    'needed': hours_needed,
+                    'scheduled': hours_scheduled,
+                    'missing': hours_needed - hours_scheduled,
+                    'reason': _diagnose_failure(subject, classrooms, seats[subject.id])
+                })
+
+    total_subjects = len(subjects)
+    result = {
         'unscheduled': unscheduled,
-        'total_subjects': subjects.count(),
-        'fully_scheduled': subjects.count() - len(unscheduled),
-        'total_slots_created': scheduled_count
+        'total_subjects': total_subjects,
+        'fully_scheduled': total_subjects - len(unscheduled),
+        'total_slots_created': len(solution['placements']),
+        'soft_penalty': solution['penalty'],
+        'local_search': search_stats,
+        'decomposition': solution['decomposition'],
     }
 
-def _diagnose_failure(subject, classrooms, year_level):
+    # Quality metrics, stored per run so solver configurations can be compared
+    with profiler.phase('metrics'):
+        metrics = compute_timetable_metrics(slot_rows_from_placements(solution['placements'], tasks), classrooms)
+    profiler.stop()
+    result['profiling'] = profiler.report()
+    run = GenerationRun.objects.create(
+        semester=current_semester,
+        statistics={**{k: v for k, v in result.items() if k != 'unscheduled'}, 'weights': weights},
+        unscheduled=unscheduled,
+        metrics=metrics,
+        duration_ms=int(profiler.timings['total']),
+        version=version,
+    )
+    result['run_id'] = run.id
+    result['version_id'] = version.id
+    result['metrics'] = metrics['summary']
+    return result
+
+def prune_versions(keep=None):
+    """
+    Delete the oldest timetable versions beyond TIMETABLE_VERSIONS_KEEP.
+    The published version is never deleted.
+    """
+    if keep is None:
+        keep = getattr(django_settings, 'TIMETABLE_VERSIONS_KEEP', 20)
+    if not keep:
+        return 0
+    published_id = SystemSettings.get_settings().published_version_id
+    stale = list(
+        TimetableVersion.objects.exclude(pk=published_id).order_by('-id').values_list('id', flat=True)[keep:]
+    )
+    if stale:
+        TimetableVersion.objects.filter(id__in=stale).delete()
+    return len(stale)
+
+def _diagnose_failure(subject, classrooms, students):
     """
     Helper function to provide user-friendly error messages
     """
     # Check Active Rooms
-    suitable_rooms = [r for r in classrooms if r.room_type == subject.room_type and r.is_active]
+    suitable_rooms = [r for r in classrooms
+                      if r.room_type == subject.room_type and r.is_active and r.capacity >= students]
     if not suitable_rooms:
-        return f"No active {subject.room_type}s available with sufficient capacity"
+        return f"No active {subject.room_type}s seating {students} students"
     
     # Check Lecturer
-    if not subject.lecturer:
+    if not subject.lecturer_id:
         return "No lecturer assigned to subject"
         
     return "Schedule conflict: No common free slots for Lecturer, Room, and Student Group"
-
@@ -0,0 +1,43 @@
+"""
+Weekly time grid shared by the generator, metrics and occupancy code.
+
+Pure Python (no Django imports) so it can be used from worker processes.
+"""
+
+# Mon-Fri, hourly slots starting 08:00 - 16:00 (classes end by 17:00)
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+START_HOUR = 8
+END_HOUR = 17
+HOURS_PER_DAY = END_HOUR - START_HOUR
+
+DAY_INDEX = {day: i for i, day in enumerate(DAYS)}
+
+# Seats assumed for a student group with nobody enrolled yet
+DEFAULT_BATCH_SIZE = 30
+
+
+def seats_needed(sizes, group):
+    """
+    Seats a student group needs: its enrolment (`sizes`, see audit.group_sizes),
+    or DEFAULT_BATCH_SIZE when nobody is enrolled. The generator places
+    classes and the audit checks them with this same rule.
+    """
+    return sizes.get(group) or DEFAULT_BATCH_SIZE
+
+
+def get_year_from_code(code):
+    """
+    Extract year level from subject code (e.g., CST101 -> 1, CST201 -> 2)
+    Defaults to 1 if parsing fails.
+    """
+    if code and len(code) > 3 and code[3].isdigit():
+        return int(code[3])
+    return 1
+
+
+def break_hour_for_year(year):
+    """
+    Year 1: 12:00 - 13:00
+    Others: 13:00 - 14:00
+    """
+    return 12 if year == 1 else 13
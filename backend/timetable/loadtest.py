@@ -0,0 +1,309 @@
+"""
+Term-start load test.
+
+Replays the publication-morning journey of a student against a running
+server:
+
+    POST /api/auth/login/  ->  GET /api/auth/me/
+    ->  GET /api/timetable/formatted/?course_id=..&view=calendar
+    ->  GET /api/subjects/grouped/?course_id=..&year=..
+
+Virtual users are asyncio tasks speaking plain HTTP/1.1 over asyncio
+streams (no extra client library), capped at a given concurrency. Latency is
+recorded per endpoint and summarised as throughput and p50/p95/p99.
+
+When no URL is given the server is started in this process (Django's
+threaded WSGI server on a free port), wrapped so that every database query
+made while handling a request is counted against its endpoint.
+
+Used by `manage.py loadtest`; see that command for the options.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from urllib.parse import urlencode, urlsplit
+
+# Accounts created for the test share this e-mail domain, so they can be removed afterwards
+LOADTEST_EMAIL_DOMAIN = 'loadtest.local'
+LOADTEST_PASSWORD = 'Loadtest@123'
+
+# Endpoint names, in journey order, with the path they are reported under
+ENDPOINTS = (
+    ('login', '/api/auth/login/'),
+    ('me', '/api/auth/me/'),
+    ('formatted', '/api/timetable/formatted/'),
+    ('grouped', '/api/subjects/grouped/'),
+)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+# --- Accounts ----------------------------------------------------------------
+
+def ensure_students(count, password=LOADTEST_PASSWORD):
+    """
+    Make sure `count` load-test student accounts exist, spread over the
+    existing courses and years 1-4. Returns their e-mail addresses.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+    from academics.models import Course
+    from users.models import StudentProfile
+
+    User = get_user_model()
+    emails = [f'loadtest{i}@{LOADTEST_EMAIL_DOMAIN}' for i in range(count)]
+    existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    missing = [email for email in emails if email not in existing]
+    if not missing:
+        return emails
+
+    course_ids = list(Course.objects.order_by('id').values_list('id', flat=True)) or [None]
+    hashed = make_password(password)  # hashed once, shared by every test account
+    with transaction.atomic():
+        # bulk_create skips the post_save signal, so profiles are created explicitly below
+        users = User.objects.bulk_create([
+            User(username=email.split('@')[0], email=email, role='student', password=hashed,
+                 first_name='Load', last_name='Test')
+            for email in missing
+        ], batch_size=500)
+        users = User.objects.filter(email__in=missing).order_by('id')
+        StudentProfile.objects.bulk_create([
+            StudentProfile(user=user, course_id=course_ids[i % len(course_ids)],
+                           year=i // len(course_ids) % 4 + 1, semester=1)
+            for i, user in enumerate(users)
+        ], batch_size=500)
+    return emails
+
+
+def remove_students():
+    """Delete every load-test account. Returns the number of users removed."""
+    from django.contrib.auth import get_user_model
+
+    deleted, per_model = get_user_model().objects.filter(email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}').delete()
+    return per_model.get(get_user_model()._meta.label, 0)
+
+
+# --- In-process server -------------------------------------------------------
+
+class QueryCountingApp:
+    """WSGI wrapper counting the database queries made for each request path."""
+
+    def __init__(self, app):
+        self.app = app
+        self.queries = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        from django.db import connections
+
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+            response = self.app(environ, start_response)
+        with self._lock:
+            self.queries[environ.get('PATH_INFO', '')] += count[0]
+        return response
+
+
+def start_server(host='127.0.0.1', port=0):
+    """
+    Serve this project from a background thread. Returns (server, app);
+    call server.shutdown() when done. app.queries holds per-path query totals.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    app = QueryCountingApp(WSGIHandler())
+    server = ThreadedWSGIServer((host, port), QuietHandler, allow_reuse_address=True)
+    server.daemon_threads = True
+    server.set_app(app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, app
+
+
+# --- HTTP client ---------------------------------------------------------------
+
+class Client:
+    """Minimal asyncio HTTP/1.1 client (one connection per request)."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+
+    async def request(self, method, path, token=None, payload=None):
+        """Returns (status, parsed JSON body or None)."""
+        body = json.dumps(payload).encode() if payload is not None else b''
+        lines = [
+            f'{method} {self.prefix}{path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Accept: application/json',
+            'Connection: close',
+            f'Content-Length: {len(body)}',
+        ]
+        if payload is not None:
+            lines.append('Content-Type: application/json')
+        if token:
+            lines.append(f'Authorization: Bearer {token}')
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            writer.write(raw)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+
+        head, _, content = response.partition(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.split(': ', 1) for line in header_lines if ': ' in line)
+        if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            content = _dechunk(content)
+        try:
+            data = json.loads(content) if content else None
+        except ValueError:
+            data = None
+        return int(status_line.split()[1]), data
+
+
+def _dechunk(content):
+    body = b''
+    while content:
+        size_line, _, content = content.partition(b'\r\n')
+        size = int(size_line.split(b';')[0], 16)
+        if not size:
+            break
+        body, content = body + content[:size], content[size + 2:]
+    return body
+
+
+# --- Journey -------------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # endpoint -> [ms]
+        self.statuses = defaultdict(Counter)  # endpoint -> {status: n}
+        self.errors = defaultdict(Counter)  # endpoint -> {exception name: n}
+
+    async def call(self, endpoint, coroutine):
+        started = time.perf_counter()
+        try:
+            status, data = await coroutine
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self.errors[endpoint][type(e).__name__] += 1
+            return None, None
+        self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        self.statuses[endpoint][status] += 1
+        return status, data
+
+
+async def student_journey(client, recorder, email, password):
+    """One student's publication-morning visit. Returns True if every step got a 200."""
+    status, data = await recorder.call('login', client.request(
+        'POST', '/api/auth/login/', payload={'email': email, 'password': password}))
+    if status != 200:
+        return False
+    token = data['access']
+
+    status, me = await recorder.call('me', client.request('GET', '/api/auth/me/', token=token))
+    if status != 200:
+        return False
+    profile = me.get('student_profile') or {}
+    course_id, year = profile.get('course'), profile.get('year')
+
+    query = urlencode({'course_id': course_id or '', 'view': 'calendar'})
+    status, _ = await recorder.call('formatted', client.request(
+        'GET', f'/api/timetable/formatted/?{query}', token=token))
+    ok = status == 200
+
+    query = urlencode({'course_id': course_id or '', **({'year': year} if year else {})})
+    status, _ = await recorder.call('grouped', client.request(
+        'GET', f'/api/subjects/grouped/?{query}', token=token))
+    return ok and status == 200
+
+
+async def run_load(base_url, emails, password, users, concurrency, timeout=30):
+    """
+    Run `users` journeys, at most `concurrency` at a time, cycling through
+    the given accounts. Returns (recorder, failed journeys, wall seconds).
+    """
+    client = Client(base_url, timeout)
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await student_journey(client, recorder, emails[i % len(emails)], password)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(users)))
+    return recorder, results.count(False), time.perf_counter() - started
+
+
+def build_report(recorder, failed, wall_seconds, users, concurrency, queries=None):
+    """
+    Summarise a run: throughput, latency percentiles (ms), status codes and,
+    when the server ran in-process, database query totals per endpoint.
+    """
+    endpoints = {}
+    total = 0
+    for name, path in ENDPOINTS:
+        latencies = recorder.latencies.get(name, [])
+        requests = len(latencies) + sum(recorder.errors[name].values())
+        total += requests
+        ok = recorder.statuses[name].get(200, 0)
+        entry = {
+            'path': path,
+            'requests': requests,
+            'ok': ok,
+            'statuses': {str(code): n for code, n in sorted(recorder.statuses[name].items())},
+            'errors': dict(recorder.errors[name]),
+            'throughput_rps': round(requests / wall_seconds, 1) if wall_seconds else None,
+            'p50_ms': _round(percentile(latencies, 50)),
+            'p95_ms': _round(percentile(latencies, 95)),
+            'p99_ms': _round(percentile(latencies, 99)),
+            'max_ms': _round(max(latencies) if latencies else None),
+        }
+        if queries is not None:
+            entry['db_queries'] = queries.get(path, 0)
+            entry['db_queries_per_request'] = round(entry['db_queries'] / requests, 1) if requests else None
+        endpoints[name] = entry
+
+    return {
+        'users': users,
+        'concurrency': concurrency,
+        'failed_journeys': failed,
+        'wall_seconds': round(wall_seconds, 2),
+        'requests': total,
+        'throughput_rps': round(total / wall_seconds, 1) if wall_seconds else None,
+        'journeys_per_second': round(users / wall_seconds, 1) if wall_seconds else None,
+        'endpoints': endpoints,
+    }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
@@ -0,0 +1,359 @@
+"""
+Local-search improvement pass run after the greedy solver.
+
+The greedy pass never revisits a decision. This stage keeps an in-memory
+model of the timetable (Occupancy + indexes of who sits in which slot) and
+repeatedly applies small moves, keeping or undoing them depending on the
+change in cost:
+
+    cost = (unscheduled hours, soft-constraint penalty)
+
+compared lexicographically: no soft-constraint saving, whatever the
+weights, can pay for losing a teaching hour.
+
+Moves:
+- relocate: move one placed hour to another allowed (day, hour, room)
+- swap:     exchange the times of two placed hours
+- insert:   place a missing hour, ejecting the (at most few) hours that
+            block it; ejected hours become missing and can be re-inserted
+
+Every move is priced incrementally from SoftScorer.delta() on the handful
+of day-rows it touches. Two strategies share the same moves:
+- 'annealing': simulated annealing with a time-based geometric cooling;
+               moves that leave hours unscheduled are never accepted
+- 'tabu':      best of a sampled neighbourhood, with recently vacated
+               (subject, day, hour) slots tabu for a few iterations
+
+Both stop at the wall-clock budget and return the best state seen, so the
+result never has more unscheduled hours than the greedy input.
+Pure Python (no Django imports).
+"""
+import math
+import random
+import time
+
+from .grid import DAYS, START_HOUR, END_HOUR
+from .occupancy import Occupancy
+from .problem import Placement
+from .soft_constraints import SoftScorer
+from .solver import rooms_by_type, rooms_for
+
+METHODS = ('annealing', 'tabu')
+
+# Annealing temperatures (in penalty units) at the start and end of the budget
+START_TEMPERATURE = 10.0
+END_TEMPERATURE = 0.05
+
+TABU_NEIGHBOURHOOD = 20
+TABU_TENURE = 15
+
+MAX_EJECTIONS = 3
+
+
+class SearchState:
+    """
+    Mutable timetable with O(1) book/release, slot indexes and a running
+    cost: (missing hours, soft penalty).
+    Placements are identified by an integer pid so moves can be undone/redone.
+    """
+
+    def __init__(self, tasks, rooms, placements, weights=None, occupancy=None):
+        self.tasks = {task.id: task for task in tasks}
+        by_type = rooms_by_type(rooms)
+        self.candidates = {task.id: rooms_for(by_type, task) for task in tasks}  # rooms seating the group
+        self.candidate_ids = {task_id: {room.id for room in rs} for task_id, rs in self.candidates.items()}
+        self.occupancy = occupancy if occupancy is not None else Occupancy()
+        self.scorer = SoftScorer(self.occupancy, weights)
+
+        self.placements = {}  # pid -> Placement
+        self.at = {}          # ('L'|'G'|'R', key, day, hour) -> pid
+        self.pids = []        # pids in a list for O(1) random choice
+        self.pid_pos = {}
+        self.next_pid = 0
+
+        self.missing = {task.id: task.weekly_hours for task in tasks}
+        self.missing_total = sum(self.missing.values())
+        self.penalty = 0
+
+        # Allowed (day, hour) pairs per break hour
+        self.allowed = {}
+        for task in tasks:
+            if task.break_hour not in self.allowed:
+                self.allowed[task.break_hour] = [
+                    (day, hour) for day in range(len(DAYS))
+                    for hour in range(START_HOUR, END_HOUR) if hour != task.break_hour
+                ]
+
+        for p in placements:
+            self.add(self.tasks[p.subject_id], p.room_id, p.day, p.hour)
+
+    # ----- primitive operations -----
+
+    def _keys(self, task, room_id, day, hour):
+        keys = [('G', task.group, day, hour), ('R', room_id, day, hour)]
+        if task.lecturer_id:
+            keys.append(('L', task.lecturer_id, day, hour))
+        return keys
+
+    def add(self, task, room_id, day, hour, pid=None):
+        delta = self.scorer.delta(task, day, hour)
+        self.occupancy.book(task, room_id, day, hour)
+        if pid is None:
+            pid = self.next_pid
+            self.next_pid += 1
+        self.placements[pid] = Placement(task.id, room_id, day, hour)
+        for key in self._keys(task, room_id, day, hour):
+            self.at[key] = pid
+        self.pid_pos[pid] = len(self.pids)
+        self.pids.append(pid)
+        self.missing[task.id] -= 1
+        self.missing_total -= 1
+        self.penalty += delta
+        return pid
+
+    def remove(self, pid):
+        p = self.placements.pop(pid)
+        task = self.tasks[p.subject_id]
+        for key in self._keys(task, p.room_id, p.day, p.hour):
+            del self.at[key]
+        last = self.pids.pop()
+        if last != pid:
+            pos = self.pid_pos[pid]
+            self.pids[pos] = last
+            self.pid_pos[last] = pos
+        del self.pid_pos[pid]
+        self.occupancy.release(task, p.room_id, p.day, p.hour)
+        self.missing[task.id] += 1
+        self.missing_total += 1
+        self.penalty -= self.scorer.delta(task, p.day, p.hour)
+        return p
+
+    @property
+    def cost(self):
+        return (self.missing_total, self.penalty)
+
+    # ----- journal (undo/redo) -----
+
+    def _do_add(self, journal, task, room_id, day, hour):
+        pid = self.add(task, room_id, day, hour)
+        journal.append(('add', pid, self.placements[pid]))
+
+    def _do_remove(self, journal, pid):
+        journal.append(('remove', pid, self.remove(pid)))
+
+    def undo(self, journal):
+        for op, pid, p in reversed(journal):
+            if op == 'add':
+                self.remove(pid)
+            else:
+                self.add(self.tasks[p.subject_id], p.room_id, p.day, p.hour, pid=pid)
+
+    def redo(self, journal):
+        for op, pid, p in journal:
+            if op == 'add':
+                self.add(self.tasks[p.subject_id], p.room_id, p.day, p.hour, pid=pid)
+            else:
+                self.remove(pid)
+
+    # ----- moves -----
+
+    def _free_room(self, task, day, hour, prefer=None):
+        if (prefer is not None and prefer in self.candidate_ids[task.id]
+                and self.occupancy.room_free(prefer, day, hour)):
+            return prefer
+        for room in self.candidates[task.id]:
+            if self.occupancy.room_free(room.id, day, hour):
+                return room.id
+        return None
+
+    def _relocate(self, rng, journal):
+        pid = rng.choice(self.pids)
+        p = self.placements[pid]
+        task = self.tasks[p.subject_id]
+        self._do_remove(journal, pid)
+        allowed = self.allowed[task.break_hour]
+        for _ in range(10):
+            day, hour = rng.choice(allowed)
+            if (day, hour) == (p.day, p.hour) or not self.occupancy.teaching_free(task, day, hour):
+                continue
+            room_id = self._free_room(task, day, hour)
+            if room_id is not None:
+                self._do_add(journal, task, room_id, day, hour)
+                return True
+        return False
+
+    def _swap(self, rng, journal):
+        pid1 = rng.choice(self.pids)
+        pid2 = rng.choice(self.pids)
+        p1, p2 = self.placements[pid1], self.placements[pid2]
+        if p1.subject_id == p2.subject_id or (p1.day, p1.hour) == (p2.day, p2.hour):
+            return False
+        t1, t2 = self.tasks[p1.subject_id], self.tasks[p2.subject_id]
+        if p2.hour == t1.break_hour or p1.hour == t2.break_hour:
+            return False
+        self._do_remove(journal, pid1)
+        self._do_remove(journal, pid2)
+        for task, target in ((t1, p2), (t2, p1)):
+            if not self.occupancy.teaching_free(task, target.day, target.hour):
+                return False
+            room_id = self._free_room(task, target.day, target.hour, prefer=target.room_id)
+            if room_id is None:
+                return False
+            self._do_add(journal, task, room_id, target.day, target.hour)
+        return True
+
+    def _insert(self, rng, journal):
+        waiting = [task_id for task_id, n in self.missing.items() if n > 0]
+        task = self.tasks[rng.choice(waiting)]
+        candidates = self.candidates[task.id]
+        if not candidates:
+            return False
+        day, hour = rng.choice(self.allowed[task.break_hour])
+
+        # Eject whoever blocks the lecturer and the student group at that time
+        blockers = set()
+        for key in (('L', task.lecturer_id, day, hour), ('G', task.group, day, hour)):
+            if key[1] is not None and key in self.at:
+                blockers.add(self.at[key])
+        if len(blockers) > MAX_EJECTIONS:
+            return False
+        for pid in blockers:
+            self._do_remove(journal, pid)
+
+        room_id = self._free_room(task, day, hour)
+        if room_id is None:
+            # Every matching room is taken: eject one room occupant
+            room_id = rng.choice(candidates).id
+            self._do_remove(journal, self.at[('R', room_id, day, hour)])
+        if not self.occupancy.teaching_free(task, day, hour):
+            return False
+        self._do_add(journal, task, room_id, day, hour)
+        return True
+
+    def random_move(self, rng, journal):
+        """
+        Apply one random move, recording it in journal.
+        Returns the cost delta (missing hours, penalty), or None (with the
+        state unchanged) if the move was infeasible.
+        """
+        missing, penalty = self.cost
+        roll = rng.random()
+        if self.missing_total and roll < 0.3:
+            ok = self._insert(rng, journal)
+        elif not self.pids:
+            ok = False
+        elif roll < 0.65:
+            ok = self._relocate(rng, journal)
+        else:
+            ok = self._swap(rng, journal)
+        if not ok:
+            self.undo(journal)
+            journal.clear()
+            return None
+        return (self.missing_total - missing, self.penalty - penalty)
+
+    def snapshot(self):
+        return list(self.placements.values()), self.cost
+
+
+def improve(tasks, rooms, placements, weights=None, method='annealing', time_budget=5.0, seed=None,
+            max_iterations=None, occupancy=None):
+    """
+    Improve a greedy solution within `time_budget` seconds.
+    `occupancy` may carry blocked lecturer hours; it must not already
+    contain `placements`.
+
+    Returns a dict like solver.solve() (placements, scheduled, penalty) plus
+    'stats' describing the search.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown local search method '{method}'. Valid: {', '.join(METHODS)}")
+
+    started = time.perf_counter()
+    deadline = started + max(0.0, time_budget)
+    rng = random.Random(seed)
+    state = SearchState(tasks, rooms, placements, weights, occupancy)
+
+    initial = state.cost
+    best_cost = state.cost
+    best = None  # None means "the current state is the best seen"
+    iterations = accepted = 0
+    temperature = START_TEMPERATURE
+    tabu = {}
+
+    while max_iterations is None or iterations < max_iterations:
+        if iterations % 64 == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            fraction = (now - started) / time_budget if time_budget else 1.0
+            temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** fraction
+        iterations += 1
+
+        if method == 'annealing':
+            journal = []
+            delta = state.random_move(rng, journal)
+            if delta is None:
+                continue
+            missing, penalty = delta
+            if missing > 0 or (missing == 0 and penalty > 0
+                               and rng.random() >= math.exp(-penalty / temperature)):
+                state.undo(journal)
+                continue
+        else:
+            # Tabu: best non-tabu move of a sampled neighbourhood (aspiration: new best)
+            journal, delta = None, None
+            for _ in range(TABU_NEIGHBOURHOOD):
+                trial = []
+                trial_delta = state.random_move(rng, trial)
+                if trial_delta is None:
+                    continue
+                is_tabu = any(
+                    tabu.get((p.subject_id, p.day, p.hour), 0) > iterations
+                    for op, _, p in trial if op == 'add'
+                )
+                improves_best = state.cost < best_cost
+                state.undo(trial)
+                if is_tabu and not improves_best:
+                    continue
+                if delta is None or trial_delta < delta:
+                    journal, delta = trial, trial_delta
+            if journal is None:
+                continue
+            state.redo(journal)
+            for op, _, p in journal:
+                if op == 'remove':
+                    tabu[(p.subject_id, p.day, p.hour)] = iterations + TABU_TENURE
+
+        accepted += 1
+        if state.cost < best_cost:
+            best_cost = state.cost
+            best = None
+        elif best is None and delta > (0, 0):
+            # Leaving the best state: snapshot it before moving on
+            state.undo(journal)
+            best = state.snapshot()
+            state.redo(journal)
+
+    final_placements, (final_missing, final_penalty) = best if best is not None else state.snapshot()
+
+    scheduled = {task.id: 0 for task in tasks}
+    for p in final_placements:
+        scheduled[p.subject_id] += 1
+
+    return {
+        'placements': final_placements,
+        'scheduled': scheduled,
+        'penalty': final_penalty,
+        'stats': {
+            'method': method,
+            'time_budget': time_budget,
+            'elapsed_ms': int((time.perf_counter() - started) * 1000),
+            'iterations': iterations,
+            'accepted_moves': accepted,
+            'initial_penalty': initial[1],
+            'final_penalty': final_penalty,
+            'initial_unscheduled_hours': initial[0],
+            'final_unscheduled_hours': final_missing,
+        },
+    }
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from timetable.audit import audit_version
+from timetable.models import TimetableVersion
+
+
+class Command(BaseCommand):
+    help = 'Check a timetable version for lecturer/group/room clashes, break-hour, room-type and capacity violations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timetable-version', dest='timetable_version', default='published',
+                            help='Version id, "published" or "latest" (default: published)')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+        parser.add_argument('--fail-on-conflict', action='store_true',
+                            help='Exit with an error if any conflict is found (for CI/cron)')
+
+    def handle(self, *args, **options):
+        version_id = TimetableVersion.resolve(options['timetable_version'])
+        if version_id is None or not TimetableVersion.objects.filter(pk=version_id).exists():
+            raise CommandError(f"Timetable version '{options['timetable_version']}' not found")
+
+        report = audit_version(version_id)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(f"Version {version_id}: {report['total_slots']} slots, {report['total_conflicts']} conflicts")
+            for kind, count in report['summary'].items():
+                if count:
+                    self.stdout.write(f"  {kind}: {count}")
+            for conflict in report['conflicts']:
+                self.stdout.write(
+                    f"  [{conflict['type']}] {conflict['day']} {conflict['start_time']}-{conflict['end_time']} "
+                    f"slots {conflict['slots']}: {conflict['detail']}"
+                )
+
+        if report['total_conflicts'] and options['fail_on_conflict']:
+            raise CommandError(f"{report['total_conflicts']} conflicts found")
+        if not report['total_conflicts']:
+            self.stdout.write(self.style.SUCCESS('No conflicts found'))
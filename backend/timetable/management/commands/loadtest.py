@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from timetable.loadtest import (
+    LOADTEST_PASSWORD, build_report, ensure_students, remove_students, run_load, start_server,
+)
+
+
+class Command(BaseCommand):
+    help = ('Replay the term-start student journey (login, auth/me, formatted timetable, grouped subjects) '
+            'at a given concurrency and report throughput, p50/p95/p99 latency and DB queries per endpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Student journeys to run (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=20, help='Journeys in flight at once (default: 20)')
+        parser.add_argument('--accounts', type=int, default=50,
+                            help='Load-test student accounts to seed and cycle through (default: 50)')
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000. '
+                                          'Default: serve this project in-process and count its DB queries')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds (default: 30)')
+        parser.add_argument('--no-throttle', action='store_true',
+                            help='Disable DRF throttling for the in-process server (every request comes from one IP)')
+        parser.add_argument('--allow-accounts', action='store_true',
+                            help='Allow creating load-test student accounts when DEBUG is off. '
+                                 'Never point this at a production database')
+        parser.add_argument('--keep-accounts', action='store_true',
+                            help='Keep the load-test accounts afterwards (default: delete them)')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['concurrency'] < 1 or options['accounts'] < 1:
+            raise CommandError('--users, --concurrency and --accounts must be at least 1')
+        if options['url'] and options['no_throttle']:
+            raise CommandError('--no-throttle only applies to the in-process server')
+        # SECURITY: seeding student accounts must never happen by accident on a live database
+        if not settings.DEBUG and not options['allow_accounts']:
+            raise CommandError('loadtest creates student accounts in the configured database. '
+                               'Run it with DEBUG=True or pass --allow-accounts.')
+
+        server = app = None
+        throttles = None
+        removed = None
+        try:
+            emails = ensure_students(options['accounts'])
+            base_url = options['url']
+            if not base_url:
+                server, app = start_server()
+                base_url = 'http://%s:%s' % server.server_address[:2]
+
+            if options['no_throttle']:
+                from rest_framework.views import APIView
+                throttles, APIView.throttle_classes = APIView.throttle_classes, []
+
+            # The login endpoint has its own token buckets (users/throttling.py)
+            with override_settings(**({'LOGIN_THROTTLE': {}} if options['no_throttle'] else {})):
+                recorder, failed, wall = asyncio.run(run_load(
+                    base_url, emails, LOADTEST_PASSWORD, options['users'], options['concurrency'], options['timeout'],
+                ))
+        finally:
+            if throttles is not None:
+                APIView.throttle_classes = throttles
+            if server:
+                server.shutdown()
+                server.server_close()
+            if not options['keep_accounts']:
+                removed = remove_students()
+
+        report = build_report(recorder, failed, wall, options['users'], options['concurrency'],
+                              queries=dict(app.queries) if app else None)
+        if removed is not None:
+            report['accounts_removed'] = removed
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} of {report['users']} journeys had a failed step"))
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{report['users']} journeys, concurrency {report['concurrency']}: {report['requests']} requests "
+            f"in {report['wall_seconds']}s ({report['throughput_rps']} req/s, {report['journeys_per_second']} journeys/s)"
+        )
+        with_queries = any('db_queries' in entry for entry in report['endpoints'].values())
+        header = f"{'endpoint':<11}{'requests':>9}{'ok':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        if with_queries:
+            header += f"{'queries':>9}{'q/req':>7}"
+        self.stdout.write(header)
+        for name, entry in report['endpoints'].items():
+            line = (f"{name:<11}{entry['requests']:>9}{entry['ok']:>7}{_fmt(entry['throughput_rps']):>8}"
+                    f"{_fmt(entry['p50_ms']):>9}{_fmt(entry['p95_ms']):>9}{_fmt(entry['p99_ms']):>9}{_fmt(entry['max_ms']):>9}")
+            if with_queries:
+                line += f"{entry['db_queries']:>9}{_fmt(entry['db_queries_per_request']):>7}"
+            self.stdout.write(line)
+            failures = {code: n for code, n in entry['statuses'].items() if code != '200'}
+            failures.update(entry['errors'])
+            if failures:
+                self.stdout.write(f"{'':<11}non-200: {failures}")
+
+
+def _fmt(value):
+    return '-' if value is None else value
@@ -0,0 +1,198 @@
+"""
+Timetable quality metrics.
+
+Every slot is folded into per-entity bitmasks (one int per entity per day,
+one bit per teaching hour), so gaps, spans and loads for a whole day are
+computed with a handful of integer operations instead of sorting and
+walking each entity's slot list.
+
+Input rows are SlotRow tuples, which can be built from the database
+(slot_rows_from_queryset) or directly from the solver's in-memory
+placements (slot_rows_from_placements) without re-reading the table.
+"""
+from collections import defaultdict, namedtuple
+
+from .grid import DAYS, DAY_INDEX, START_HOUR, HOURS_PER_DAY, get_year_from_code, break_hour_for_year
+from .occupancy import span_and_gaps
+
+# hour: first teaching hour; hours: teaching hours the slot covers (manual slots can be longer or off-grid)
+SlotRow = namedtuple('SlotRow', 'subject_id lecturer_id course_id semester year room_id day hour hours',
+                     defaults=(1,))
+
+# A day finishing with a class that starts at or after this hour counts as a late finish
+LATE_START_HOUR = 16
+
+
+def slot_rows_from_queryset(queryset):
+    """
+    Convert TimetableSlot rows to SlotRow tuples with a single values_list query.
+    A slot covers every teaching hour overlapping [start_time, end_time).
+    """
+    rows = []
+    for subject_id, lecturer_id, course_id, semester, code, room_id, day, start_time, end_time in queryset.values_list(
+        'subject_id', 'subject__lecturer_id', 'subject__course_id', 'subject__semester',
+        'subject__code', 'classroom_id', 'day', 'start_time', 'end_time'
+    ):
+        last = end_time.hour + (1 if end_time.minute or end_time.second else 0)
+        rows.append(SlotRow(
+            subject_id, lecturer_id, course_id, semester, get_year_from_code(code),
+            room_id, day, start_time.hour, max(1, last - start_time.hour)
+        ))
+    return rows
+
+
+def row_hours(row):
+    """Teaching hours (within the grid) covered by a SlotRow."""
+    return range(max(row.hour, START_HOUR), min(row.hour + row.hours, START_HOUR + HOURS_PER_DAY))
+
+
+def slot_rows_from_placements(placements, tasks):
+    """
+    Convert solver Placements (see problem.py) to SlotRow tuples without touching the database.
+    """
+    by_id = {task.id: task for task in tasks}
+    rows = []
+    for p in placements:
+        task = by_id[p.subject_id]
+        rows.append(SlotRow(
+            task.id, task.lecturer_id, task.course_id, task.semester, task.year,
+            p.room_id, DAYS[p.day], p.hour
+        ))
+    return rows
+
+
+def _pct(part, whole):
+    return round(100.0 * part / whole, 1) if whole else 0.0
+
+
+def compute_timetable_metrics(rows, rooms):
+    """
+    Compute quality metrics for a set of slots.
+
+    rows: iterable of SlotRow
+    rooms: iterable of objects with id, room_number, room_type (the room pool
+           used as the utilisation denominator, so idle rooms count as 0%)
+    """
+    n_days = len(DAYS)
+    room_masks = defaultdict(lambda: [0] * n_days)
+    lecturer_masks = defaultdict(lambda: [0] * n_days)
+    group_masks = defaultdict(lambda: [0] * n_days)
+    by_day = [0] * n_days
+    by_hour = [0] * HOURS_PER_DAY
+    total = 0
+
+    # Single pass: fold every slot into the bitmask grids
+    for row in rows:
+        d = DAY_INDEX.get(row.day)
+        if d is None:
+            continue
+        for hour in row_hours(row):
+            h = hour - START_HOUR
+            bit = 1 << h
+            room_masks[row.room_id][d] |= bit
+            if row.lecturer_id:
+                lecturer_masks[row.lecturer_id][d] |= bit
+            group_masks[(row.course_id, row.semester, row.year)][d] |= bit
+            by_day[d] += 1
+            by_hour[h] += 1
+            total += 1
+
+    # Room utilisation per room/day
+    room_reports = []
+    booked_total = 0
+    room_list = list(rooms)
+    for room in room_list:
+        masks = room_masks.get(room.id, [0] * n_days)
+        booked = [m.bit_count() for m in masks]
+        booked_total += sum(booked)
+        room_reports.append({
+            'room_id': room.id,
+            'room_number': room.room_number,
+            'room_type': room.room_type,
+            'hours_booked': sum(booked),
+            'utilisation_pct': _pct(sum(booked), HOURS_PER_DAY * n_days),
+            'by_day': {DAYS[d]: _pct(booked[d], HOURS_PER_DAY) for d in range(n_days)},
+        })
+
+    # Lecturer idle gaps and daily load
+    lecturer_reports = []
+    lecturer_gap_total = 0
+    for lecturer_id, masks in lecturer_masks.items():
+        loads = [m.bit_count() for m in masks]
+        gaps = [span_and_gaps(m)[2] for m in masks]
+        lecturer_gap_total += sum(gaps)
+        lecturer_reports.append({
+            'lecturer_id': lecturer_id,
+            'total_hours': sum(loads),
+            'teaching_days': sum(1 for load in loads if load),
+            'max_daily_load': max(loads),
+            'idle_gap_hours': sum(gaps),
+            'daily_load': {DAYS[d]: loads[d] for d in range(n_days)},
+        })
+
+    # Student-group gaps and late finishes (the group's break hour is not a gap)
+    group_reports = []
+    group_gap_total = 0
+    late_total = 0
+    for (course_id, semester, year), masks in group_masks.items():
+        break_bit = 1 << (break_hour_for_year(year) - START_HOUR)
+        gaps = 0
+        late_days = []
+        for d, mask in enumerate(masks):
+            first, last, day_gaps = span_and_gaps(mask, break_bit)
+            gaps += day_gaps
+            if last is not None and START_HOUR + last >= LATE_START_HOUR:
+                late_days.append(DAYS[d])
+        group_gap_total += gaps
+        late_total += len(late_days)
+        group_reports.append({
+            'course_id': course_id,
+            'semester': semester,
+            'year': year,
+            'total_hours': sum(m.bit_count() for m in masks),
+            'gap_hours': gaps,
+            'late_finishes': len(late_days),
+            'late_days': late_days,
+        })
+
+    mean = total / n_days
+    spread = (sum((c - mean) ** 2 for c in by_day) / n_days) ** 0.5
+
+    return {
+        'summary': {
+            'total_classes': total,
+            'room_utilisation_pct': _pct(booked_total, HOURS_PER_DAY * n_days * len(room_list)),
+            'lecturer_gap_hours': lecturer_gap_total,
+            'student_gap_hours': group_gap_total,
+            'late_finishes': late_total,
+            'busiest_day': DAYS[by_day.index(max(by_day))] if total else None,
+            'day_spread_stddev': round(spread, 2),
+        },
+        'distribution': {
+            'by_day': {DAYS[d]: by_day[d] for d in range(n_days)},
+            'by_hour': {f"{START_HOUR + h:02d}:00": by_hour[h] for h in range(HOURS_PER_DAY)},
+        },
+        'rooms': sorted(room_reports, key=lambda r: -r['utilisation_pct']),
+        'lecturers': sorted(lecturer_reports, key=lambda r: -r['idle_gap_hours']),
+        'student_groups': sorted(group_reports, key=lambda r: (-r['gap_hours'], -r['late_finishes'])),
+    }
+
+
+def label_report(report):
+    """
+    Add human-readable names to lecturer and student-group entries (two queries).
+    """
+    from users.models import User
+    from academics.models import Course
+
+    lecturer_ids = [r['lecturer_id'] for r in report['lecturers']]
+    names = dict(User.objects.filter(id__in=lecturer_ids).values_list('id', 'username'))
+    for entry in report['lecturers']:
+        entry['lecturer_name'] = names.get(entry['lecturer_id'])
+
+    course_ids = {r['course_id'] for r in report['student_groups']}
+    codes = dict(Course.objects.filter(id__in=course_ids).values_list('id', 'code'))
+    for entry in report['student_groups']:
+        code = codes.get(entry['course_id'], 'N/A')
+        entry['group'] = f"{code} Y{entry['year']} S{entry['semester']}"
+    return report
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('semester', models.IntegerField(default=1)),
+                ('statistics', models.JSONField(blank=True, default=dict)),
+                ('unscheduled', models.JSONField(blank=True, default=list)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('duration_ms', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimetableStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_published', models.BooleanField(default=False)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_existing_slots(apps, schema_editor):
+    """Move the existing live timetable into an initial version."""
+    TimetableSlot = apps.get_model('timetable', 'TimetableSlot')
+    TimetableVersion = apps.get_model('timetable', 'TimetableVersion')
+    if not TimetableSlot.objects.exists():
+        return
+    SystemSettings = apps.get_model('academics', 'SystemSettings')
+    settings = SystemSettings.objects.filter(pk=1).first()
+    version = TimetableVersion.objects.create(
+        semester=settings.current_semester if settings else 1,
+        label='Initial timetable',
+    )
+    TimetableSlot.objects.filter(version__isnull=True).update(version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0009_systemsettings_is_timetable_published'),
+        ('timetable', '0002_generationrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('semester', models.IntegerField(default=1)),
+                ('label', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='generationrun',
+            name='version',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='run', to='timetable.timetableversion'),
+        ),
+        migrations.AddField(
+            model_name='timetableslot',
+            name='version',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='timetable.timetableversion'),
+        ),
+        migrations.RunPython(assign_existing_slots, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='timetableslot',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='timetableslot',
+            name='version',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='timetable.timetableversion'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timetableslot',
+            unique_together={('version', 'classroom', 'day', 'start_time')},
+        ),
+    ]
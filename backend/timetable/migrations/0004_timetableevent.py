@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0003_timetableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('kind', models.CharField(choices=[('published', 'Published'), ('unpublished', 'Unpublished'), ('generated', 'Generated')], max_length=20)),
+                ('version_id', models.IntegerField(blank=True, null=True)),
+                ('previous_version_id', models.IntegerField(blank=True, null=True)),
+                ('groups', models.JSONField(blank=True, default=list)),
+                ('lecturers', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
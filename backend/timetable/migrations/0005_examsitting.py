@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0010_systemsettings_published_version'),
+        ('timetable', '0004_timetableevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamSitting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('seats', models.PositiveIntegerField()),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sittings', to='academics.assessment')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_sittings', to='academics.classroom')),
+            ],
+            options={
+                'ordering': ['date', 'start_time', 'classroom_id'],
+                'unique_together': {('classroom', 'date', 'start_time')},
+            },
+        ),
+    ]
@@ -1,5 +1,50 @@
 from django.db import models
-from academics.models import Subject, Classroom
+from academics.models import Subject, Classroom, Assessment
+
+class TimetableVersion(models.Model):
+    """
+    One generated timetable. Each generation run writes a new version instead
+    of wiping the live table; publishing points SystemSettings.published_version
+    at a version (a single-row update), so students keep reading the published
+    version while admins generate and edit drafts, and rollback is instant.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+    semester = models.IntegerField(default=1)
+    label = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.label or f"Timetable v{self.pk}"
+
+    @classmethod
+    def latest_id(cls):
+        return cls.objects.order_by('-id').values_list('id', flat=True).first()
+
+    @classmethod
+    def resolve(cls, requested):
+        """Version id for 'published', 'latest' or a numeric id (None if invalid)."""
+        if requested == 'published':
+            from academics.models import SystemSettings
+            return SystemSettings.publication()[1]
+        if requested == 'latest':
+            return cls.latest_id()
+        try:
+            return int(requested)
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    async def aresolve(cls, requested):
+        """resolve() for async views."""
+        if requested == 'published':
+            from academics.models import SystemSettings
+            return (await SystemSettings.apublication())[1]
+        if requested == 'latest':
+            return await cls.objects.order_by('-id').values_list('id', flat=True).afirst()
+        return cls.resolve(requested)
+
 
 class TimetableSlot(models.Model):
     DAYS_OF_WEEK = (
@@ -10,6 +55,7 @@ class TimetableSlot(models.Model):
         ('Friday', 'Friday'),
     )
     
+    version = models.ForeignKey(TimetableVersion, on_delete=models.CASCADE, related_name='slots')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE)
     day = models.CharField(max_length=10, choices=DAYS_OF_WEEK)
@@ -17,7 +63,7 @@ class TimetableSlot(models.Model):
     end_time = models.TimeField()
     
     class Meta:
-        unique_together = ('classroom', 'day', 'start_time') # Room can't be double booked
+        unique_together = ('version', 'classroom', 'day', 'start_time') # Room can't be double booked (per version)
         # Also lecturer can't be double booked, but that's a validation rule, not easily unique_together since lecturer is on Subject.
 
     def __str__(self):
@@ -40,3 +86,71 @@ class TimetableStatus(models.Model):
 
     def __str__(self):
         return f"Timetable Status: {'Published' if self.is_published else 'Draft'}"
+
+class GenerationRun(models.Model):
+    """
+    One execution of the timetable generator, with its statistics and quality metrics.
+    Stored so that different solver configurations can be compared objectively.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+    semester = models.IntegerField(default=1)
+    statistics = models.JSONField(default=dict, blank=True)
+    unscheduled = models.JSONField(default=list, blank=True)
+    metrics = models.JSONField(default=dict, blank=True)
+    duration_ms = models.IntegerField(default=0)
+    version = models.OneToOneField(
+        TimetableVersion, on_delete=models.SET_NULL, null=True, blank=True, related_name='run'
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Generation run #{self.pk} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class TimetableEvent(models.Model):
+    """
+    A change students, lecturers or admins should hear about, pushed to open
+    browsers by the event stream (timetable/events.py).
+    Version ids are plain integers: the event outlives pruned versions.
+    """
+    KINDS = (
+        ('published', 'Published'),
+        ('unpublished', 'Unpublished'),
+        ('generated', 'Generated'),
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    version_id = models.IntegerField(null=True, blank=True)
+    previous_version_id = models.IntegerField(null=True, blank=True)
+    # Student groups ([course id, semester, year]) and lecturer ids whose timetable changed
+    groups = models.JSONField(default=list, blank=True)
+    lecturers = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} v{self.version_id} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class ExamSitting(models.Model):
+    """
+    An exam in one room and session (timetable/exam_generator.py). Exams
+    larger than one room have a sitting per room in the same session.
+    """
+    assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name='sittings')
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='exam_sittings')
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    seats = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('classroom', 'date', 'start_time')  # One exam per room and session
+        ordering = ['date', 'start_time', 'classroom_id']
+
+    def __str__(self):
+        return f"{self.date} {self.start_time}: {self.assessment.title} in {self.classroom.room_number}"
@@ -0,0 +1,120 @@
+"""
+In-memory occupancy model: one hour-bitmask per day for every lecturer,
+student group and room, plus per-day hour counts for every subject.
+
+Clash checks become a dict lookup and a bit test instead of a database
+query, and booking/releasing a slot is O(1), which is what incremental
+scoring and local search need. Pure Python (no Django imports).
+"""
+from .grid import DAYS, DAY_INDEX, START_HOUR, END_HOUR
+
+N_DAYS = len(DAYS)
+
+
+def hour_bit(hour):
+    """Bit for a teaching hour (08:00 -> bit 0)."""
+    return 1 << (hour - START_HOUR)
+
+
+def span_and_gaps(mask, ignore_bit=0):
+    """
+    For one day's bitmask return (first_bit, last_bit, gap_count).
+    Gaps are empty hours between the first and last class, excluding ignore_bit.
+    """
+    if not mask:
+        return None, None, 0
+    first = (mask & -mask).bit_length() - 1
+    last = mask.bit_length() - 1
+    gaps = (last - first + 1) - mask.bit_count()
+    if ignore_bit and not (mask & ignore_bit) and (1 << first) < ignore_bit < (1 << last):
+        gaps -= 1
+    return first, last, gaps
+
+
+class Occupancy:
+    """
+    Busy masks for lecturers, student groups and rooms.
+    Keys: lecturer id, SubjectTask.group tuple, room id.
+    """
+
+    def __init__(self):
+        self.lecturers = {}
+        self.groups = {}
+        self.rooms = {}
+        self.subject_days = {}  # subject id -> hours booked per day
+        self.lecturer_blocked = {}  # lecturer id -> hours they cannot teach per day
+
+    def block_lecturer(self, lecturer_id, day, mask):
+        """
+        Mark hours as unavailable for a lecturer. Blocked hours fail
+        teaching_free() but are not bookings, so they don't affect scoring.
+        """
+        self._row(self.lecturer_blocked, lecturer_id)[day] |= mask
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Occupancy of an existing timetable, from metrics.SlotRow tuples.
+        Every hour a slot covers is booked, not just its first.
+        """
+        occupancy = cls()
+        for row in rows:
+            hours = range(max(row.hour, START_HOUR), min(row.hour + row.hours, END_HOUR))
+            day, mask = DAY_INDEX[row.day], sum(hour_bit(hour) for hour in hours)
+            if row.lecturer_id:
+                cls._row(occupancy.lecturers, row.lecturer_id)[day] |= mask
+            cls._row(occupancy.groups, (row.course_id, row.semester, row.year))[day] |= mask
+            cls._row(occupancy.rooms, row.room_id)[day] |= mask
+            cls._row(occupancy.subject_days, row.subject_id)[day] += len(hours)
+        return occupancy
+
+    @staticmethod
+    def _row(table, key):
+        row = table.get(key)
+        if row is None:
+            row = table[key] = [0] * N_DAYS
+        return row
+
+    def lecturer_mask(self, lecturer_id, day):
+        row = self.lecturers.get(lecturer_id)
+        return row[day] if row else 0
+
+    def group_mask(self, group, day):
+        row = self.groups.get(group)
+        return row[day] if row else 0
+
+    def room_mask(self, room_id, day):
+        row = self.rooms.get(room_id)
+        return row[day] if row else 0
+
+    def subject_hours(self, subject_id, day):
+        row = self.subject_days.get(subject_id)
+        return row[day] if row else 0
+
+    def teaching_free(self, task, day, hour):
+        """Lecturer and student group are both free (room not checked)."""
+        bit = hour_bit(hour)
+        if task.lecturer_id:
+            blocked = self.lecturer_blocked.get(task.lecturer_id)
+            if (self.lecturer_mask(task.lecturer_id, day) | (blocked[day] if blocked else 0)) & bit:
+                return False
+        return not self.group_mask(task.group, day) & bit
+
+    def room_free(self, room_id, day, hour):
+        return not self.room_mask(room_id, day) & hour_bit(hour)
+
+    def book(self, task, room_id, day, hour):
+        bit = hour_bit(hour)
+        if task.lecturer_id:
+            self._row(self.lecturers, task.lecturer_id)[day] |= bit
+        self._row(self.groups, task.group)[day] |= bit
+        self._row(self.rooms, room_id)[day] |= bit
+        self._row(self.subject_days, task.id)[day] += 1
+
+    def release(self, task, room_id, day, hour):
+        bit = hour_bit(hour)
+        if task.lecturer_id:
+            self._row(self.lecturers, task.lecturer_id)[day] &= ~bit
+        self._row(self.groups, task.group)[day] &= ~bit
+        self._row(self.rooms, room_id)[day] &= ~bit
+        self._row(self.subject_days, task.id)[day] -= 1
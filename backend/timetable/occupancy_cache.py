@@ -0,0 +1,112 @@
+"""
+Process-local occupancy index of stored timetable versions.
+
+Availability queries ("which lab is free Tuesday 14:00?", "when are these
+lecturers and groups all free?") are answered from an in-memory Occupancy
+(one hour-bitmask per room, lecturer and student group per day), the active
+room list and lecturer availability masks, instead of querying slots.
+
+Each process builds the index for a version with three queries (slots,
+rooms, lecturer availability) and keeps it until the shared version stamp
+in Django's cache changes. The stamp is bumped by the signals in
+timetable/signals.py whenever slots, versions, classrooms or lecturer
+profiles are written, in the same way as academics/settings_cache.py:
+
+- Stamp checks happen at most once every TIMETABLE_OCCUPANCY_CACHE_TTL seconds.
+- Indexes are rebuilt unconditionally after TIMETABLE_OCCUPANCY_MAX_AGE seconds.
+
+The returned index is shared: treat it as read-only.
+"""
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+
+VERSION_KEY = 'timetable:occupancy:version'
+
+# Indexes kept per process (published + a few drafts being edited)
+MAX_CACHED_VERSIONS = 4
+
+# availability: {lecturer id: per-day available-hour masks} from LecturerProfile
+OccupancyIndex = namedtuple('OccupancyIndex', 'version_id occupancy rooms availability')
+
+_lock = threading.Lock()
+_state = {
+    'indexes': {},  # version id -> (OccupancyIndex, loaded_at)
+    'version': None,
+    'checked_at': 0.0,
+}
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _build(version_id):
+    from academics.models import Classroom
+    from .metrics import slot_rows_from_queryset
+    from .models import TimetableSlot
+    from .occupancy import Occupancy
+    from .problem import room_from_classroom, parse_availability
+    from users.models import LecturerProfile
+
+    rows = slot_rows_from_queryset(TimetableSlot.objects.filter(version_id=version_id)) if version_id else []
+    rooms = [room_from_classroom(room) for room in Classroom.objects.filter(is_active=True).order_by('room_number')]
+    availability = {}
+    for user_id, raw in LecturerProfile.objects.values_list('user_id', 'availability'):
+        masks = parse_availability(raw)
+        if masks:
+            availability[user_id] = masks
+    return OccupancyIndex(version_id, Occupancy.from_rows(rows), rooms, availability)
+
+
+def get_occupancy_index(version_id):
+    """
+    Return the OccupancyIndex for a timetable version (None = no timetable:
+    everything free), rebuilding it only when stale.
+    """
+    now = time.monotonic()
+    ttl = getattr(django_settings, 'TIMETABLE_OCCUPANCY_CACHE_TTL', 5)
+    max_age = getattr(django_settings, 'TIMETABLE_OCCUPANCY_MAX_AGE', 300)
+
+    if now - _state['checked_at'] >= ttl:
+        version = _current_version()
+        with _lock:
+            if version != _state['version']:
+                _state['indexes'] = {}
+                _state['version'] = version
+            _state['checked_at'] = now
+
+    entry = _state['indexes'].get(version_id)
+    if entry is not None and now - entry[1] < max_age:
+        return entry[0]
+
+    # Read the stamp before the rows (see settings_cache.get_system_settings)
+    version = _current_version()
+    index = _build(version_id)
+    with _lock:
+        if version != _state['version']:
+            _state['indexes'] = {}
+            _state['version'] = version
+        indexes = _state['indexes']
+        indexes.pop(version_id, None)
+        while len(indexes) >= MAX_CACHED_VERSIONS:
+            indexes.pop(next(iter(indexes)))
+        indexes[version_id] = (index, now)
+    return index
+
+
+def invalidate_occupancy():
+    """
+    Drop this process's indexes and bump the shared stamp so other processes rebuild.
+    """
+    with _lock:
+        _state.update(indexes={}, version=None, checked_at=0.0)
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
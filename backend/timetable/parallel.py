@@ -0,0 +1,143 @@
+"""
+Solve independent parts of a timetable problem in parallel.
+
+conflict_graph.components() splits the subjects into groups that share no
+lecturer, student group or room. Each group is solved (and optionally
+improved by local search) in its own worker process, the placements are
+merged, and a final repair pass retries any missing hours against the
+merged timetable with the full room pool.
+
+Local search shares one time budget: each component gets a slice in
+proportion to its teaching hours (at most the whole budget), and every
+worker also stops at a common wall-clock deadline. So with more components
+than workers the search still ends about `time_budget` seconds after it
+starts, instead of running a full budget per component.
+
+With one worker, or when the problem doesn't split, this is exactly
+solver.solve() followed by local_search.improve().
+No Django imports: workers get resolved weights
+(soft_constraints.resolve_weights runs in the parent), so they never read
+Django settings.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .conflict_graph import components
+from .local_search import improve
+from .occupancy import Occupancy
+from .soft_constraints import SoftScorer
+from .solver import solve, best_slot, rooms_by_type, rooms_for
+from .problem import Placement
+
+
+def _solve_component(job):
+    tasks, rooms, weights, local_search, (share, deadline), ordering = job
+    solution = solve(tasks, rooms, weights, ordering=ordering)
+    counters = solution['counters']
+    if not local_search:
+        return solution['placements'], None, counters
+    time_budget = max(0.0, min(share, deadline - time.time()))
+    solution = improve(tasks, rooms, solution['placements'], weights, method=local_search, time_budget=time_budget)
+    return solution['placements'], solution['stats'], counters
+
+
+def component_budgets(parts, time_budget, workers):
+    """
+    Local-search seconds for each (tasks, rooms) part: `workers` x `time_budget`
+    worker-seconds shared in proportion to teaching hours, each at most `time_budget`.
+    """
+    hours = [sum(task.weekly_hours for task in tasks) for tasks, _ in parts]
+    total = sum(hours) or 1
+    return [min(time_budget, time_budget * workers * part_hours / total) for part_hours in hours]
+
+
+def _merge_stats(all_stats, time_budget):
+    all_stats = [stats for stats in all_stats if stats]
+    if not all_stats:
+        return None
+    merged = {'method': all_stats[0]['method'], 'time_budget': time_budget}
+    merged['elapsed_ms'] = max(stats['elapsed_ms'] for stats in all_stats)
+    for key in ('iterations', 'accepted_moves', 'initial_penalty', 'final_penalty',
+                'initial_unscheduled_hours', 'final_unscheduled_hours'):
+        merged[key] = sum(stats[key] for stats in all_stats)
+    return merged
+
+
+def repair(tasks, rooms, placements, weights=None, counters=None):
+    """
+    Book placements into one Occupancy and greedily place any missing hours
+    using the full room pool. Returns (placements, scheduled, occupancy, repaired).
+    """
+    occupancy = Occupancy()
+    by_id = {task.id: task for task in tasks}
+    scheduled = {task.id: 0 for task in tasks}
+    for p in placements:
+        occupancy.book(by_id[p.subject_id], p.room_id, p.day, p.hour)
+        scheduled[p.subject_id] += 1
+
+    placements = list(placements)
+    scorer = SoftScorer(occupancy, weights)
+    candidates_by_type = rooms_by_type(rooms)
+    repaired = 0
+    for task in tasks:
+        candidates = rooms_for(candidates_by_type, task)
+        while scheduled[task.id] < task.weekly_hours:
+            best = best_slot(task, occupancy, scorer, candidates, counters)
+            if best is None:
+                break
+            _, day, hour, room = best
+            occupancy.book(task, room.id, day, hour)
+            placements.append(Placement(task.id, room.id, day, hour))
+            scheduled[task.id] += 1
+            repaired += 1
+    return placements, scheduled, occupancy, repaired
+
+
+def solve_problem(tasks, rooms, weights=None, local_search=None, time_budget=None, workers=1, ordering='static'):
+    """
+    Solve a whole problem, using up to `workers` processes for independent components.
+
+    Returns a dict with placements, scheduled, penalty and counters (as
+    solver.solve()), 'stats' (local-search statistics or None) and
+    'decomposition' (components, workers, repaired_hours).
+    """
+    parts = components(tasks, rooms) if workers > 1 else [(tasks, rooms)]
+
+    if len(parts) == 1:
+        solution = solve(tasks, rooms, weights, ordering=ordering)
+        counters = solution['counters']
+        stats = None
+        if local_search:
+            solution = improve(tasks, rooms, solution['placements'], weights, method=local_search, time_budget=time_budget)
+            stats = solution['stats']
+        return {
+            'placements': solution['placements'],
+            'scheduled': solution['scheduled'],
+            'penalty': solution['penalty'],
+            'counters': counters,
+            'stats': stats,
+            'decomposition': {'components': 1, 'workers': 1, 'repaired_hours': 0},
+        }
+
+    pool_size = min(workers, len(parts))
+    budgets = component_budgets(parts, time_budget or 0.0, pool_size)
+    deadline = time.time() + (time_budget or 0.0)  # wall clock: comparable across processes
+    jobs = [(sub_tasks, sub_rooms, weights, local_search, (budget, deadline), ordering)
+            for (sub_tasks, sub_rooms), budget in zip(parts, budgets)]
+    with ProcessPoolExecutor(max_workers=pool_size) as pool:
+        results = list(pool.map(_solve_component, jobs))
+
+    merged = [p for placements, _, _ in results for p in placements]
+    counters = {}
+    for _, _, part in results:
+        for key, value in part.items():
+            counters[key] = counters.get(key, 0) + value
+    placements, scheduled, occupancy, repaired = repair(tasks, rooms, merged, weights, counters)
+    return {
+        'placements': placements,
+        'scheduled': scheduled,
+        'penalty': SoftScorer(occupancy, weights).total(tasks, placements),
+        'counters': counters,
+        'stats': _merge_stats((stats for _, stats, _ in results), time_budget),
+        'decomposition': {'components': len(parts), 'workers': pool_size, 'repaired_hours': repaired},
+    }
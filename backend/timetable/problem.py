@@ -0,0 +1,97 @@
+"""
+In-memory representation of a scheduling problem.
+
+The generator loads subjects, rooms and lecturer preferences from the
+database once, converts them to these plain tuples and solves entirely in
+memory. Pure Python (no Django imports) so problems can be pickled to
+worker processes and modified freely for what-if runs.
+"""
+from collections import namedtuple
+
+from .grid import START_HOUR, END_HOUR, DEFAULT_BATCH_SIZE, break_hour_for_year, get_year_from_code
+
+
+class SubjectTask(namedtuple('SubjectTask', [
+    'id', 'code', 'name', 'course_id', 'semester', 'year',
+    'lecturer_id', 'room_type', 'weekly_hours', 'preferred', 'students',
+], defaults=(DEFAULT_BATCH_SIZE,))):
+    """
+    One subject to schedule. `preferred` is None (no preference) or a tuple
+    of one hour-bitmask per day marking the lecturer's preferred hours.
+    `students` is the seats its group needs (grid.seats_needed).
+    """
+    __slots__ = ()
+
+    @property
+    def group(self):
+        """Student group key: Course + Semester + Year (from code)."""
+        return (self.course_id, self.semester, self.year)
+
+    @property
+    def break_hour(self):
+        return break_hour_for_year(self.year)
+
+
+RoomSpec = namedtuple('RoomSpec', 'id room_number room_type capacity')
+
+# One scheduled teaching hour; `day` is an index into grid.DAYS
+Placement = namedtuple('Placement', 'subject_id room_id day hour')
+
+
+# LecturerProfile.availability keys are "<Day>-<Period>" (see ManageLecturers.jsx)
+AVAILABILITY_DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+AVAILABILITY_PERIODS = {
+    'AM': range(8, 12),
+    'Noon': range(12, 14),
+    'PM': range(14, END_HOUR),
+}
+
+
+def _hours_mask(hours):
+    mask = 0
+    for hour in hours:
+        mask |= 1 << (hour - START_HOUR)
+    return mask
+
+
+def parse_availability(availability):
+    """
+    Convert a LecturerProfile.availability dict to a per-day tuple of hour masks.
+    Missing keys count as available. Returns None when there is no restriction.
+    """
+    if not availability:
+        return None
+    masks = []
+    for day in AVAILABILITY_DAYS:
+        mask = 0
+        for period, hours in AVAILABILITY_PERIODS.items():
+            if availability.get(f"{day}-{period}", True):
+                mask |= _hours_mask(hours)
+        masks.append(mask)
+    full = _hours_mask(range(START_HOUR, END_HOUR))
+    if all(mask == full for mask in masks):
+        return None
+    return tuple(masks)
+
+
+def task_from_subject(subject, preferred=None, students=DEFAULT_BATCH_SIZE):
+    """Build a SubjectTask from a Subject model instance."""
+    return SubjectTask(
+        id=subject.id,
+        code=subject.code,
+        name=subject.name,
+        course_id=subject.course_id,
+        semester=subject.semester,
+        year=get_year_from_code(subject.code),
+        lecturer_id=subject.lecturer_id,
+        room_type=subject.room_type,
+        weekly_hours=subject.weekly_hours,
+        preferred=preferred,
+        students=students,
+    )
+
+
+def room_from_classroom(classroom):
+    """Build a RoomSpec from a Classroom model instance."""
+    return RoomSpec(classroom.id, classroom.room_number, classroom.room_type, classroom.capacity)
+
@@ -0,0 +1,102 @@
+"""
+Profiling hooks for timetable generation.
+
+GenerationProfiler collects wall-clock time per named phase, arbitrary
+counters and, when capture is on, a cProfile of the whole run reduced to
+the top functions by cumulative time. report() returns plain JSON-safe
+data, which is included in the generate response and stored with the
+GenerationRun.
+
+Only one capture runs per process at a time (Python 3.12+ refuses a second
+active profiler), so a capture that can't start raises ProfilingUnavailable
+instead of failing mid-run. Captures only see the calling process: the
+generator refuses them when the solver runs in worker processes.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Functions kept from a cProfile capture
+PROFILE_TOP_FUNCTIONS = 30
+
+# Held while a capture is enabled
+_capture_lock = threading.Lock()
+
+
+class ProfilingUnavailable(Exception):
+    """A cProfile capture can't run now."""
+
+
+class GenerationProfiler:
+    def __init__(self, capture=False, top=PROFILE_TOP_FUNCTIONS):
+        self.timings = {}
+        self.counters = {}
+        self.top = top
+        self._profile = cProfile.Profile() if capture else None
+        self._started = None
+        self._capturing = False
+
+    def start(self):
+        if self._profile:
+            if not _capture_lock.acquire(blocking=False):
+                raise ProfilingUnavailable('Another profiled generation is running; try again when it finishes')
+            try:
+                self._profile.enable()
+            except ValueError as e:  # another profiling tool is active
+                _capture_lock.release()
+                raise ProfilingUnavailable(str(e))
+            self._capturing = True
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """Stop timing and release the capture. Calling it again does nothing."""
+        if self._capturing:
+            self._profile.disable()
+            self._capturing = False
+            _capture_lock.release()
+        if 'total' not in self.timings:
+            self.timings['total'] = self._ms(time.perf_counter() - self._started)
+
+    @staticmethod
+    def _ms(seconds):
+        return round(seconds * 1000, 2)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block; repeated phases accumulate."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0) + self._ms(time.perf_counter() - started), 2)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_counters(self, counters):
+        for name, n in (counters or {}).items():
+            self.count(name, n)
+
+    def _profile_rows(self):
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (cc, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                'function': f"{function} ({filename.rsplit('/', 1)[-1]}:{line})",
+                'calls': ncalls,
+                'primitive_calls': cc,
+                'tottime_ms': self._ms(tottime),
+                'cumtime_ms': self._ms(cumtime),
+            })
+        rows.sort(key=lambda row: -row['cumtime_ms'])
+        return rows[:self.top]
+
+    def report(self):
+        return {
+            'timings_ms': dict(self.timings),
+            'counters': dict(self.counters),
+            'profile': self._profile_rows() if self._profile else None,
+        }
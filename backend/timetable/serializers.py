@@ -1,8 +1,21 @@
 from rest_framework import serializers
-from .models import TimetableSlot
+from .models import TimetableSlot, TimetableVersion
 from academics.serializers import SubjectSerializer, ClassroomSerializer
 
+class LatestVersionDefault:
+    """
+    Manual slot edits go to the newest timetable version unless one is given.
+    """
+    requires_context = False
+
+    def __call__(self):
+        return TimetableVersion.objects.order_by('-id').first()
+
+
 class TimetableSlotSerializer(serializers.ModelSerializer):
+    version = serializers.PrimaryKeyRelatedField(
+        queryset=TimetableVersion.objects.all(), default=LatestVersionDefault()
+    )
     subject_details = SubjectSerializer(source='subject', read_only=True)
     classroom_details = ClassroomSerializer(source='classroom', read_only=True)
     
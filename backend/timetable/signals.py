@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from academics.models import Classroom, SystemSettings
+from users.models import LecturerProfile
+from .models import TimetableSlot, TimetableVersion
+from .events import record_event
+from .occupancy_cache import invalidate_occupancy
+
+
+@receiver(post_save, sender=TimetableSlot)
+@receiver(post_delete, sender=TimetableSlot)
+def timetable_slot_changed(sender, instance, origin=None, **kwargs):
+    # Slots deleted along with their version are covered by the version receiver
+    if isinstance(origin, TimetableVersion) or getattr(origin, 'model', None) is TimetableVersion:
+        return
+    # Invalidate after commit so no process rebuilds the old rows under the new stamp
+    transaction.on_commit(invalidate_occupancy)
+
+
+@receiver(post_delete, sender=TimetableVersion)
+@receiver(post_save, sender=Classroom)
+@receiver(post_delete, sender=Classroom)
+@receiver(post_save, sender=LecturerProfile)
+@receiver(post_delete, sender=LecturerProfile)
+def occupancy_source_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_occupancy)
+
+
+def _published_version(is_published, version_id):
+    return version_id if is_published else None
+
+
+@receiver(pre_save, sender=SystemSettings)
+def remember_publication(sender, instance, **kwargs):
+    row = SystemSettings.objects.filter(pk=instance.pk).values_list(
+        'is_timetable_published', 'published_version_id'
+    ).first() if instance.pk else None
+    instance._published_before = _published_version(*row) if row else None
+
+
+@receiver(post_save, sender=SystemSettings)
+def publication_changed(sender, instance, **kwargs):
+    # Publish, unpublish or switch versions: tell open event streams (timetable/events.py)
+    before = getattr(instance, '_published_before', None)
+    after = _published_version(instance.is_timetable_published, instance.published_version_id)
+    if before != after:
+        transaction.on_commit(lambda: record_event('published' if after else 'unpublished', after, before))
+
+
+@receiver(post_save, sender=TimetableVersion)
+def version_created(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: record_event('generated', instance.pk))
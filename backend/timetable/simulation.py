@@ -0,0 +1,193 @@
+"""
+What-if simulation: run the generator on a modified copy of the problem.
+
+The current problem is loaded once (generator.load_problem), overrides are
+applied to the in-memory tuples and the solver runs against them. Nothing
+is written to the database, so admins can try out a change ("room B-204
+goes offline", "lecturer X only teaches three days") before making it.
+
+Supported overrides (a list of objects, applied in order):
+
+    {"type": "disable_room", "room": <id or room_number>}
+    {"type": "weekly_hours", "subject": <id or code>, "hours": <int>}
+    {"type": "lecturer_availability", "lecturer": <user id>,
+     "days": ["Mon", "Tue", "Wed"],        # hard: only teaches on these days
+     "availability": {"Mon-PM": false}}    # soft: preferred times (LecturerProfile format)
+"""
+import time
+
+from django.conf import settings as django_settings
+
+from academics.models import SystemSettings
+from .generator import load_problem
+from .metrics import compute_timetable_metrics, slot_rows_from_placements
+from .occupancy import Occupancy
+from .problem import AVAILABILITY_DAYS, parse_availability
+from .solver import solve
+from .local_search import improve
+
+OVERRIDE_TYPES = ('disable_room', 'weekly_hours', 'lecturer_availability')
+
+MAX_WEEKLY_HOURS = 20
+
+
+def _find(items, value, *fields):
+    for item in items:
+        if any(getattr(item, field) == value for field in fields):
+            return item
+    raise ValueError(f"'{value}' not found")
+
+
+def apply_overrides(tasks, rooms, overrides):
+    """
+    Apply overrides to copies of tasks and rooms.
+
+    Returns (tasks, rooms, blocked) where blocked maps lecturer id to the
+    day indexes they cannot teach. Raises ValueError for invalid overrides.
+    """
+    tasks, rooms = list(tasks), list(rooms)
+    blocked = {}
+    if not isinstance(overrides, list):
+        raise ValueError("overrides must be a list")
+
+    for i, override in enumerate(overrides):
+        kind = override.get('type') if isinstance(override, dict) else None
+        if kind not in OVERRIDE_TYPES:
+            raise ValueError(f"overrides[{i}]: type must be one of: {', '.join(OVERRIDE_TYPES)}")
+        try:
+            if kind == 'disable_room':
+                room = _find(rooms, override.get('room'), 'id', 'room_number')
+                rooms.remove(room)
+
+            elif kind == 'weekly_hours':
+                task = _find(tasks, override.get('subject'), 'id', 'code')
+                hours = override.get('hours')
+                if isinstance(hours, bool) or not isinstance(hours, int) or not 0 <= hours <= MAX_WEEKLY_HOURS:
+                    raise ValueError(f"hours must be an integer between 0 and {MAX_WEEKLY_HOURS}")
+                tasks[tasks.index(task)] = task._replace(weekly_hours=hours)
+
+            else:
+                lecturer_id = override.get('lecturer')
+                if isinstance(lecturer_id, bool):
+                    raise ValueError("lecturer must be a user id")
+                try:
+                    lecturer_id = int(lecturer_id)
+                except (TypeError, ValueError):
+                    raise ValueError("lecturer must be a user id")
+                if not any(task.lecturer_id == lecturer_id for task in tasks):
+                    raise ValueError(f"lecturer '{lecturer_id}' teaches no subject this semester")
+                days = override.get('days')
+                if days is not None:
+                    if not isinstance(days, list) or not all(isinstance(day, str) for day in days):
+                        raise ValueError(f"days must be a list of day names ({', '.join(AVAILABILITY_DAYS)})")
+                    unknown = set(days) - set(AVAILABILITY_DAYS)
+                    if unknown:
+                        raise ValueError(f"unknown days {sorted(unknown)}. Valid: {', '.join(AVAILABILITY_DAYS)}")
+                    blocked[lecturer_id] = {
+                        d for d, name in enumerate(AVAILABILITY_DAYS) if name not in days
+                    }
+                if 'availability' in override:
+                    availability = override['availability']
+                    if availability is not None and not isinstance(availability, dict):
+                        raise ValueError('availability must be an object like {"Mon-PM": false}')
+                    preferred = parse_availability(availability)
+                    tasks = [
+                        task._replace(preferred=preferred) if task.lecturer_id == lecturer_id else task
+                        for task in tasks
+                    ]
+        except ValueError as e:
+            raise ValueError(f"overrides[{i}] ({kind}): {e}")
+
+    # Same order the generator uses: most weekly hours first
+    tasks.sort(key=lambda task: -task.weekly_hours)
+    return tasks, rooms, blocked
+
+
+def _blocked_occupancy(blocked):
+    occupancy = Occupancy()
+    full_day = (1 << 32) - 1
+    for lecturer_id, days in blocked.items():
+        for day in days:
+            occupancy.block_lecturer(lecturer_id, day, full_day)
+    return occupancy
+
+
+def _unscheduled_reason(task, rooms, blocked):
+    if not any(room.room_type == task.room_type and room.capacity >= task.students for room in rooms):
+        return f"No active {task.room_type}s seating {task.students} students"
+    if not task.lecturer_id:
+        return "No lecturer assigned to subject"
+    if task.lecturer_id in blocked:
+        return "Lecturer availability too limited: no common free slots left"
+    return "Schedule conflict: No common free slots for Lecturer, Room, and Student Group"
+
+
+def run_scenario(tasks, rooms, blocked=None, weights=None, local_search=None, time_budget=None, ordering='static'):
+    """
+    Solve one in-memory scenario and summarise it like a generation run.
+    """
+    started = time.perf_counter()
+    blocked = blocked or {}
+    solution = solve(tasks, rooms, weights, _blocked_occupancy(blocked), ordering=ordering)
+    if local_search:
+        solution = improve(
+            tasks, rooms, solution['placements'], weights, method=local_search,
+            time_budget=time_budget, occupancy=_blocked_occupancy(blocked),
+        )
+
+    unscheduled = []
+    for task in tasks:
+        scheduled = solution['scheduled'].get(task.id, 0)
+        if scheduled < task.weekly_hours:
+            unscheduled.append({
+                'subject': task.name,
+                'code': task.code,
+                'semester': task.semester,
+                'year': task.year,
+                'needed': task.weekly_hours,
+                'scheduled': scheduled,
+                'missing': task.weekly_hours - scheduled,
+                'reason': _unscheduled_reason(task, rooms, blocked),
+            })
+
+    metrics = compute_timetable_metrics(slot_rows_from_placements(solution['placements'], tasks), rooms)
+    return {
+        'statistics': {
+            'total_subjects': len(tasks),
+            'fully_scheduled': len(tasks) - len(unscheduled),
+            'partially_scheduled': len(unscheduled),
+            'total_slots': len(solution['placements']),
+            'unscheduled_hours': sum(item['missing'] for item in unscheduled),
+            'soft_penalty': solution['penalty'],
+            'duration_ms': int((time.perf_counter() - started) * 1000),
+        },
+        'metrics': metrics['summary'],
+        'unscheduled': unscheduled,
+    }
+
+
+def simulate_timetable(overrides, weights=None, local_search=None, time_budget=None, semester=None):
+    """
+    Run the generator for the current semester with overrides applied,
+    plus a baseline run without them for comparison. Read-only.
+    With local search, `time_budget` covers both runs: each gets half.
+    """
+    if semester is None:
+        semester = SystemSettings.get_cached().current_semester
+    _, _, base_tasks, base_rooms = load_problem(semester)
+    tasks, rooms, blocked = apply_overrides(base_tasks, base_rooms, overrides)
+    if local_search and time_budget is None:
+        time_budget = getattr(django_settings, 'TIMETABLE_LOCAL_SEARCH_BUDGET', 5)
+    if local_search:
+        time_budget = time_budget / 2
+
+    options = {
+        'weights': weights, 'local_search': local_search, 'time_budget': time_budget,
+        'ordering': getattr(django_settings, 'TIMETABLE_SUBJECT_ORDERING', 'static'),
+    }
+    return {
+        'semester': semester,
+        'overrides': len(overrides),
+        'scenario': run_scenario(tasks, rooms, blocked, **options),
+        'baseline': run_scenario(base_tasks, base_rooms, **options)['statistics'],
+    }
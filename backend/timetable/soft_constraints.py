@@ -0,0 +1,139 @@
+"""
+Soft constraints for the timetable generator.
+
+Hard constraints (break hour, clashes, room type/capacity) decide whether a
+placement is allowed at all; soft constraints decide which allowed placement
+is best. Each soft constraint is a weighted penalty:
+
+- subject_spread:       hours of the same subject on the same day (per pair)
+- lecturer_consecutive: lecturer teaching hours beyond MAX_CONSECUTIVE_HOURS in a row
+- student_gaps:         empty hours inside a student group's day (break excluded)
+- preferred_times:      hours outside the lecturer's preferred availability
+
+Scoring is incremental: delta() looks only at the one day-row of the one
+lecturer, group and subject touched by a placement, so evaluating a
+candidate costs a few bit operations instead of re-scoring the timetable.
+
+Only resolve_weights() reads Django settings (imported inside it), so the
+scorer can run in solver worker processes without Django configured.
+"""
+from .grid import break_hour_for_year
+from .occupancy import hour_bit, span_and_gaps
+
+DEFAULT_SOFT_WEIGHTS = {
+    'subject_spread': 3,
+    'lecturer_consecutive': 2,
+    'student_gaps': 2,
+    'preferred_times': 4,
+}
+
+MAX_CONSECUTIVE_HOURS = 3
+
+
+def resolve_weights(overrides=None):
+    """
+    Merge DEFAULT_SOFT_WEIGHTS, settings.TIMETABLE_SOFT_WEIGHTS and per-request overrides.
+    (Only this function reads Django settings; the scorer itself is plain Python.)
+    Raises ValueError for unknown names or negative/non-numeric weights.
+    """
+    from django.conf import settings
+
+    weights = dict(DEFAULT_SOFT_WEIGHTS)
+    for source in (getattr(settings, 'TIMETABLE_SOFT_WEIGHTS', None), overrides):
+        if not source:
+            continue
+        if not isinstance(source, dict):
+            raise ValueError("Weights must be an object of {name: number}.")
+        for name, value in source.items():
+            if name not in DEFAULT_SOFT_WEIGHTS:
+                raise ValueError(f"Unknown soft constraint '{name}'. Valid: {', '.join(DEFAULT_SOFT_WEIGHTS)}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"Weight for '{name}' must be a non-negative number.")
+            weights[name] = value
+    return weights
+
+
+def _excess_run_hours(mask, limit):
+    """Total hours beyond `limit` across all runs of consecutive bits."""
+    excess = 0
+    while mask:
+        mask >>= (mask & -mask).bit_length() - 1  # drop trailing zeros
+        run = (~mask & (mask + 1)).bit_length() - 1  # length of the run of ones
+        if run > limit:
+            excess += run - limit
+        mask >>= run
+    return excess
+
+
+class SoftScorer:
+    """
+    Weighted soft-constraint penalties over an Occupancy model.
+    """
+
+    def __init__(self, occupancy, weights=None, max_consecutive=MAX_CONSECUTIVE_HOURS):
+        self.occupancy = occupancy
+        self.weights = weights if weights is not None else dict(DEFAULT_SOFT_WEIGHTS)
+        self.max_consecutive = max_consecutive
+
+    def delta(self, task, day, hour):
+        """
+        Change in total penalty from booking task at (day, hour).
+        The task must not currently be booked at (day, hour); to price a move,
+        release the old placement first and compare the two deltas.
+        """
+        w = self.weights
+        occ = self.occupancy
+        bit = hour_bit(hour)
+        cost = 0
+
+        if w['subject_spread']:
+            cost += w['subject_spread'] * occ.subject_hours(task.id, day)
+
+        if w['lecturer_consecutive'] and task.lecturer_id:
+            mask = occ.lecturer_mask(task.lecturer_id, day)
+            cost += w['lecturer_consecutive'] * (
+                _excess_run_hours(mask | bit, self.max_consecutive)
+                - _excess_run_hours(mask, self.max_consecutive)
+            )
+
+        if w['student_gaps']:
+            mask = occ.group_mask(task.group, day)
+            break_bit = hour_bit(task.break_hour)
+            cost += w['student_gaps'] * (
+                span_and_gaps(mask | bit, break_bit)[2] - span_and_gaps(mask, break_bit)[2]
+            )
+
+        if w['preferred_times'] and task.preferred and not task.preferred[day] & bit:
+            cost += w['preferred_times']
+
+        return cost
+
+    def total(self, tasks, placements):
+        """
+        Full penalty of a set of placements (for reporting and verification).
+        """
+        w = self.weights
+        occ = self.occupancy
+        by_id = {task.id: task for task in tasks}
+        cost = 0
+
+        if w['subject_spread']:
+            for counts in occ.subject_days.values():
+                cost += w['subject_spread'] * sum(c * (c - 1) // 2 for c in counts)
+
+        if w['lecturer_consecutive']:
+            for row in occ.lecturers.values():
+                cost += w['lecturer_consecutive'] * sum(_excess_run_hours(m, self.max_consecutive) for m in row)
+
+        if w['student_gaps']:
+            for group, row in occ.groups.items():
+                break_bit = hour_bit(break_hour_for_year(group[2]))
+                cost += w['student_gaps'] * sum(span_and_gaps(m, break_bit)[2] for m in row)
+
+        if w['preferred_times']:
+            for p in placements:
+                task = by_id[p.subject_id]
+                if task.preferred and not task.preferred[p.day] & hour_bit(p.hour):
+                    cost += w['preferred_times']
+
+        return cost
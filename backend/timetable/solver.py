@@ -0,0 +1,130 @@
+"""
+In-memory greedy solver.
+
+Places each teaching hour of each subject at the allowed (day, hour) with
+the lowest soft-constraint delta. Ties keep the original Monday-first,
+earliest-hour order, so with all weights at 0 and the 'static' ordering
+the result matches the old first-fit generator. Works only on problem.py
+tuples and an Occupancy model: no database access, and no Django imports
+(weights come resolved), so it runs in parallel.py's worker processes.
+
+Subject order:
+- 'static': the order given (the generator sorts by weekly hours)
+- 'dsatur': most-constrained subject first, re-evaluated after every
+            placement (see conflict_graph.DSaturOrder)
+"""
+from .conflict_graph import DSaturOrder
+from .grid import DAYS, START_HOUR, END_HOUR
+from .occupancy import Occupancy, hour_bit
+from .problem import Placement
+from .soft_constraints import SoftScorer
+
+ORDERINGS = ('static', 'dsatur')
+
+
+def rooms_by_type(rooms):
+    """Rooms grouped by room type, in pool order."""
+    grouped = {}
+    for room in rooms:
+        grouped.setdefault(room.room_type, []).append(room)
+    return grouped
+
+
+def rooms_for(candidates_by_type, task):
+    """Rooms of the task's type that seat its group (SubjectTask.students), in pool order."""
+    return [room for room in candidates_by_type.get(task.room_type, ()) if room.capacity >= task.students]
+
+
+def best_slot(task, occupancy, scorer, candidates, counters=None):
+    """
+    Lowest-cost allowed (day, hour, room) for one hour of task, or None.
+    If `counters` (a dict) is given, adds the candidates examined, rejections
+    by reason and rooms probed to it.
+    """
+    best = None
+    examined = rejected_break = rejected_lecturer = rejected_group = rejected_room = probed = 0
+    for day in range(len(DAYS)):
+        for hour in range(START_HOUR, END_HOUR):
+            examined += 1
+            # Hard constraints: break hour, lecturer/group clash, free matching room
+            if hour == task.break_hour:
+                rejected_break += 1
+                continue
+            if not occupancy.teaching_free(task, day, hour):
+                if counters is not None:
+                    if occupancy.group_mask(task.group, day) & hour_bit(hour):
+                        rejected_group += 1
+                    else:
+                        rejected_lecturer += 1
+                continue
+            room = None
+            for candidate in candidates:
+                probed += 1
+                if occupancy.room_free(candidate.id, day, hour):
+                    room = candidate
+                    break
+            if room is None:
+                rejected_room += 1
+                continue
+
+            cost = scorer.delta(task, day, hour)
+            if best is None or cost < best[0]:
+                best = (cost, day, hour, room)
+
+    if counters is not None:
+        for key, value in (
+            ('candidates_examined', examined), ('rejected_break_hour', rejected_break),
+            ('rejected_lecturer_clash', rejected_lecturer), ('rejected_group_clash', rejected_group),
+            ('rejected_no_room', rejected_room), ('rooms_probed', probed),
+        ):
+            counters[key] = counters.get(key, 0) + value
+    return best
+
+
+def solve(tasks, rooms, weights=None, occupancy=None, ordering='static'):
+    """
+    Greedily schedule tasks, one subject at a time in the given `ordering`.
+
+    Returns a dict with:
+    - placements: list of Placement
+    - scheduled: {subject id: hours placed}
+    - penalty: total soft-constraint penalty of the result
+    - occupancy: the final Occupancy model
+    - counters: search effort (see best_slot)
+    """
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown ordering '{ordering}'. Valid: {', '.join(ORDERINGS)}")
+    occupancy = occupancy if occupancy is not None else Occupancy()
+    scorer = SoftScorer(occupancy, weights)
+    candidates_by_type = rooms_by_type(rooms)
+    order = DSaturOrder(tasks, candidates_by_type, occupancy) if ordering == 'dsatur' else None
+    remaining = iter(tasks)
+
+    placements = []
+    scheduled = {}
+    counters = {}
+    while True:
+        task = order.pop() if order else next(remaining, None)
+        if task is None:
+            break
+        candidates = rooms_for(candidates_by_type, task)
+        booked = []
+        for _ in range(task.weekly_hours):
+            best = best_slot(task, occupancy, scorer, candidates, counters)
+            if best is None:
+                break  # No allowed slot left for this subject
+            _, day, hour, room = best
+            occupancy.book(task, room.id, day, hour)
+            booked.append(Placement(task.id, room.id, day, hour))
+        placements.extend(booked)
+        scheduled[task.id] = len(booked)
+        if order:
+            order.placed(task, booked)
+
+    return {
+        'placements': placements,
+        'scheduled': scheduled,
+        'penalty': scorer.total(tasks, placements),
+        'occupancy': occupancy,
+        'counters': counters,
+    }
@@ -1,3 +1,710 @@
-from django.test import TestCase
+import json
+import random
+import time as clock
+from datetime import date, time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.db.models.signals import post_delete
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from academics.models import Assessment, Classroom, Course, Subject, SystemSettings
+from .audit import AuditSlot, audit_version, find_conflicts
+from university_timetable.db_router import PRIMARY, ReplicaRouter
+from users.models import StudentProfile, User
+from .conflict_graph import DSaturOrder, build_conflict_graph, components
+from .diff import diff_rows
+from academics.async_views import grouped_subjects
+from users.async_views import current_user
+from .async_views import formatted_timetable, timetable_events
+from .events import affects, aredeem_ticket
+from .validation import apply_moves, candidate_slot, slot_conflicts
+from .exam_generator import schedule_exam_period
+from .generator import generate_timetable_algo
+from .exams import ExamSession, ExamTask, _take_rooms, build_exam_graph, schedule_exams
+from .local_search import METHODS, improve
+from .metrics import SlotRow
+from .models import GenerationRun, TimetableEvent, TimetableSlot, TimetableVersion
+from .occupancy import Occupancy
+from .occupancy_cache import invalidate_occupancy
+from .profiling import GenerationProfiler, ProfilingUnavailable
+from .parallel import _solve_component, component_budgets, repair
+from .problem import Placement, RoomSpec, SubjectTask
+from .simulation import apply_overrides
+from .solver import rooms_by_type, solve
+from .views import TimetableViewSet
+from .soft_constraints import SoftScorer, _excess_run_hours, resolve_weights
+
+
+def make_task(id, lecturer_id=1, course_id=1, year=1, weekly_hours=1, room_type='Lecture Hall', preferred=None):
+    return SubjectTask(
+        id=id, code=f'CST{year}{id:02d}', name=f'Subject {id}', course_id=course_id, semester=1, year=year,
+        lecturer_id=lecturer_id, room_type=room_type, weekly_hours=weekly_hours, preferred=preferred,
+    )
+
+
+class SoftConstraintTests(SimpleTestCase):
+    def test_excess_run_hours(self):
+        self.assertEqual(_excess_run_hours(0b111, 3), 0)
+        self.assertEqual(_excess_run_hours(0b11111, 3), 2)
+        self.assertEqual(_excess_run_hours(0b1111011111, 3), 3)
+
+    def test_resolve_weights_rejects_bad_input(self):
+        self.assertEqual(resolve_weights({'student_gaps': 0})['student_gaps'], 0)
+        for overrides in ({'unknown': 1}, {'student_gaps': -1}, {'student_gaps': True}, [1]):
+            with self.assertRaises(ValueError):
+                resolve_weights(overrides)
+
+    def test_delta_matches_total(self):
+        # Booking hour by hour, the sum of deltas equals the full penalty
+        weights = {'subject_spread': 3, 'lecturer_consecutive': 2, 'student_gaps': 2, 'preferred_times': 4}
+        morning_only = tuple(0b1111 for _ in range(5))
+        tasks = [make_task(1, weekly_hours=3, preferred=morning_only), make_task(2, weekly_hours=3)]
+        occupancy = Occupancy()
+        scorer = SoftScorer(occupancy, weights)
+        hours = [(1, 0, 8), (1, 0, 9), (1, 0, 15), (2, 0, 10), (2, 0, 11), (2, 1, 14)]
+        running = 0
+        for subject_id, day, hour in hours:
+            task = tasks[subject_id - 1]
+            running += scorer.delta(task, day, hour)
+            occupancy.book(task, 100, day, hour)
+
+        placements = [Placement(subject_id, 100, day, hour) for subject_id, day, hour in hours]
+        self.assertEqual(running, scorer.total(tasks, placements))
+        # spread: 3 same-day pairs of subject 1 + 1 of subject 2; consecutive: 08-12 is
+        # one hour over 3; gaps: 13:00 and 14:00 (12:00 is the break); 15:00 not preferred
+        self.assertEqual(running, 3 * 4 + 2 * 1 + 2 * 2 + 4 * 1)
+
+
+def tight_problem(seed=1):
+    """40 subjects, 8 lecturers, 6 student groups and 3 rooms: not every hour fits."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(40):
+        preferred = tuple(rng.choice([0b1111, 0b111100000, 0b111111111]) for _ in range(5))
+        tasks.append(make_task(i + 1, lecturer_id=1 + i % 8, course_id=1 + i % 2, year=1 + i % 3,
+                               weekly_hours=3 + i % 2, preferred=preferred))
+    rooms = [RoomSpec(k, f'R{k}', 'Lecture Hall', 40) for k in range(3)]
+    return tasks, rooms
+
+
+class LocalSearchTests(SimpleTestCase):
+    def test_never_loses_teaching_hours(self):
+        # Heavy soft weights used to make ejecting hours look profitable
+        weights = {'subject_spread': 500, 'lecturer_consecutive': 2, 'student_gaps': 500, 'preferred_times': 500}
+        tasks, rooms = tight_problem()
+        greedy = solve(tasks, rooms, weights)
+        self.assertLess(len(greedy['placements']), sum(task.weekly_hours for task in tasks))
+        for method in METHODS:
+            result = improve(tasks, rooms, greedy['placements'], weights, method=method,
+                             time_budget=60, seed=3, max_iterations=500)
+            self.assertGreaterEqual(len(result['placements']), len(greedy['placements']), method)
+            self.assertLessEqual(result['stats']['final_unscheduled_hours'],
+                                 result['stats']['initial_unscheduled_hours'], method)
+            if len(result['placements']) == len(greedy['placements']):
+                self.assertLessEqual(result['penalty'], greedy['penalty'], method)
+
+
+class SimulationOverrideTests(SimpleTestCase):
+    def test_lecturer_availability(self):
+        tasks, rooms = [make_task(1, lecturer_id=2)], [RoomSpec(1, 'R1', 'Lecture Hall', 40)]
+        override = {'type': 'lecturer_availability', 'lecturer': '2', 'days': ['Mon', 'Tue'],
+                    'availability': {'Mon-PM': False}}
+        tasks, _, blocked = apply_overrides(tasks, rooms, [override])
+        self.assertEqual(blocked, {2: {2, 3, 4}})
+        self.assertIsNotNone(tasks[0].preferred)
+
+    def test_invalid_overrides_raise_value_error(self):
+        tasks, rooms = [make_task(1, lecturer_id=2)], [RoomSpec(1, 'R1', 'Lecture Hall', 40)]
+        for override in (
+            {'lecturer': 2, 'days': 5},
+            {'lecturer': 2, 'days': 'Mon'},
+            {'lecturer': 2, 'days': [1]},
+            {'lecturer': 2, 'availability': 5},
+            {'lecturer': 'x'},
+            {'lecturer': 3},
+        ):
+            with self.assertRaises(ValueError):
+                apply_overrides(tasks, rooms, [{'type': 'lecturer_availability', **override}])
+
+
+class DecompositionTests(SimpleTestCase):
+    def test_independent_departments_split_rooms(self):
+        tasks = [make_task(1, lecturer_id=1, course_id=1), make_task(2, lecturer_id=2, course_id=2)]
+        rooms = [RoomSpec(k, f'R{k}', 'Lecture Hall', 40) for k in range(4)]
+        parts = components(tasks, rooms)
+        self.assertEqual([[task.id for task in sub_tasks] for sub_tasks, _ in parts], [[1], [2]])
+        self.assertEqual(sorted(room.id for _, sub_rooms in parts for room in sub_rooms), [0, 1, 2, 3])
+        self.assertFalse({room.id for room in parts[0][1]} & {room.id for room in parts[1][1]})
+
+    def test_shared_lecturer_or_scarce_rooms_merge(self):
+        rooms = [RoomSpec(k, f'R{k}', 'Lecture Hall', 40) for k in range(4)]
+        shared = [make_task(1, lecturer_id=1, course_id=1), make_task(2, lecturer_id=1, course_id=2)]
+        self.assertEqual(len(components(shared, rooms)), 1)
+        # 2 x 30 hours on one room: above the scarcity threshold, so the pool is not split
+        scarce = [make_task(1, lecturer_id=1, course_id=1, weekly_hours=30),
+                  make_task(2, lecturer_id=2, course_id=2, weekly_hours=30)]
+        self.assertEqual(len(components(scarce, rooms[:1])), 1)
+
+    def test_repair_places_missing_hours(self):
+        tasks = [make_task(1, weekly_hours=2), make_task(2, lecturer_id=2, course_id=2, weekly_hours=1)]
+        rooms = [RoomSpec(1, 'R1', 'Lecture Hall', 40)]
+        placements, scheduled, occupancy, repaired = repair(tasks, rooms, [Placement(1, 1, 0, 8)])
+        self.assertEqual(scheduled, {1: 2, 2: 1})
+        self.assertEqual(repaired, 2)
+        # One room: no two placements share an hour
+        self.assertEqual(len({(p.day, p.hour) for p in placements}), 3)
+
+    def test_components_share_the_search_budget(self):
+        rooms = [RoomSpec(1, 'R1', 'Lecture Hall', 40)]
+        parts = [([make_task(k, weekly_hours=hours)], rooms) for k, hours in enumerate((1, 1, 2, 4))]
+        budgets = component_budgets(parts, 4.0, 2)
+        self.assertEqual(budgets, [1.0, 1.0, 2.0, 4.0])
+        self.assertLessEqual(sum(budgets), 4.0 * 2)
+
+    def test_component_search_stops_at_the_shared_deadline(self):
+        tasks, rooms = tight_problem()
+        job = (tasks, rooms, None, 'annealing', (30.0, clock.time()), 'static')
+        started = clock.perf_counter()
+        _, stats, _ = _solve_component(job)
+        self.assertLess(clock.perf_counter() - started, 5)
+        self.assertEqual(stats['time_budget'], 0.0)
+
+
+class DSaturOrderTests(SimpleTestCase):
+    def test_conflict_graph(self):
+        tasks = [make_task(1, lecturer_id=1, course_id=1), make_task(2, lecturer_id=1, course_id=2),
+                 make_task(3, lecturer_id=2, course_id=1), make_task(4, lecturer_id=3, course_id=3)]
+        self.assertEqual(build_conflict_graph(tasks), {1: {2, 3}, 2: {1}, 3: {1}, 4: set()})
+
+    def test_most_constrained_first(self):
+        tasks = [make_task(1, lecturer_id=1, course_id=1, weekly_hours=4),
+                 make_task(2, lecturer_id=2, course_id=2, weekly_hours=2),
+                 make_task(3, lecturer_id=3, course_id=3, weekly_hours=2)]
+        rooms = [RoomSpec(k, f'R{k}', 'Lecture Hall', 40) for k in range(3)]
+        occupancy = Occupancy()
+        for day in range(1, 5):  # lecturer 3 only teaches on Monday
+            occupancy.block_lecturer(3, day, (1 << 9) - 1)
+        order = DSaturOrder(tasks, rooms_by_type(rooms), occupancy)
+        self.assertEqual([order.pop().id, order.pop().id, order.pop().id, order.pop()], [3, 1, 2, None])
+
+    def test_placement_saturates_neighbours(self):
+        # Subject 2 shares lecturer 1 with subject 1, subject 3 is unrelated;
+        # before the placement subject 3 has less slack (38 < 39)
+        tasks = [make_task(1, lecturer_id=1, course_id=1, weekly_hours=8),
+                 make_task(2, lecturer_id=1, course_id=2, weekly_hours=1),
+                 make_task(3, lecturer_id=2, course_id=3, weekly_hours=2)]
+        rooms = [RoomSpec(k, f'R{k}', 'Lecture Hall', 40) for k in range(3)]
+        occupancy = Occupancy()
+        order = DSaturOrder(tasks, rooms_by_type(rooms), occupancy)
+        first = order.pop()
+        self.assertEqual(first.id, 1)
+        booked = [Placement(1, 0, day, hour) for day in range(4) for hour in (8, 9)]
+        for p in booked:
+            occupancy.book(first, p.room_id, p.day, p.hour)
+        order.placed(first, booked)
+        self.assertEqual(order.free_hours(order.tasks[2]), 40 - 8)
+        self.assertEqual(order.free_hours(order.tasks[3]), 40)
+        self.assertEqual(order.pop().id, 2)
+
+
+class DiffTests(SimpleTestCase):
+    def test_added_removed_moved(self):
+        old = [SlotRow(1, 10, 1, 1, 1, 5, 'Monday', 8), SlotRow(1, 10, 1, 1, 1, 5, 'Tuesday', 9),
+               SlotRow(2, 11, 2, 1, 2, 6, 'Monday', 10)]
+        new = [SlotRow(1, 10, 1, 1, 1, 5, 'Monday', 8), SlotRow(1, 10, 1, 1, 1, 6, 'Friday', 9),
+               SlotRow(3, 12, 3, 1, 1, 6, 'Monday', 10)]
+        result = diff_rows(old, new)
+        self.assertEqual(result['unchanged'], 1)
+        self.assertEqual(result['moved'], [(old[1], new[1])])
+        self.assertEqual(result['removed'], [old[2]])
+        self.assertEqual(result['added'], [new[2]])
+        self.assertEqual(result['groups'], {(1, 1, 1), (2, 1, 2), (3, 1, 1)})
+        self.assertEqual(result['lecturers'], {10, 11, 12})
+
+    def test_changed_length_is_a_change(self):
+        old = [SlotRow(1, 10, 1, 1, 1, 5, 'Monday', 9, 1)]
+        new = [SlotRow(1, 10, 1, 1, 1, 5, 'Monday', 9, 2)]
+        result = diff_rows(old, new)
+        self.assertEqual((result['unchanged'], result['moved']), (0, [(old[0], new[0])]))
+
+
+def audit_slot(id, subject_id, lecturer_id, course_id, room_id, day, start, end, year=2, room_type='Lecture Hall',
+               capacity=40, active=True):
+    return AuditSlot(id, subject_id, f'CST{year}0{subject_id}', lecturer_id, course_id, 1, year, 'Lecture Hall',
+                     room_id, f'R{room_id}', room_type, capacity, active, day, start * 60, end * 60)
+
+
+class AuditTests(SimpleTestCase):
+    def test_finds_each_conflict_once(self):
+        slots = [
+            audit_slot(1, 1, 10, 1, 1, 'Monday', 9, 10),
+            audit_slot(2, 2, 10, 2, 1, 'Monday', 9, 10),        # lecturer 10 and room 1 clash with slot 1
+            audit_slot(3, 3, 11, 1, 2, 'Monday', 13, 14),       # year 2 break
+            audit_slot(4, 4, 12, 3, 3, 'Tuesday', 10, 11, room_type='Lab', capacity=10, active=False),
+            audit_slot(5, 5, 13, 4, 4, 'Saturday', 10, 11),
+            audit_slot(6, 6, 14, 5, 5, 'Wednesday', 10, 11),    # no problem
+        ]
+        conflicts = find_conflicts(slots, sizes={(3, 1, 2): 25})
+        found = sorted((c['type'], tuple(c['slots'])) for c in conflicts)
+        self.assertEqual(found, [
+            ('break_hour', (3,)),
+            ('capacity', (4,)),
+            ('inactive_room', (4,)),
+            ('lecturer_clash', (1, 2)),
+            ('outside_hours', (5,)),
+            ('room_clash', (1, 2)),
+            ('room_type', (4,)),
+        ])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_REPLICA_LAG=0)
+class ReplicaRoutingTests(SimpleTestCase):
+    def alias_for(self, method, path, handler):
+        """Database alias TimetableSlot reads would use inside the view routed at `path`."""
+        seen = {}
+
+        def record(viewset, request, *args, **kwargs):
+            seen['alias'] = ReplicaRouter().db_for_read(TimetableSlot)
+            return Response({})
+
+        request = getattr(APIRequestFactory(), method)(path)
+        force_authenticate(request, user=User(id=1, role='admin', is_staff=True))
+        with mock.patch.object(TimetableViewSet, handler, record):
+            resolve(path).func(request)
+        return seen['alias']
+
+    def test_formatted_timetable_reads_from_replica(self):
+        self.assertEqual(self.alias_for('get', '/api/timetable/formatted/', 'get_formatted_timetable'), 'replica1')
+        self.assertEqual(self.alias_for('get', '/api/timetable/', 'list'), 'replica1')
+
+    def test_other_actions_read_from_primary(self):
+        self.assertEqual(self.alias_for('get', '/api/timetable/metrics/', 'metrics'), PRIMARY)
+
+
+class EventAudienceTests(SimpleTestCase):
+    def test_students_are_affected_only_by_their_own_group(self):
+        student = User(id=1, role='student')
+        student._state.fields_cache['student_profile'] = StudentProfile(user=student, course_id=4, semester=1, year=2)
+        event = TimetableEvent(kind='published', groups=[[4, 1, 2]], lecturers=[7])
+        self.assertTrue(affects(event, student))
+        for groups in ([[4, 1, 3]], [[4, 2, 2]], [[5, 1, 2]]):
+            self.assertFalse(affects(TimetableEvent(kind='published', groups=groups, lecturers=[]), student))
+
+    def test_lecturers_and_admins(self):
+        event = TimetableEvent(kind='published', groups=[[4, 1, 2]], lecturers=[7])
+        self.assertTrue(affects(event, User(id=7, role='lecturer')))
+        self.assertFalse(affects(event, User(id=8, role='lecturer')))
+        self.assertTrue(affects(event, User(id=9, role='admin')))
+
+
+class StreamTicketTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                             role='lecturer')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def ticket(self):
+        response = self.client.post('/api/timetable/events/ticket/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def open_stream(self, ticket):
+        return async_to_sync(timetable_events)(RequestFactory().get('/api/timetable/events/', {'ticket': ticket}))
+
+    def test_ticket_is_signed_and_single_use(self):
+        ticket = self.ticket()
+        self.assertNotIn(self.token, ticket)
+        claims = async_to_sync(aredeem_ticket)(ticket)
+        self.assertEqual(str(claims['user_id']), str(self.user.pk))
+        self.assertIsNone(async_to_sync(aredeem_ticket)(ticket))
+        self.assertIsNone(async_to_sync(aredeem_ticket)(self.ticket()[:-2] + 'xx'))
+        with override_settings(TIMETABLE_EVENTS_TICKET_TTL=-1):
+            self.assertIsNone(async_to_sync(aredeem_ticket)(self.ticket()))
+
+    def test_stream_accepts_a_ticket_for_an_active_user(self):
+        # Authenticated, then refused because the test client isn't ASGI
+        self.assertEqual(self.open_stream(self.ticket()).status_code, 503)
+        self.assertEqual(self.open_stream('forged').status_code, 401)
+        ticket = self.ticket()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.open_stream(ticket).status_code, 401)
+
+    def test_ticket_needs_authentication(self):
+        self.assertEqual(self.client.post('/api/timetable/events/ticket/').status_code, 401)
+
+
+def exam_sessions(days, per_day=2):
+    return [ExamSession(day, time(9 + 5 * i), time(12 + 5 * i)) for day in range(days) for i in range(per_day)]
+
+
+class ExamSchedulingTests(SimpleTestCase):
+    def test_graph_links_exams_sharing_a_group(self):
+        exams = [ExamTask(1, ('a',), 10), ExamTask(2, ('a', 'b'), 10), ExamTask(3, ('c',), 10)]
+        self.assertEqual(build_exam_graph(exams), {1: {2}, 2: {1}, 3: set()})
+
+    def test_exams_of_one_group_never_share_a_session(self):
+        exams = [ExamTask(i, (('g', i % 3),), 20) for i in range(12)]
+        result = schedule_exams(exams, [(1, 30), (2, 30), (3, 30)], exam_sessions(4))
+        self.assertEqual(result['statistics']['scheduled'], 12)
+        used = {(exam.groups[0], a.session) for a in result['assignments'] for exam in exams if exam.id == a.exam_id}
+        self.assertEqual(len(used), 12)
+
+    def test_exams_spread_over_days_before_doubling_up(self):
+        exams = [ExamTask(i, ('g',), 10) for i in range(3)]
+        result = schedule_exams(exams, [(1, 50)], exam_sessions(3))
+        days = sorted(exam_sessions(3)[a.session].day for a in result['assignments'])
+        self.assertEqual(days, [0, 1, 2])
+        self.assertEqual(result['statistics']['same_day_exams'], 0)
+
+    def test_large_exam_is_split_over_rooms(self):
+        free = [(30, 'small'), (60, 'mid'), (100, 'big')]
+        self.assertEqual(_take_rooms(free, 50), ([('mid', 50)], 60))
+        self.assertEqual(_take_rooms(free, 120), ([('big', 100), ('small', 20)], 130))
+        self.assertEqual(free, [])
+
+    def test_unscheduled_reasons(self):
+        exams = [ExamTask(1, ('g',), 10), ExamTask(2, ('g',), 10), ExamTask(3, ('h',), 500)]
+        result = schedule_exams(exams, [(1, 100)], exam_sessions(1, per_day=1))
+        reasons = dict(result['unscheduled'])
+        self.assertIn('same student group', reasons.pop(1 if result['assignments'][0].exam_id == 2 else 2))
+        self.assertIn('Not enough free seats', reasons[3])
+
+
+class ExamPeriodTests(TestCase):
+    def test_changed_due_dates_are_reported(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        lecturer = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                            role='lecturer')
+        subject = Subject.objects.create(name='Algorithms', code='CST201', course=course, semester=1)
+        Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        exam = Assessment.objects.create(title='Final', assessment_type='Exam', subject=subject,
+                                         lecturer=lecturer, due_date=date(2026, 1, 30))
+        start = date(2026, 1, 5)  # a Monday
+
+        result = schedule_exam_period(start, date(2026, 1, 9), semester=1)
+        self.assertEqual(result['moved'], [{'assessment_id': exam.id, 'title': 'Final', 'code': 'CST201',
+                                            'from': '2026-01-30', 'to': '2026-01-05'}])
+        exam.refresh_from_db()
+        self.assertEqual((exam.due_date, exam.status), (start, 'Scheduled'))
+
+        self.assertEqual(schedule_exam_period(start, date(2026, 1, 9), semester=1)['moved'], [])
+
+
+class PublishedVersionTests(APITestCase):
+    def setUp(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        self.subject = Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1)
+        self.room = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        self.old, self.new = (TimetableVersion.objects.create(semester=1) for _ in range(2))
+        for version, day in ((self.old, 'Monday'), (self.new, 'Tuesday')):
+            TimetableSlot.objects.create(version=version, subject=self.subject, classroom=self.room, day=day,
+                                         start_time=time(9), end_time=time(10))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='stu', email='stu@example.com', password='Pw@12345x', role='student'))
+
+    def days(self):
+        return [slot['day'] for slot in self.client.get('/api/timetable/').json()]
+
+    def test_publish_applies_to_the_next_read(self):
+        SystemSettings.objects.update_or_create(pk=1, defaults={'is_timetable_published': True,
+                                                                'published_version': self.old})
+        self.assertEqual(self.days(), ['Monday'])
+        SystemSettings.get_cached()  # this worker now holds a cached copy
+        # Another worker publishes: no signal reaches this process's cache
+        SystemSettings.objects.filter(pk=1).update(published_version=self.new)
+        self.assertEqual(self.days(), ['Tuesday'])
+        SystemSettings.objects.filter(pk=1).update(is_timetable_published=False)
+        self.assertEqual(self.days(), [])
+
+
+class MetricsReportTests(APITestCase):
+    url = '/api/timetable/metrics/'
+
+    def setUp(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        self.lecturer = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                                 role='lecturer')
+        subject = Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1,
+                                         lecturer=self.lecturer)
+        room = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        version = TimetableVersion.objects.create(semester=1)
+        for start, end in ((9, 11), (14, 15)):  # one two-hour class, three idle hours, one class
+            TimetableSlot.objects.create(version=version, subject=subject, classroom=room, day='Monday',
+                                         start_time=time(start), end_time=time(end))
+        self.admin = User.objects.create_user(username='adm', email='adm@example.com', password='Pw@12345x',
+                                              role='admin', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def test_reports_the_latest_version(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['total_classes'], 3)
+        self.assertEqual(response.data['summary']['lecturer_gap_hours'], 3)
+        self.assertEqual(response.data['distribution']['by_day']['Monday'], 3)
+        self.assertEqual(response.data['lecturers'][0]['lecturer_name'], 'lec')
+        self.assertEqual(response.data['rooms'][0]['hours_booked'], 3)
+
+    def test_stored_runs(self):
+        run = GenerationRun.objects.create(metrics=self.client.get(self.url).data)
+        response = self.client.get(self.url, {'run': run.id})
+        self.assertEqual((response.status_code, response.data['run_id']), (200, run.id))
+        self.assertEqual(self.client.get(self.url, {'run': run.id + 1}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'run': 'latest'}).status_code, 400)
+
+    def test_admins_only(self):
+        self.client.force_authenticate(self.lecturer)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class CommonFreeTests(APITestCase):
+    url = '/api/timetable/common_free/'
+
+    def setUp(self):
+        invalidate_occupancy()
+        self.course = Course.objects.create(name='Computing', code='CS')
+        self.lecturer = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                                 role='lecturer')
+        taught = Subject.objects.create(name='Algorithms', code='CST201', course=self.course, semester=1,
+                                        lecturer=self.lecturer)
+        attended = Subject.objects.create(name='Programming', code='CST101', course=self.course, semester=1)
+        room = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        version = TimetableVersion.objects.create(semester=1)
+        for subject, start, end in ((taught, 9, 11), (attended, 14, 15)):
+            TimetableSlot.objects.create(version=version, subject=subject, classroom=room, day='Monday',
+                                         start_time=time(start), end_time=time(end))
+        SystemSettings.objects.update_or_create(pk=1, defaults={'is_timetable_published': True,
+                                                                'published_version': version})
+        self.client.force_authenticate(self.lecturer)
+
+    def periods(self, **params):
+        response = self.client.get(self.url, {'lecturers': self.lecturer.id, 'groups': f'{self.course.id}:1',
+                                              'day': 'Monday', **params})
+        self.assertEqual(response.status_code, 200)
+        return [(p['start_time'], p['end_time']) for p in response.data['periods']]
+
+    def test_periods_free_for_everyone(self):
+        # Lecturer teaches 9-11, year 1 has a class 14-15 and its break 12-13
+        self.assertEqual(self.periods(), [('08:00', '09:00'), ('11:00', '12:00'), ('13:00', '14:00'),
+                                          ('15:00', '17:00')])
+        self.assertEqual(self.periods(min_hours=2), [('15:00', '17:00')])
+
+    def test_bad_queries(self):
+        for params in ({}, {'groups': 'CS-1'}, {'lecturers': '999'}, {'lecturers': self.lecturer.id, 'day': 'Sunday'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+        student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                           role='student')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.get(self.url, {'lecturers': self.lecturer.id}).status_code, 403)
+
+
+class CompactFormattedTests(APITestCase):
+    url = '/api/timetable/formatted/'
+
+    def setUp(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        self.lecturer = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                                 role='lecturer')
+        self.algorithms = Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1,
+                                                 lecturer=self.lecturer)
+        databases = Subject.objects.create(name='Databases', code='CST102', course=course, semester=1,
+                                           lecturer=self.lecturer)
+        self.room = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        self.version = TimetableVersion.objects.create(semester=1)
+        for subject, day, start in ((self.algorithms, 'Monday', 9), (self.algorithms, 'Monday', 10),
+                                    (databases, 'Tuesday', 13)):
+            TimetableSlot.objects.create(version=self.version, subject=subject, classroom=self.room, day=day,
+                                         start_time=time(start), end_time=time(start + 1))
+        self.client.force_authenticate(self.lecturer)
+
+    def publish(self):
+        SystemSettings.objects.update_or_create(pk=1, defaults={'is_timetable_published': True,
+                                                                'published_version': self.version})
+
+    def test_compact_payload_matches_the_full_one(self):
+        self.publish()
+        compact = self.client.get(self.url, {'compact': 'true'}).json()
+        full = self.client.get(self.url).json()
+        self.assertEqual(compact['format'], 'compact')
+        # Consecutive Algorithms hours are merged into one 09:00-11:00 class, as in the full format
+        monday = [slot for slot in compact['slots'] if slot[1] == 0]
+        self.assertEqual([slot[2:] for slot in monday], [[self.algorithms.id, self.room.id, 540, 660]])
+        self.assertEqual(len(compact['slots']), sum(len(day['classes']) for day in full['days']))
+        self.assertEqual(compact['subjects'][str(self.algorithms.id)]['code'], 'CST101')
+        self.assertEqual(compact['lecturers'], {str(self.lecturer.id): 'lec'})
+        self.assertEqual(compact['classrooms'][str(self.room.id)]['room_number'], 'H1')
+
+    def test_unpublished_and_anonymous(self):
+        self.assertEqual(self.client.get(self.url, {'compact': 'true'}).json()['slots'], [])
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url, {'compact': 'true'}).status_code, 401)
+
+
+class AsyncReadViewTests(APITestCase):
+    def setUp(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        self.student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                                role='student')
+        StudentProfile.objects.filter(user=self.student).update(course=course, year=1, semester=1)
+        subject = Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1)
+        room = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=50)
+        version = TimetableVersion.objects.create(semester=1)
+        for start in (9, 10):
+            TimetableSlot.objects.create(version=version, subject=subject, classroom=room, day='Monday',
+                                         start_time=time(start), end_time=time(start + 1))
+        SystemSettings.objects.update_or_create(pk=1, defaults={'is_timetable_published': True,
+                                                                'published_version': version})
+        self.auth = f'Bearer {AccessToken.for_user(self.student)}'
+
+    def call(self, view, path, method='get', **params):
+        request = getattr(RequestFactory(), method)(path, params, HTTP_AUTHORIZATION=self.auth)
+        return async_to_sync(view)(request)
+
+    def test_same_json_as_the_drf_views(self):
+        for view, path, params in ((formatted_timetable, '/api/timetable/formatted/', {}),
+                                   (formatted_timetable, '/api/timetable/formatted/', {'compact': 'true'}),
+                                   (grouped_subjects, '/api/subjects/grouped/', {}),
+                                   (current_user, '/api/auth/me/', {})):
+            response = self.call(view, path, **params)
+            self.assertEqual(response.status_code, 200, path)
+            expected = self.client.get(path, params, HTTP_AUTHORIZATION=self.auth)
+            self.assertEqual(json.loads(response.content), expected.json(), path)
+
+    def test_rejects_anonymous_bad_tokens_and_writes(self):
+        self.auth = ''
+        self.assertEqual(self.call(formatted_timetable, '/api/timetable/formatted/').status_code, 401)
+        self.auth = 'Bearer not-a-token'
+        self.assertEqual(self.call(current_user, '/api/auth/me/').status_code, 401)
+        self.auth = f'Bearer {AccessToken.for_user(self.student)}'
+        self.assertEqual(self.call(grouped_subjects, '/api/subjects/grouped/', method='post').status_code, 405)
+
+
+class GeneratedCapacityTests(TestCase):
+    def test_generator_seats_the_enrolled_group_like_the_audit(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1, weekly_hours=3)
+        small = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=40)
+        large = Classroom.objects.create(room_number='H2', room_type='Lecture Hall', capacity=60)
+        users = User.objects.bulk_create(
+            User(username=f's{i}', email=f's{i}@example.com', role='student') for i in range(45)
+        )
+        StudentProfile.objects.bulk_create(StudentProfile(user=user, course=course, year=1, semester=1)
+                                           for user in users)
+
+        result = generate_timetable_algo()
+        self.assertEqual(result['total_slots_created'], 3)
+        version_id = TimetableVersion.latest_id()
+        rooms = set(TimetableSlot.objects.filter(version_id=version_id).values_list('classroom_id', flat=True))
+        self.assertEqual(rooms, {large.id})
+        self.assertEqual(audit_version(version_id)['total_conflicts'], 0)
+
+        large.is_active = False
+        large.save()
+        result = generate_timetable_algo()
+        self.assertEqual(result['unscheduled'][0]['reason'], 'No active Lecture Halls seating 45 students')
+        self.assertNotIn(small.id, set(TimetableSlot.objects.filter(version_id=TimetableVersion.latest_id())
+                                       .values_list('classroom_id', flat=True)))
+
+
+class ManualEditTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Computing', code='CS')
+        lecturers = [User.objects.create_user(username=f'lec{i}', email=f'lec{i}@example.com', password='Pw@12345x',
+                                              role='lecturer') for i in range(3)]
+        self.subjects = [Subject.objects.create(name=f'Subject {i}', code=f'CST{i + 1}0{i}', course=self.course,
+                                                semester=1, lecturer=lecturers[i]) for i in range(3)]
+        self.h1 = Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=40)
+        self.h2 = Classroom.objects.create(room_number='H2', room_type='Lecture Hall', capacity=40)
+        self.version = TimetableVersion.objects.create(semester=1)
+        # Subjects 0 and 1 are different groups (years 1 and 2) sharing room H1; subject 2 is year 3
+        self.first = self.slot(self.subjects[0], self.h1, 9, 10)
+        self.second = self.slot(self.subjects[1], self.h1, 10, 11)
+        self.third = self.slot(self.subjects[2], self.h2, 9, 10)
+
+    def slot(self, subject, room, start, end, day='Monday'):
+        return TimetableSlot.objects.create(version=self.version, subject=subject, classroom=room, day=day,
+                                            start_time=time(start), end_time=time(end))
+
+    def conflicts(self, subject, room, start, end, slot_id=None):
+        candidate = candidate_slot(subject, room, 'Monday', time(start), time(end), slot_id)
+        return sorted(c['type'] for c in slot_conflicts(self.version.id, candidate))
+
+    def test_slot_conflicts(self):
+        self.assertEqual(self.conflicts(self.subjects[2], self.h1, 10, 11), ['room_clash'])
+        # A two-hour slot clashes with its group and lecturer in its second hour
+        self.assertEqual(self.conflicts(self.subjects[1], self.h2, 10, 12), ['group_clash', 'lecturer_clash'])
+        self.assertEqual(self.conflicts(self.subjects[2], self.h1, 11, 12), [])
+        # Re-saving a slot where it is doesn't clash with itself
+        self.assertEqual(self.conflicts(self.subjects[0], self.h1, 9, 10, slot_id=self.first.id), [])
+
+    def test_swap_updates_rows_in_place(self):
+        deleted = mock.Mock()
+        post_delete.connect(deleted, sender=TimetableSlot)
+        try:
+            updated, conflicts = apply_moves(self.version.id, [
+                {'id': self.first.id, 'start_time': time(10), 'end_time': time(11)},
+                {'id': self.second.id, 'start_time': time(9), 'end_time': time(10)},
+            ])
+        finally:
+            post_delete.disconnect(deleted, sender=TimetableSlot)
+        self.assertEqual((updated, conflicts), (2, []))
+        deleted.assert_not_called()
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.start_time, self.first.classroom_id, self.first.day),
+                         (time(10), self.h1.id, 'Monday'))
+        self.assertEqual(self.second.start_time, time(9))
+
+    def test_rejected_moves_write_nothing(self):
+        updated, conflicts = apply_moves(self.version.id, [{'id': self.first.id, 'classroom': self.h2}])
+        self.assertEqual(updated, 0)
+        self.assertEqual([c['type'] for c in conflicts], ['room_clash'])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.classroom_id, self.h1.id)
+        with self.assertRaises(ValueError):
+            apply_moves(self.version.id, [{'id': self.third.id + 100, 'day': 'Friday'}])
+
+
+class ProfilingTests(SimpleTestCase):
+    def test_one_capture_at_a_time(self):
+        first = GenerationProfiler(capture=True)
+        first.start()
+        try:
+            with self.assertRaises(ProfilingUnavailable):
+                GenerationProfiler(capture=True).start()
+            GenerationProfiler().start()  # timings only: no capture needed
+        finally:
+            first.stop()
+        first.stop()
+        self.assertIn('total', first.report()['timings_ms'])
+        second = GenerationProfiler(capture=True)
+        second.start()
+        second.stop()
+        self.assertTrue(second.report()['profile'])
+
+
+class GenerateProfilingTests(APITestCase):
+    def setUp(self):
+        course = Course.objects.create(name='Computing', code='CS')
+        Subject.objects.create(name='Algorithms', code='CST101', course=course, semester=1, weekly_hours=2)
+        Classroom.objects.create(room_number='H1', room_type='Lecture Hall', capacity=40)
+        self.client.force_authenticate(User.objects.create_user(
+            username='adm', email='adm@example.com', password='Pw@12345x', role='admin', is_staff=True))
+
+    def test_profiled_run_reports_functions(self):
+        response = self.client.post('/api/timetable/generate/', {'profile': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['profiling']['profile'])
+        self.assertEqual(self.client.post('/api/timetable/generate/', {'profile': 'yes'},
+                                          format='json').status_code, 400)
+
+    @override_settings(TIMETABLE_SOLVER_WORKERS=2)
+    def test_profiling_refused_with_worker_processes(self):
+        response = self.client.post('/api/timetable/generate/', {'profile': True}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(TimetableVersion.objects.count(), 0)
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import TimetableViewSet
+from .async_views import timetable_events
 
 router = DefaultRouter()
 router.register(r'timetable', TimetableViewSet)
 
 urlpatterns = [
+    # Server-sent events (ASGI only); before the router so 'events' isn't taken as a slot id
+    path('timetable/events/', timetable_events, name='timetable-events'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,128 @@
+"""
+Write-time checks for manual timetable edits.
+
+Single edits (TimetableViewSet create/update) fetch only the slots that
+could clash with the edited one: same version and day, overlapping time,
+and the same room, lecturer or course. That is one indexed query (plus a
+COUNT for the group size), however big the timetable is. The rules are
+the ones the audit uses (audit.find_conflicts), applied to the edited slot
+and its neighbours only.
+
+Batch edits load the version once, apply every move in memory and audit
+the result, so moves that only work together (swaps, chains) are accepted
+and nothing is written unless the whole batch is clean. The moves are then
+written as updates in two phases: every moved slot is first parked on a
+placeholder day no real slot uses, then moved to its target, so a swap
+never trips the room unique constraint halfway through. Rows keep their
+identity (no delete/create signals, foreign keys or history are lost).
+
+Both check and write inside one transaction holding the version row lock
+(lock_version), so concurrent edits of a version run one after the other
+and can't each pass the check and then clash.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .audit import AuditSlot, audit_slots_from_queryset, find_conflicts, group_sizes, _minutes, _time
+from .grid import get_year_from_code
+from .models import TimetableSlot, TimetableVersion
+from .occupancy_cache import invalidate_occupancy
+
+# Id used for a slot that doesn't exist yet
+NEW_SLOT_ID = 0
+
+
+def _group_size(course_id, semester, year):
+    from users.models import StudentProfile
+    return StudentProfile.objects.filter(course_id=course_id, semester=semester, year=year).count()
+
+
+def lock_version(version_id):
+    """Lock the version row until the end of the current transaction."""
+    list(TimetableVersion.objects.select_for_update().filter(pk=version_id).values_list('id', flat=True))
+
+
+def candidate_slot(subject, classroom, day, start_time, end_time, slot_id=None):
+    """AuditSlot for a slot as it would be saved."""
+    return AuditSlot(
+        slot_id or NEW_SLOT_ID, subject.id, subject.code, subject.lecturer_id, subject.course_id,
+        subject.semester, get_year_from_code(subject.code), subject.room_type,
+        classroom.id, classroom.room_number, classroom.room_type, classroom.capacity, classroom.is_active,
+        day, _minutes(start_time), _minutes(end_time),
+    )
+
+
+def slot_conflicts(version_id, candidate):
+    """
+    Conflicts the candidate slot would have in a version (only those involving it).
+    """
+    neighbours = TimetableSlot.objects.filter(
+        version_id=version_id, day=candidate.day,
+        start_time__lt=_time(candidate.end),
+        end_time__gt=_time(candidate.start),
+    ).filter(
+        Q(classroom_id=candidate.room_id)
+        | Q(subject__course_id=candidate.course_id, subject__semester=candidate.semester)
+        | (Q(subject__lecturer_id=candidate.lecturer_id) if candidate.lecturer_id else Q(pk__in=[]))
+    ).exclude(pk=candidate.id)
+
+    group = (candidate.course_id, candidate.semester, candidate.year)
+    sizes = {group: _group_size(*group)}
+    slots = [candidate] + audit_slots_from_queryset(neighbours)
+    return [c for c in find_conflicts(slots, sizes) if candidate.id in c['slots']]
+
+
+def apply_moves(version_id, moves):
+    """
+    Validate and apply a batch of slot moves atomically.
+
+    `moves` is a list of dicts {id, day?, start_time?, end_time?, classroom?}
+    (times as datetime.time, classroom as a Classroom). Returns
+    (updated_count, conflicts); nothing is written when conflicts is non-empty.
+    Raises ValueError for slots that are not in the version.
+    """
+    with transaction.atomic():
+        lock_version(version_id)
+        return _apply_moves(version_id, moves)
+
+
+def _apply_moves(version_id, moves):
+    slots = {s.id: s for s in audit_slots_from_queryset(TimetableSlot.objects.filter(version_id=version_id))}
+    missing = [move['id'] for move in moves if move['id'] not in slots]
+    if missing:
+        raise ValueError(f"Slots not in version {version_id}: {missing}")
+
+    for move in moves:
+        changes = {}
+        if 'day' in move:
+            changes['day'] = move['day']
+        if 'start_time' in move:
+            changes['start'] = _minutes(move['start_time'])
+        if 'end_time' in move:
+            changes['end'] = _minutes(move['end_time'])
+        if 'classroom' in move:
+            room = move['classroom']
+            changes.update(room_id=room.id, room_number=room.room_number, room_type=room.room_type,
+                           capacity=room.capacity, room_active=room.is_active)
+        slots[move['id']] = slots[move['id']]._replace(**changes)
+
+    moved = {move['id'] for move in moves}
+    conflicts = [
+        c for c in find_conflicts(list(slots.values()), group_sizes())
+        if moved.intersection(c['slots'])
+    ]
+    if conflicts:
+        return 0, conflicts
+
+    updated = [
+        TimetableSlot(
+            id=s.id, version_id=version_id, subject_id=s.subject_id, classroom_id=s.room_id,
+            day=s.day, start_time=_time(s.start), end_time=_time(s.end),
+        )
+        for s in (slots[slot_id] for slot_id in moved)
+    ]
+    TimetableSlot.objects.bulk_update([TimetableSlot(id=slot_id, day=f'~{slot_id}') for slot_id in moved], ['day'])
+    TimetableSlot.objects.bulk_update(updated, ['classroom', 'day', 'start_time', 'end_time'])
+    # bulk_update skips the TimetableSlot signals that refresh the occupancy index
+    transaction.on_commit(invalidate_occupancy)
+    return len(updated), []
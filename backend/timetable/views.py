@@ -1,17 +1,54 @@
-from rest_framework import viewsets, permissions, status  
+from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db import transaction
 from django.db.models import Q
 from datetime import datetime, timedelta
-from .models import TimetableSlot
+from .models import TimetableSlot, TimetableVersion, GenerationRun
 from .serializers import TimetableSlotSerializer
-from academics.models import Subject, SystemSettings
+from academics.models import Course, Subject, Classroom, SystemSettings
+from university_timetable.db_router import ReplicaReadMixin
 
 
-class TimetableViewSet(viewsets.ModelViewSet):
+class TimetableViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = TimetableSlot.objects.all()
     serializer_class = TimetableSlotSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Student read storms go to the read replicas (university_timetable/db_router.py)
+    replica_actions = ('list', 'retrieve', 'get_formatted_timetable')
+
+    DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+    COLOR_CLASSES = [
+        'bg-blue-100 border-blue-500 text-blue-700',
+        'bg-green-100 border-green-500 text-green-700',
+        'bg-purple-100 border-purple-500 text-purple-700',
+        'bg-orange-100 border-orange-500 text-orange-700',
+        'bg-pink-100 border-pink-500 text-pink-700',
+        'bg-teal-100 border-teal-500 text-teal-700',
+    ]
+
+    # Columns read for the compact format (no model instances are built)
+    COMPACT_FIELDS = (
+        'id', 'day', 'start_time', 'end_time', 'subject_id', 'classroom_id',
+        'subject__name', 'subject__code', 'subject__semester', 'subject__course_id',
+        'subject__course__name', 'subject__lecturer_id', 'subject__lecturer__username',
+        'classroom__room_number', 'classroom__room_type',
+    )
+
+    def get_version_id(self):
+        """
+        Timetable version this request reads.
+        - Non-admins: always the published version (None while unpublished),
+          read fresh so a publish or rollback applies on every worker at once
+        - Admins: ?version=<id> | published | latest (default: latest)
+        """
+        if self.request.user.role != 'admin':
+            return SystemSettings.visible_version_id()
+
+        return self._resolve_version(self.request.query_params.get('version', 'latest'))
+
+    def _resolve_version(self, requested):
+        return TimetableVersion.resolve(requested)
 
     def get_queryset(self):
         """
@@ -19,24 +56,28 @@ class TimetableViewSet(viewsets.ModelViewSet):
         - Students see their course timetable
         - Lecturers see their teaching schedule
         - Admins see everything
-        - Non-admins only see if published
+        - Non-admins only see if published (and only the published version)
         """
         user = self.request.user
-        
-        # Check publication status for non-admins
-        if user.role != 'admin':
-            settings = SystemSettings.get_settings()
-            if not settings.is_timetable_published:
-                return TimetableSlot.objects.none()
-
         queryset = TimetableSlot.objects.select_related(
             'subject', 'subject__course', 'subject__lecturer', 'classroom'
         ).all()
 
-        # Filter by query parameters
-        course_id = self.request.query_params.get('course_id')
-        lecturer_id = self.request.query_params.get('lecturer_id')
-        day = self.request.query_params.get('day')
+        # Admin edits by slot id work on any version; everything else reads one version
+        if not (self.detail and user.role == 'admin'):
+            version_id = self.get_version_id()
+            if version_id is None:
+                return TimetableSlot.objects.none()
+            queryset = queryset.filter(version_id=version_id)
+
+        return self.filter_by_params(queryset, self.request.query_params)
+
+    @staticmethod
+    def filter_by_params(queryset, params):
+        """Filter by query parameters (shared with timetable/async_views.py)"""
+        course_id = params.get('course_id')
+        lecturer_id = params.get('lecturer_id')
+        day = params.get('day')
 
         if course_id:
             queryset = queryset.filter(subject__course_id=course_id)
@@ -47,6 +88,129 @@ class TimetableViewSet(viewsets.ModelViewSet):
 
         return queryset.order_by('day', 'start_time')
 
+    def _check_editable(self, version_id):
+        """
+        Published versions are immutable: edit a draft and publish it instead.
+        """
+        if version_id is not None and version_id == SystemSettings.get_settings().published_version_id:
+            raise serializers.ValidationError(
+                {'version': 'The published timetable is read-only. Edit a draft version and publish it.'}
+            )
+
+    def _check_conflicts(self, version_id, data, instance=None):
+        """
+        SECURITY: Manual edits must not introduce lecturer, student-group or
+        room clashes (or break-hour / room-type / capacity violations).
+        """
+        from .validation import candidate_slot, slot_conflicts
+
+        def value(field):
+            return data[field] if field in data else getattr(instance, field)
+
+        candidate = candidate_slot(
+            value('subject'), value('classroom'), value('day'), value('start_time'), value('end_time'),
+            slot_id=instance.id if instance else None,
+        )
+        conflicts = slot_conflicts(version_id, candidate)
+        if conflicts:
+            raise serializers.ValidationError({
+                'error': 'This change would create timetable conflicts',
+                'conflicts': conflicts,
+            })
+
+    def perform_create(self, serializer):
+        from .validation import lock_version
+
+        version = serializer.validated_data.get('version')
+        if version is None:
+            raise serializers.ValidationError({'version': 'No timetable version exists yet. Generate one first.'})
+        self._check_editable(version.id)
+        # Check and save under the version lock, so a concurrent edit can't slip in between
+        with transaction.atomic():
+            lock_version(version.id)
+            self._check_conflicts(version.id, serializer.validated_data)
+            serializer.save()
+
+    def perform_update(self, serializer):
+        from .validation import lock_version
+
+        self._check_editable(serializer.instance.version_id)
+        if 'version' in serializer.validated_data:
+            self._check_editable(serializer.validated_data['version'].id)
+        version_id = serializer.validated_data['version'].id if 'version' in serializer.validated_data \
+            else serializer.instance.version_id
+        with transaction.atomic():
+            lock_version(version_id)
+            self._check_conflicts(version_id, serializer.validated_data, serializer.instance)
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        self._check_editable(instance.version_id)
+        instance.delete()
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def batch_edit(self, request):
+        """
+        Admin-only: Move many slots at once (drag-and-drop editing)
+
+        Body: {"version": <id, default latest>, "moves": [
+            {"id": 12, "day": "Tuesday", "start_time": "10:00", "end_time": "11:00", "classroom": 3}, ...
+        ]}
+        Omitted fields keep their current value. The whole batch is checked
+        as one change (so swaps work) and applied atomically, or rejected
+        with the list of conflicts it would create.
+        """
+        from .validation import apply_moves
+        from .grid import DAYS
+
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be an object with a moves list'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        version_id = TimetableVersion.resolve(request.data.get('version', 'latest'))
+        if version_id is None or not TimetableVersion.objects.filter(pk=version_id).exists():
+            return Response({'error': 'Timetable version not found'}, status=status.HTTP_404_NOT_FOUND)
+        self._check_editable(version_id)
+
+        moves = request.data.get('moves')
+        if not isinstance(moves, list) or not moves:
+            return Response({'error': 'moves must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        parsed = []
+        try:
+            if not all(isinstance(move, dict) for move in moves):
+                raise ValueError('each move must be an object')
+            rooms = Classroom.objects.in_bulk({int(move['classroom']) for move in moves if 'classroom' in move})
+            for move in moves:
+                item = {'id': int(move['id'])}
+                if 'day' in move:
+                    if move['day'] not in DAYS:
+                        raise ValueError(f"invalid day '{move['day']}'")
+                    item['day'] = move['day']
+                for field in ('start_time', 'end_time'):
+                    if field in move:
+                        item[field] = datetime.strptime(move[field], '%H:%M').time()
+                if 'classroom' in move:
+                    room_id = int(move['classroom'])
+                    if room_id not in rooms:
+                        raise ValueError(f"classroom {room_id} not found")
+                    item['classroom'] = rooms[room_id]
+                parsed.append(item)
+        except (KeyError, TypeError, ValueError) as e:
+            return Response({'error': f'Invalid move: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if len({item['id'] for item in parsed}) != len(parsed):
+            return Response({'error': 'Each slot can only be moved once per batch'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            updated, conflicts = apply_moves(version_id, parsed)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if conflicts:
+            return Response({
+                'error': 'These moves would create timetable conflicts',
+                'conflicts': conflicts,
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({'message': f'{updated} slots updated', 'version': version_id, 'updated': updated})
+
     @action(detail=False, methods=['get'], url_path='formatted')
     def get_formatted_timetable(self, request):
         """
@@ -65,15 +229,22 @@ class TimetableViewSet(viewsets.ModelViewSet):
         - course_id: Filter by course
         - lecturer_id: Filter by lecturer
         - view: 'calendar' or 'list' (default: 'calendar')
+        - compact: 'true' for the normalized format (see compact_payload)
         """
         queryset = self.get_queryset()
         view_type = request.query_params.get('view', 'calendar')
-        
-        # Get all slots
-        slots = list(queryset)
-        
+
+        if request.query_params.get('compact', '').lower() in ('1', 'true', 'yes'):
+            return Response(self.compact_payload(queryset.values_list(*self.COMPACT_FIELDS), view_type))
+        return Response(self.formatted_payload(list(queryset), view_type))
+
+    def formatted_payload(self, slots, view_type):
+        """
+        BACKEND LOGIC: The formatted timetable for `slots` (with subject,
+        course, lecturer and classroom loaded)
+        """
         if not slots:
-            return Response({
+            return {
                 'days': [],
                 'next_class': None,
                 'view': view_type,
@@ -82,13 +253,13 @@ class TimetableViewSet(viewsets.ModelViewSet):
                     'end': '19:00',
                     'slots': ['08:00', '09:00', '10:00', '11:00', '12:00', '13:00', '14:00', '15:00', '16:00', '17:00']
                 }
-            })
+            }
         
         # Process timetable data
         days_data = self._process_timetable_by_days(slots)
         next_class = self._find_next_class(slots)
         
-        return Response({
+        return {
             'days': days_data,
             'next_class': next_class,
             'view': view_type,
@@ -97,16 +268,76 @@ class TimetableViewSet(viewsets.ModelViewSet):
                 'end': '19:00',
                 'slots': self._generate_time_slots()
             }
-        })
+        }
+
+    def compact_payload(self, rows, view_type):
+        """
+        BACKEND LOGIC: Normalized timetable payload
+        - Subjects, courses, lecturers and classrooms are sent once, in lookup tables keyed by id
+        - Each (merged) class is a small tuple: [id, day index, subject id, classroom id, start, end]
+          with start/end in minutes since midnight (duration = end - start,
+          position = (start - 480) // 60)
+        - Subject colors are indexes into `colors`
+        `rows` are the slots' COMPACT_FIELDS values.
+        """
+        day_index = {day: i for i, day in enumerate(self.DAYS)}
+        subjects, courses, lecturers, classrooms = {}, {}, {}, {}
+        slots = []
+        for (slot_id, day, start, end, subject_id, classroom_id, name, code, semester,
+             course_id, course_name, lecturer_id, lecturer_name, room_number, room_type) in rows:
+            if day not in day_index:
+                continue
+            if subject_id not in subjects:
+                subjects[subject_id] = {
+                    'name': name, 'code': code, 'semester': semester,
+                    'course': course_id, 'lecturer': lecturer_id,
+                    'color': self._color_index(name),
+                }
+                if course_id is not None:
+                    courses[course_id] = course_name
+                if lecturer_id is not None:
+                    lecturers[lecturer_id] = lecturer_name
+            classrooms[classroom_id] = {'room_number': room_number, 'room_type': room_type}
+            slots.append([slot_id, day_index[day], subject_id, classroom_id,
+                          start.hour * 60 + start.minute, end.hour * 60 + end.minute])
+
+        # Merge consecutive slots of the same subject in the same classroom
+        slots.sort(key=lambda slot: (slot[1], slot[4]))
+        merged = []
+        for slot in slots:
+            last = merged[-1] if merged else None
+            if last and last[1] == slot[1] and last[2] == slot[2] and last[3] == slot[3] and last[5] == slot[4]:
+                last[5] = slot[5]
+            else:
+                merged.append(slot)
+
+        now = datetime.now()
+        next_slot, minutes_until = self._next_slot(
+            merged, now.strftime('%A'), now.hour * 60 + now.minute,
+            day_of=lambda slot: self.DAYS[slot[1]], start_of=lambda slot: slot[4],
+        )
+        return {
+            'format': 'compact',
+            'view': view_type,
+            'days': self.DAYS,
+            'columns': ['id', 'day', 'subject', 'classroom', 'start', 'end'],
+            'slots': merged,
+            'subjects': subjects,
+            'courses': courses,
+            'lecturers': lecturers,
+            'classrooms': classrooms,
+            'colors': self.COLOR_CLASSES,
+            'next_class': [next_slot[0], minutes_until] if next_slot else None,
+            'time_range': {'start': '08:00', 'end': '19:00', 'slots': self._generate_time_slots()},
+        }
 
     def _process_timetable_by_days(self, slots):
         """
         BACKEND LOGIC: Group and process slots by day
         """
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         days_data = []
         
-        for day in days:
+        for day in self.DAYS:
             day_slots = [s for s in slots if s.day == day]
             
             if not day_slots:
@@ -206,47 +437,44 @@ class TimetableViewSet(viewsets.ModelViewSet):
         BACKEND LOGIC: Find the next upcoming class
         """
         now = datetime.now()
-        current_day = now.strftime('%A')
-        current_time = now.time()
-        
+        next_slot, minutes_until = self._next_slot(
+            slots, now.strftime('%A'), now.hour * 60 + now.minute,
+            day_of=lambda s: s.day, start_of=lambda s: s.start_time.hour * 60 + s.start_time.minute,
+        )
+        if next_slot is None:
+            return None
+        return {
+            'subject': next_slot.subject.name,
+            'classroom': next_slot.classroom.room_number if next_slot.classroom else 'TBA',
+            'start_time': self._format_time(next_slot.start_time),
+            'minutes_until': minutes_until,
+            'day': next_slot.day
+        }
+
+    def _next_slot(self, slots, current_day, current_minutes, day_of, start_of):
+        """
+        BACKEND LOGIC: Next class today (with minutes until it starts),
+        else the first class of the next teaching day (minutes_until None)
+        """
         # Get today's remaining classes
-        today_slots = [s for s in slots if s.day == current_day and s.start_time > current_time]
-        
+        today_slots = [s for s in slots if day_of(s) == current_day and start_of(s) > current_minutes]
         if today_slots:
-            next_slot = min(today_slots, key=lambda x: x.start_time)
-            minutes_until = self._calculate_minutes_until(current_time, next_slot.start_time)
-            
-            return {
-                'subject': next_slot.subject.name,
-                'classroom': next_slot.classroom.room_number if next_slot.classroom else 'TBA',
-                'start_time': self._format_time(next_slot.start_time),
-                'minutes_until': minutes_until,
-                'day': next_slot.day
-            }
-        
+            next_slot = min(today_slots, key=start_of)
+            return next_slot, start_of(next_slot) - current_minutes
+
         # Find next day's first class
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         try:
-            current_day_index = days_order.index(current_day)
+            current_day_index = self.DAYS.index(current_day)
         except ValueError:
-            return None
-        
+            return None, None
+
         for i in range(1, 5):  # Check next 4 days
-            next_day_index = (current_day_index + i) % 5
-            next_day = days_order[next_day_index]
-            day_slots = [s for s in slots if s.day == next_day]
-            
+            next_day = self.DAYS[(current_day_index + i) % 5]
+            day_slots = [s for s in slots if day_of(s) == next_day]
             if day_slots:
-                next_slot = min(day_slots, key=lambda x: x.start_time)
-                return {
-                    'subject': next_slot.subject.name,
-                    'classroom': next_slot.classroom.room_number if next_slot.classroom else 'TBA',
-                    'start_time': self._format_time(next_slot.start_time),
-                    'minutes_until': None,
-                    'day': next_slot.day
-                }
-        
-        return None
+                return min(day_slots, key=start_of), None
+
+        return None, None
 
     def _format_time(self, time_obj):
         """
@@ -269,14 +497,6 @@ class TimetableViewSet(viewsets.ModelViewSet):
         end_minutes = end_time.hour * 60 + end_time.minute
         return end_minutes - start_minutes
 
-    def _calculate_minutes_until(self, current_time, target_time):
-        """
-        BACKEND LOGIC: Calculate minutes until target time
-        """
-        current_minutes = current_time.hour * 60 + current_time.minute
-        target_minutes = target_time.hour * 60 + target_time.minute
-        return target_minutes - current_minutes
-
     def _get_time_position(self, time_obj):
         """
         BACKEND LOGIC: Get position index (0-based, from 8:00 AM)
@@ -292,18 +512,12 @@ class TimetableViewSet(viewsets.ModelViewSet):
         """
         BACKEND LOGIC: Assign consistent color based on subject name
         """
-        colors = [
-            'bg-blue-100 border-blue-500 text-blue-700',
-            'bg-green-100 border-green-500 text-green-700',
-            'bg-purple-100 border-purple-500 text-purple-700',
-            'bg-orange-100 border-orange-500 text-orange-700',
-            'bg-pink-100 border-pink-500 text-pink-700',
-            'bg-teal-100 border-teal-500 text-teal-700',
-        ]
-        
+        return self.COLOR_CLASSES[self._color_index(subject_name)]
+
+    def _color_index(self, subject_name):
         # Generate consistent hash from subject name
         hash_value = sum(ord(char) for char in subject_name)
-        return colors[hash_value % len(colors)]
+        return hash_value % len(self.COLOR_CLASSES)
 
     def _generate_time_slots(self):
         """
@@ -311,15 +525,136 @@ class TimetableViewSet(viewsets.ModelViewSet):
         """
         return [f"{8 + i}:00" for i in range(11)]  # 8:00 to 18:00
 
+    @action(detail=False, methods=['post'], url_path='events/ticket')
+    def events_ticket(self, request):
+        """
+        Signed ticket for opening GET /api/timetable/events/?ticket=<ticket>
+        with EventSource, which can't send the Authorization header
+        (timetable/events.py). SECURITY: keeps the access token out of URLs
+        and therefore out of access logs.
+        """
+        from django.conf import settings
+        from .events import issue_ticket
+
+        return Response({
+            'ticket': issue_ticket(request.auth),
+            'expires_in': getattr(settings, 'TIMETABLE_EVENTS_TICKET_TTL', 30),
+        })
+
+    @action(detail=False, methods=['get'])
+    def common_free(self, request):
+        """
+        Common free periods of several lecturers and student groups
+        (for make-up classes and meetings). Admins and lecturers only.
+
+        Query params:
+        - lecturers: comma-separated lecturer ids
+        - groups: comma-separated <course_id>:<year> (current semester unless ?semester=)
+        - room_type: also need a free room of this type (lists the rooms)
+        - day: Monday..Friday (default: every day)
+        - min_hours: shortest period to return (default 1)
+        - ignore_availability: true to ignore lecturers' availability settings
+
+        BACKEND LOGIC: ANDs the cached per-day hour masks of every person
+        (timetable/occupancy_cache.py) instead of querying slots per person.
+        """
+        from .availability import common_free_periods
+        from .grid import DAYS, DAY_INDEX
+        from .occupancy_cache import get_occupancy_index
+        from users.models import User
+
+        if request.user.role not in ['admin', 'lecturer']:
+            return Response({'error': 'Only admins and lecturers can search common free time'}, status=status.HTTP_403_FORBIDDEN)
+
+        params = request.query_params
+        settings = SystemSettings.get_cached()
+        try:
+            lecturer_ids = [int(x) for x in params.get('lecturers', '').split(',') if x.strip()]
+            semester = int(params.get('semester', settings.current_semester))
+            groups = []
+            for item in (x for x in params.get('groups', '').split(',') if x.strip()):
+                course_id, year = item.split(':')
+                groups.append((int(course_id), semester, int(year)))
+            min_hours = max(1, int(params.get('min_hours', 1)))
+        except ValueError:
+            return Response(
+                {'error': 'lecturers must be ids, groups must be <course_id>:<year>, min_hours a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not lecturer_ids and not groups:
+            return Response({'error': 'Give at least one lecturer or group'}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = set(User.objects.filter(id__in=lecturer_ids, role='lecturer').values_list('id', flat=True))
+        missing = sorted(set(lecturer_ids) - found)
+        if missing:
+            return Response({'error': f'Unknown lecturers: {missing}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        day = params.get('day')
+        if day and day not in DAY_INDEX:
+            return Response({'error': f"Invalid day. Must be one of: {', '.join(DAYS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        room_type = params.get('room_type')
+        if room_type and room_type not in dict(Classroom.ROOM_TYPES):
+            return Response({'error': 'Invalid room_type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Published timetable for everyone; admins may pass ?version= to check a draft
+        if request.user.role == 'admin' and params.get('version'):
+            version_id = self._resolve_version(params.get('version'))
+        else:
+            version_id = SystemSettings.visible_version_id()
+
+        index = get_occupancy_index(version_id)
+        ignore_availability = params.get('ignore_availability', '').lower() in ('1', 'true', 'yes')
+        periods = common_free_periods(
+            index.occupancy,
+            [DAY_INDEX[day]] if day else range(len(DAYS)),
+            lecturer_ids=lecturer_ids,
+            groups=groups,
+            availability=None if ignore_availability else index.availability,
+            rooms=index.rooms,
+            room_type=room_type,
+            min_hours=min_hours,
+        )
+        return Response({
+            'version': version_id,
+            'count': len(periods),
+            'periods': [{
+                'day': DAYS[d],
+                'start_time': f"{start:02d}:00",
+                'end_time': f"{end:02d}:00",
+                'hours': end - start,
+                **({'rooms': [{'id': r.id, 'room_number': r.room_number, 'capacity': r.capacity} for r in rooms]}
+                   if rooms is not None else {}),
+            } for d, start, end, rooms in periods],
+        })
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def generate(self, request):
         """
         Admin-only: Trigger timetable generation with conflict detection
         """
         from .generator import generate_timetable_algo
+        from .profiling import ProfilingUnavailable
+        from .soft_constraints import resolve_weights
+
+        # Optional per-run soft-constraint weights, e.g. {"weights": {"student_gaps": 5}}
+        weights = request.data.get('weights')
+        try:
+            resolve_weights(weights)
+        except ValueError as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Optional local-search pass, e.g. {"local_search": "annealing", "time_budget": 10}
+        search_options, error = self._local_search_options(request)
+        if error:
+            return Response({'status': 'error', 'message': error}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Optional cProfile capture for this run, e.g. {"profile": true}
+        profile = request.data.get('profile', False)
+        if not isinstance(profile, bool):
+            return Response({'status': 'error', 'message': 'profile must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            result = generate_timetable_algo()
+            result = generate_timetable_algo(weights=weights, profile=profile, **search_options)
             
             # Check if there were any unscheduled subjects
             if result['unscheduled']:
@@ -330,8 +665,15 @@ class TimetableViewSet(viewsets.ModelViewSet):
                         'total_subjects': result['total_subjects'],
                         'fully_scheduled': result['fully_scheduled'],
                         'partially_scheduled': len(result['unscheduled']),
-                        'total_slots_created': result['total_slots_created']
+                        'total_slots_created': result['total_slots_created'],
+                        'soft_penalty': result['soft_penalty']
                     },
+                    'local_search': result['local_search'],
+                    'decomposition': result['decomposition'],
+                    'profiling': result['profiling'],
+                    'run_id': result['run_id'],
+                    'version_id': result['version_id'],
+                    'metrics': result['metrics'],
                     'unscheduled': result['unscheduled']
                 }, status=status.HTTP_200_OK)
             
@@ -341,16 +683,81 @@ class TimetableViewSet(viewsets.ModelViewSet):
                 'statistics': {
                     'total_subjects': result['total_subjects'],
                     'fully_scheduled': result['fully_scheduled'],
-                    'total_slots_created': result['total_slots_created']
-                }
+                    'total_slots_created': result['total_slots_created'],
+                    'soft_penalty': result['soft_penalty']
+                },
+                'local_search': result['local_search'],
+                'decomposition': result['decomposition'],
+                'profiling': result['profiling'],
+                'run_id': result['run_id'],
+                'version_id': result['version_id'],
+                'metrics': result['metrics'],
             }, status=status.HTTP_200_OK)
         
+        except ProfilingUnavailable as e:
+            return Response({'status': 'error', 'message': f'Profiling unavailable: {e}'},
+                            status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({
                 'status': 'error',
                 'message': f'Generation failed: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _local_search_options(self, request):
+        """
+        Parse local-search options from the request body.
+        Returns (options, error_message).
+        """
+        from django.conf import settings
+        from .local_search import METHODS
+
+        method = request.data.get('local_search', getattr(settings, 'TIMETABLE_LOCAL_SEARCH', None))
+        if not method:
+            return {}, None
+        if method not in METHODS:
+            return {}, f"Invalid local_search. Must be one of: {', '.join(METHODS)}"
+
+        max_budget = getattr(settings, 'TIMETABLE_LOCAL_SEARCH_MAX_BUDGET', 60)
+        budget = request.data.get('time_budget')
+        if budget is not None:
+            try:
+                budget = float(budget)
+            except (TypeError, ValueError):
+                return {}, 'time_budget must be a number of seconds'
+            if not 0 < budget <= max_budget:
+                return {}, f'time_budget must be between 0 and {max_budget} seconds'
+        return {'local_search': method, 'time_budget': budget}, None
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def simulate(self, request):
+        """
+        Admin-only: What-if run of the generator with overrides applied.
+        Nothing is saved; the live and draft timetables are untouched.
+
+        Body: {"overrides": [...], "weights": {...}, "local_search": ..., "time_budget": ...}
+        (override format: see simulation.py; time_budget is shared by the scenario and baseline runs)
+        """
+        from .simulation import simulate_timetable
+        from .soft_constraints import resolve_weights
+
+        weights = request.data.get('weights')
+        try:
+            resolve_weights(weights)
+        except ValueError as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        search_options, error = self._local_search_options(request)
+        if error:
+            return Response({'status': 'error', 'message': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = simulate_timetable(
+                request.data.get('overrides', []), weights=resolve_weights(weights), **search_options
+            )
+        except ValueError as e:
+            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'status': 'success', **result}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def resolve_conflicts(self, request):
         """
@@ -370,8 +777,12 @@ class TimetableViewSet(viewsets.ModelViewSet):
                     'statistics': {
                         'total_subjects': result['total_subjects'],
                         'fully_scheduled': result['fully_scheduled'],
-                        'total_slots_created': result['total_slots_created']
-                    }
+                        'total_slots_created': result['total_slots_created'],
+                        'soft_penalty': result['soft_penalty']
+                    },
+                    'run_id': result['run_id'],
+                    'version_id': result['version_id'],
+                    'metrics': result['metrics'],
                 }, status=status.HTTP_200_OK)
             
             return Response({
@@ -380,8 +791,12 @@ class TimetableViewSet(viewsets.ModelViewSet):
                 'statistics': {
                     'total_subjects': result['total_subjects'],
                     'fully_scheduled': result['fully_scheduled'],
-                    'total_slots_created': result['total_slots_created']
-                }
+                    'total_slots_created': result['total_slots_created'],
+                    'soft_penalty': result['soft_penalty']
+                },
+                'run_id': result['run_id'],
+                'version_id': result['version_id'],
+                'metrics': result['metrics'],
             }, status=status.HTTP_200_OK)
         
         except Exception as e:
@@ -389,3 +804,253 @@ class TimetableViewSet(viewsets.ModelViewSet):
                 'status': 'error',
                 'message': f'Resolution failed: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def metrics(self, request):
+        """
+        Admin-only: Quality metrics for the current timetable
+        (room utilisation, lecturer/student gaps, late finishes, day distribution)
+
+        Query params:
+        - version: timetable version (id | published | latest, default latest)
+        - run: return the metrics stored with a past generation run instead
+        """
+        from .metrics import compute_timetable_metrics, label_report, slot_rows_from_queryset
+
+        run_id = request.query_params.get('run')
+        if run_id:
+            if not run_id.isdigit():
+                return Response({'error': 'run must be a generation run id'}, status=status.HTTP_400_BAD_REQUEST)
+            run = GenerationRun.objects.filter(pk=run_id).first()
+            if run is None:
+                return Response({'error': 'Generation run not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'run_id': run.id, 'created_at': run.created_at, **label_report(run.metrics)})
+
+        rows = slot_rows_from_queryset(TimetableSlot.objects.filter(version_id=self.get_version_id()))
+        rooms = Classroom.objects.filter(is_active=True).only('id', 'room_number', 'room_type')
+        return Response(label_report(compute_timetable_metrics(rows, rooms)))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def audit(self, request):
+        """
+        Admin-only: Every lecturer, student-group and room clash, break-hour,
+        room-type, capacity and inactive-room violation in a timetable version
+        (?version=id|published|latest, default latest). Manual edits can
+        introduce these; generated timetables should have none.
+        """
+        from .audit import audit_version
+
+        version_id = self.get_version_id()
+        if version_id is None or not TimetableVersion.objects.filter(pk=version_id).exists():
+            return Response({'error': 'Timetable version not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(audit_version(version_id))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def runs(self, request):
+        """
+        Admin-only: Recent generation runs with their statistics and metric summaries
+        """
+        limit = min(int(request.query_params.get('limit', 20) or 20), 100)
+        runs = GenerationRun.objects.all()[:limit]
+        return Response([{
+            'id': run.id,
+            'created_at': run.created_at,
+            'semester': run.semester,
+            'duration_ms': run.duration_ms,
+            'statistics': run.statistics,
+            'metrics': run.metrics.get('summary', {}),
+            'unscheduled_count': len(run.unscheduled),
+        } for run in runs])
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def versions(self, request):
+        """
+        Admin-only: Stored timetable versions (newest first) and which one is published
+        """
+        from django.db.models import Count
+
+        published, published_id = SystemSettings.publication()
+        versions = TimetableVersion.objects.annotate(slot_count=Count('slots')).select_related('run').order_by('-id')
+        return Response([{
+            'id': version.id,
+            'label': str(version),
+            'semester': version.semester,
+            'created_at': version.created_at,
+            'slot_count': version.slot_count,
+            'run_id': getattr(getattr(version, 'run', None), 'id', None),
+            'is_published': published and version.id == published_id,
+        } for version in versions])
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def diff(self, request):
+        """
+        Admin-only: What changed between two timetable versions
+
+        Query params (id | published | latest):
+        - from: base version (default: published)
+        - to:   compared version (default: latest)
+
+        Returns added / removed / moved slots and the student groups and
+        lecturers affected, so only impacted people need to be notified.
+        """
+        from .diff import diff_rows
+        from .metrics import slot_rows_from_queryset
+        from users.models import User
+
+        base_id = self._resolve_version(request.query_params.get('from', 'published'))
+        target_id = self._resolve_version(request.query_params.get('to', 'latest'))
+        found = set(TimetableVersion.objects.filter(pk__in=[base_id, target_id]).values_list('id', flat=True))
+        if base_id not in found or target_id not in found:
+            return Response({'error': 'Timetable version not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        result = diff_rows(
+            slot_rows_from_queryset(TimetableSlot.objects.filter(version_id=base_id)),
+            slot_rows_from_queryset(TimetableSlot.objects.filter(version_id=target_id)),
+        )
+
+        # Resolve ids to labels with one query per table, only for changed rows
+        changed = result['added'] + result['removed'] + [row for pair in result['moved'] for row in pair]
+        subjects = {s['id']: s for s in Subject.objects.filter(
+            id__in={row.subject_id for row in changed}
+        ).values('id', 'code', 'name')}
+        rooms = dict(Classroom.objects.filter(
+            id__in={row.room_id for row in changed}
+        ).values_list('id', 'room_number'))
+        courses = dict(Course.objects.filter(
+            id__in={course_id for course_id, _, _ in result['groups']}
+        ).values_list('id', 'name'))
+
+        def place(row):
+            return {
+                'day': row.day,
+                'start_time': f"{row.hour:02d}:00",
+                'end_time': f"{row.hour + row.hours:02d}:00",
+                'classroom': row.room_id,
+                'room_number': rooms.get(row.room_id),
+            }
+
+        def subject(row):
+            info = subjects.get(row.subject_id, {})
+            return {'subject': row.subject_id, 'subject_code': info.get('code'), 'subject_name': info.get('name')}
+
+        def slot(row):
+            return {**subject(row), **place(row)}
+
+        return Response({
+            'from': base_id,
+            'to': target_id,
+            'summary': {
+                'added': len(result['added']),
+                'removed': len(result['removed']),
+                'moved': len(result['moved']),
+                'unchanged': result['unchanged'],
+            },
+            'added': [slot(row) for row in result['added']],
+            'removed': [slot(row) for row in result['removed']],
+            'moved': [{**subject(new), 'from': place(old), 'to': place(new)} for old, new in result['moved']],
+            'affected_groups': [
+                {'course': course_id, 'course_name': courses.get(course_id), 'semester': semester, 'year': year}
+                for course_id, semester, year in sorted(result['groups'])
+            ],
+            'affected_lecturers': list(User.objects.filter(id__in=result['lecturers']).order_by('id').values(
+                'id', 'email', 'first_name', 'last_name'
+            )),
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def schedule_exams(self, request):
+        """
+        Admin-only: Schedule the semester's exams into sessions and rooms
+        (exam_generator.py). Exams sharing a student group never share a
+        session; exams larger than a room are split across rooms.
+
+        Body: {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "semester": 1|2 (default current)}
+        Re-running replaces the stored sittings of those exams. Scheduled
+        exams' due dates become the exam day; 'moved' lists every due date
+        that changed ({assessment_id, title, code, from, to}).
+        """
+        from .exam_generator import schedule_exam_period
+
+        try:
+            start = datetime.strptime(str(request.data['start']), '%Y-%m-%d').date()
+            end = datetime.strptime(str(request.data['end']), '%Y-%m-%d').date()
+            semester = request.data.get('semester')
+            semester = int(semester) if semester not in (None, '') else None
+        except KeyError:
+            return Response({'error': 'start and end are required'}, status=status.HTTP_400_BAD_REQUEST)
+        except (TypeError, ValueError) as e:
+            return Response({'error': f'Invalid request: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days > 60:
+            return Response({'error': 'end must be after start and at most 60 days later'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = schedule_exam_period(start, end, semester)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'status': 'partial_success' if result['unscheduled'] else 'success',
+            **result,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def exams(self, request):
+        """
+        Exam timetable: one entry per exam with its session and rooms.
+        Students see their group's exams, lecturers their own, admins all.
+
+        Query params:
+        - start / end: YYYY-MM-DD (optional)
+        """
+        from .grid import get_year_from_code
+        from .models import ExamSitting
+
+        user = request.user
+        sittings = ExamSitting.objects.select_related('assessment__subject', 'classroom')
+        if user.role == 'student':
+            profile = getattr(user, 'student_profile', None)
+            if profile is None or not profile.course_id:
+                return Response({'error': 'No course assigned to this student'}, status=status.HTTP_400_BAD_REQUEST)
+            # The group's subjects are matched on the code's year, as in the solver
+            subject_ids = [
+                subject_id for subject_id, code in
+                Subject.objects.filter(course_id=profile.course_id, semester=profile.semester).values_list('id', 'code')
+                if get_year_from_code(code) == profile.year
+            ]
+            sittings = sittings.filter(assessment__subject_id__in=subject_ids)
+        elif user.role == 'lecturer':
+            sittings = sittings.filter(assessment__lecturer_id=user.pk)
+        elif user.role != 'admin':
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            if request.query_params.get('start'):
+                sittings = sittings.filter(date__gte=datetime.strptime(request.query_params['start'], '%Y-%m-%d').date())
+            if request.query_params.get('end'):
+                sittings = sittings.filter(date__lte=datetime.strptime(request.query_params['end'], '%Y-%m-%d').date())
+        except ValueError as e:
+            return Response({'error': f'Invalid query: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        exams = {}
+        for sitting in sittings.order_by('date', 'start_time', 'assessment_id', 'classroom_id'):
+            assessment = sitting.assessment
+            entry = exams.get(assessment.id)
+            if entry is None:
+                entry = exams[assessment.id] = {
+                    'assessment_id': assessment.id,
+                    'title': assessment.title,
+                    'subject_code': assessment.subject.code,
+                    'subject_name': assessment.subject.name,
+                    'date': sitting.date.isoformat(),
+                    'start_time': self._format_time(sitting.start_time),
+                    'end_time': self._format_time(sitting.end_time),
+                    'students': 0,
+                    'rooms': [],
+                }
+            entry['students'] += sitting.seats
+            entry['rooms'].append({
+                'classroom': sitting.classroom_id,
+                'room_number': sitting.classroom.room_number,
+                'seats': sitting.seats,
+            })
+        return Response(list(exams.values()))
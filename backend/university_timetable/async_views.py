@@ -0,0 +1,99 @@
+"""
+Async-native read endpoints.
+
+The hot student reads (GET /api/timetable/formatted/, /api/subjects/grouped/
+and /api/auth/me/) also exist as plain Django async views: timetable,
+academics and users each have an async_views module. Under an ASGI server
+(e.g. `uvicorn university_timetable.asgi:application`) a worker then
+holds a slow client's connection as a suspended coroutine while it waits
+on the network, cache or database, instead of blocking a thread.
+
+Set ASYNC_READ_VIEWS to serve those URLs with the async views
+(university_timetable/urls.py). The frontend doesn't change: they return
+the same JSON as the DRF actions. Under WSGI they still work, but each
+request pays for an event loop, so leave the setting off there.
+
+@async_read_view does what DRF would do for these views:
+
+- only GET/HEAD;
+- JWT authentication: ClaimsJWTAuthentication's token claims check on the
+  async ORM (users.authentication.aauthenticate), or claims a wrapping
+  decorator has already verified (request.verified_claims, e.g. a stream
+  ticket);
+- the UserRateThrottle limit, with the same cache keys and history as
+  the DRF views (APIView.throttle_classes is read per request);
+- replica_reads(), like the DRF actions they replace.
+
+Responses are rendered with DRF's JSONRenderer (same bytes as the DRF
+views) and errors keep DRF's {'detail': ...} shape.
+"""
+import functools
+import math
+
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
+
+from .db_router import replica_reads
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(JSONRenderer().render(data), status=status_code,
+                        content_type='application/json', headers=headers)
+
+
+async def _allow(throttle, request):
+    """SimpleRateThrottle.allow_request() with async cache access."""
+    if throttle.rate is None:
+        return True
+    throttle.key = throttle.get_cache_key(request, None)
+    if throttle.key is None:
+        return True
+    throttle.history = await throttle.cache.aget(throttle.key, [])
+    throttle.now = throttle.timer()
+    while throttle.history and throttle.history[-1] <= throttle.now - throttle.duration:
+        throttle.history.pop()
+    if len(throttle.history) >= throttle.num_requests:
+        return False
+    throttle.history.insert(0, throttle.now)
+    await throttle.cache.aset(throttle.key, throttle.history, throttle.duration)
+    return True
+
+
+def async_read_view(view):
+    """Decorator for async GET views that require an authenticated user."""
+    @functools.wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'detail': f'Method "{request.method}" not allowed.'},
+                                 status.HTTP_405_METHOD_NOT_ALLOWED, {'Allow': 'GET, HEAD'})
+
+        from users.authentication import aauthenticate, aauthenticate_claims
+
+        with replica_reads():
+            try:
+                claims = getattr(request, 'verified_claims', None)
+                authenticated = await (aauthenticate(request) if claims is None else aauthenticate_claims(claims))
+            except exceptions.APIException as e:
+                # As DRF's exception handler: dict details (InvalidToken) are sent as they are
+                data = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+                return json_response(data, e.status_code, {'WWW-Authenticate': 'Bearer realm="api"'})
+            if authenticated is None:
+                return json_response({'detail': exceptions.NotAuthenticated.default_detail},
+                                     status.HTTP_401_UNAUTHORIZED, {'WWW-Authenticate': 'Bearer realm="api"'})
+            request.user, request.auth = authenticated
+
+            for throttle_class in APIView.throttle_classes:
+                throttle = throttle_class()
+                if isinstance(throttle, SimpleRateThrottle) and not await _allow(throttle, request):
+                    wait = throttle.wait()
+                    return json_response(
+                        {'detail': exceptions.Throttled(wait).detail},
+                        status.HTTP_429_TOO_MANY_REQUESTS,
+                        {'Retry-After': '%d' % math.ceil(wait)} if wait is not None else None,
+                    )
+
+            return await view(request, *args, **kwargs)
+    return wrapped
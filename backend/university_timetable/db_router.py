@@ -0,0 +1,114 @@
+"""
+Read-replica routing.
+
+Writes always go to the primary ('default'). Reads go to a replica only
+inside a replica_reads() block, which the read-heavy endpoints open with
+ReplicaReadMixin (viewset actions) or @replica_reads (function views).
+Everything else, including all admin traffic, keeps using the primary.
+
+Replicas lag behind the primary, so a replica read falls back to the primary:
+
+- for the rest of a request once that request has written anything
+  (read-your-writes);
+- for DATABASE_REPLICA_LAG seconds after any process wrote the model being
+  read. This is tracked with one key per model in Django's cache, so with a
+  per-process cache (LocMem) it only covers writes made by the same process.
+  Set CACHE_BACKEND to a shared cache in multi-process deployments.
+
+Only the model a query is built on is checked. A join to a related model
+that was written recently can still read slightly stale related rows.
+
+Each request uses one replica for all its reads, picked at random.
+DATABASE_REPLICAS lists the aliases; when it is empty, routing is a no-op.
+"""
+import functools
+import inspect
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = 'default'
+
+_state = ContextVar('replica_reads', default=None)
+
+
+def _pin_key(model):
+    return f'db:written:{model._meta.label_lower}'
+
+
+@contextmanager
+def replica_reads():
+    """Allow reads in this block (this request) to use a replica."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    state = {'replica': random.choice(replicas), 'wrote': False, 'pinned': {}} if replicas else None
+    token = _state.set(state)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def replica_reads_view(view):
+    """Decorator for function views (sync or async): run the whole view in replica_reads()."""
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def awrapped(*args, **kwargs):
+            with replica_reads():
+                return await view(*args, **kwargs)
+        return awrapped
+
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapped
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin: run the actions in `replica_actions` in replica_reads(),
+    including authentication. Actions are named as DRF's `self.action`:
+    the method name ('list', 'get_formatted_timetable'), not the URL path.
+    """
+    replica_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        # What initialize_request() will set as self.action, known before it runs
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if action not in self.replica_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state['wrote']:
+            return PRIMARY
+        label = model._meta.label_lower
+        if label not in state['pinned']:
+            state['pinned'][label] = cache.get(_pin_key(model)) is not None
+        return PRIMARY if state['pinned'][label] else state['replica']
+
+    def db_for_write(self, model, **hints):
+        lag = getattr(settings, 'DATABASE_REPLICA_LAG', 5)
+        if getattr(settings, 'DATABASE_REPLICAS', []) and lag:
+            cache.set(_pin_key(model), True, lag)
+        state = _state.get()
+        if state is not None:
+            state['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        pool = {PRIMARY, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
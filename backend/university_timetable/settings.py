@@ -74,6 +74,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'university_timetable.wsgi.application'
+ASGI_APPLICATION = 'university_timetable.asgi.application'
+
+# Async read endpoints (university_timetable/async_views.py)
+# True = serve /api/timetable/formatted/, /api/subjects/grouped/ and
+# /api/auth/me/ with async views. Enable when running under an ASGI server
+# (uvicorn/daphne university_timetable.asgi:application); keep False under WSGI.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
 
 # Database
 DATABASES = {
@@ -87,9 +94,26 @@ DATABASES = {
     }
 }
 
+# Read replicas (university_timetable/db_router.py)
+# DB_REPLICA_HOSTS=host1,host2 adds one alias per host (replica1, replica2, ...)
+# with the primary's name and credentials. Only the endpoints that opt in
+# (student timetable/subject/profile reads) use them; everything else and
+# every write goes to 'default'. Reads of a model fall back to the primary for
+# DATABASE_REPLICA_LAG seconds after it was written. To try it locally, point
+# 'default' and a 'replica1' alias at two SQLite files (copy the first to the
+# second) and set DATABASE_REPLICAS = ['replica1'].
+for _i, _host in enumerate(filter(None, (h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(','))), 1):
+    DATABASES[f'replica{_i}'] = {**DATABASES['default'], 'HOST': _host, 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_LAG = int(os.getenv('DB_REPLICA_LAG', '5'))  # Seconds
+DATABASE_ROUTERS = ['university_timetable.db_router.ReplicaRouter']
+
 # User Model
 AUTH_USER_MODEL = 'users.User'
 
+# Login checks passwords on the bounded hashing pool (users/login.py)
+AUTHENTICATION_BACKENDS = ['users.backends.LoginBackend']
+
 # Password validation
 # SECURITY: Enforce strong passwords
 AUTH_PASSWORD_VALIDATORS = [
@@ -125,7 +149,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -155,6 +179,37 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Blacklist checks through a per-process Bloom filter (users/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.CachedBlacklistTokenRefreshSerializer',
+}
+
+# Token blacklist front (users/tokens.py). Expired tokens are removed by
+# `manage.py purge_tokens`; run it from cron (e.g. hourly).
+TOKEN_BLACKLIST_SYNC_INTERVAL = 5       # Seconds between syncs with a shared cache (LocMem syncs on every check)
+TOKEN_BLACKLIST_REBUILD_AGE = 3600      # Seconds before the filter is rebuilt (drops purged tokens)
+TOKEN_BLACKLIST_BLOOM_CAPACITY = 100000 # Entries before the filter is rebuilt larger (~120 KB at 1% FP)
+TOKEN_BLACKLIST_LRU_SIZE = 10000        # Confirmed filter hits remembered
+
+# Stateless JWT reads (users/authentication.py)
+# GET/HEAD/OPTIONS requests build request.user from the token's role/profile
+# claims instead of loading the user. Claims are re-checked against the
+# database at most every JWT_CLAIMS_CACHE_TTL seconds per user and process,
+# which bounds how long a deactivated or changed account keeps its old claims
+# in other processes. False = always load the user (plain JWTAuthentication).
+JWT_CLAIMS_AUTH = True
+JWT_CLAIMS_CACHE_TTL = 30       # Seconds
+JWT_CLAIMS_CACHE_SIZE = 10000   # Users checked per process
+
+# Login hot path (users/login.py, users/throttling.py)
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', os.cpu_count() or 2))  # Password checks in parallel
+LOGIN_HASH_QUEUE = 64          # Checks allowed to wait for a worker before answering 429
+LOGIN_HASH_TIMEOUT = 10        # Seconds a check may wait before answering 429
+LOGIN_FLUSH_INTERVAL = 10      # Seconds last_login updates are buffered
+LOGIN_FLUSH_SIZE = 200         # ...or until this many logins are buffered
+# Token buckets: `burst` attempts at once, refilled at `rate` per second
+LOGIN_THROTTLE = {
+    'ip': {'burst': 100, 'rate': 100 / 3600},  # As strict as the anon limit: 100 attempts/hour per IP
+    'account': {'burst': 5, 'rate': 0.1},      # Per account + IP: one attempt per 10 s after 5
 }
 
 # CORS Configuration
@@ -177,3 +232,80 @@ if not DEBUG:
     SECURE_CONTENT_TYPE_NOSNIFF = True
     X_FRAME_OPTIONS = 'DENY'
 
+
+# Bulk Student Enrolment (POST /api/users/bulk_register/)
+BULK_REGISTRATION_MAX_ROWS = int(os.getenv('BULK_REGISTRATION_MAX_ROWS', '5000'))
+BULK_REGISTRATION_BATCH_SIZE = 500
+BULK_PASSWORD_HASH_WORKERS = int(os.getenv('BULK_PASSWORD_HASH_WORKERS', '0')) or os.cpu_count()
+
+# Cache
+# LocMem is per-process. Point CACHE_BACKEND/CACHE_LOCATION at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) in production so that
+# invalidations (SystemSettings, etc.) reach every worker immediately.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# SystemSettings cache (academics/settings_cache.py)
+SYSTEM_SETTINGS_CACHE_TTL = 5    # Seconds between shared version-stamp checks
+SYSTEM_SETTINGS_MAX_AGE = 60     # Seconds before an unconditional reload
+
+# Assessment deadline load per student group (academics/deadlines.py)
+# Creating or moving an assessment past a limit is flagged in the response
+# (and by /api/assessments/load_check/); it is not refused.
+ASSESSMENT_LOAD_LIMITS = {
+    'day': 2,        # Assessments due on one day
+    'week': 4,       # Assessments due in one ISO week
+    'exam_day': 1,   # Exams on one day
+}
+ASSESSMENT_LOAD_CACHE_TTL = 5    # Seconds between shared version-stamp checks
+ASSESSMENT_LOAD_MAX_AGE = 300    # Seconds before an unconditional rebuild
+
+# Timetable generator soft-constraint weights (timetable/soft_constraints.py)
+# Keys: subject_spread, lecturer_consecutive, student_gaps, preferred_times.
+# Set a weight to 0 to disable that constraint; per-run overrides can be sent
+# as {"weights": {...}} to POST /api/timetable/generate/.
+TIMETABLE_SOFT_WEIGHTS = {}
+
+# Timetable local search after the greedy pass (timetable/local_search.py)
+# None = off by default; 'annealing' or 'tabu' to always run it.
+# Per-run: {"local_search": "annealing", "time_budget": 10} on generate.
+TIMETABLE_LOCAL_SEARCH = None
+TIMETABLE_LOCAL_SEARCH_BUDGET = 5         # Seconds, when not given per run
+TIMETABLE_LOCAL_SEARCH_MAX_BUDGET = 60    # Upper bound accepted from requests
+
+# Exam timetabling, POST /api/timetable/schedule_exams/ (timetable/exam_generator.py)
+# (start, end) of the exam sessions held on every weekday of the exam period.
+EXAM_SESSIONS = [
+    ('09:00', '12:00'),
+    ('14:00', '17:00'),
+]
+
+# Timetable versions: generated drafts kept besides the published one
+TIMETABLE_VERSIONS_KEEP = 20
+
+# Order in which the solver places subjects (timetable/solver.py)
+# 'dsatur' = most constrained subject first, updated after every placement;
+# 'static' = by weekly hours only (the original behaviour).
+TIMETABLE_SUBJECT_ORDERING = 'dsatur'
+
+# Timetable solver worker processes (timetable/parallel.py)
+# 1 = solve in-process. Higher values split the problem into independent
+# components (no shared lecturer, student group or scarce room type) and
+# solve them in parallel; useful for multi-faculty universities.
+TIMETABLE_SOLVER_WORKERS = int(os.getenv('TIMETABLE_SOLVER_WORKERS', '1'))
+
+# Occupancy index for availability queries (timetable/occupancy_cache.py)
+TIMETABLE_OCCUPANCY_CACHE_TTL = 5     # Seconds between shared version-stamp checks
+TIMETABLE_OCCUPANCY_MAX_AGE = 300     # Seconds before an unconditional rebuild
+
+# Timetable event stream, GET /api/timetable/events/ (timetable/events.py)
+# Server-sent events for publish/unpublish and new versions; needs ASGI.
+# Each process polls the events table once per interval while streams are open.
+TIMETABLE_EVENTS_POLL_INTERVAL = 2   # Seconds
+TIMETABLE_EVENTS_KEEPALIVE = 15      # Seconds between keep-alive comments on idle streams
+TIMETABLE_EVENTS_RETENTION = 7       # Days events are kept for reconnecting browsers
+TIMETABLE_EVENTS_TICKET_TTL = 30     # Seconds a stream ticket (POST /api/timetable/events/ticket/) stays valid
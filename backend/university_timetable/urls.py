@@ -1,9 +1,24 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 from users.views import CustomTokenObtainPairView
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_READ_VIEWS:
+    # Async versions of the hot student reads, ahead of the DRF routes for the same URLs
+    from academics.async_views import grouped_subjects
+    from timetable.async_views import formatted_timetable
+    from users.async_views import current_user
+
+    urlpatterns += [
+        path('api/auth/me/', current_user, name='current_user_async'),
+        path('api/subjects/grouped/', grouped_subjects, name='subject-grouped-async'),
+        path('api/timetable/formatted/', formatted_timetable, name='timetable-formatted-async'),
+    ]
+
+urlpatterns += [
     path('admin/', admin.site.urls),
     # Custom login endpoint that returns tokens + user data
     path('api/auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -0,0 +1,29 @@
+"""
+Async version of GET /api/auth/me/ (see university_timetable/async_views.py).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+
+from university_timetable.async_views import async_read_view, json_response
+
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+
+def _serialize(user):
+    return UserSerializer(user).data
+
+
+@async_read_view
+async def current_user(request):
+    """
+    get_current_user on the async ORM: the user, profiles and (for
+    lecturers) subjects are loaded in one awaited fetch. The serializer runs
+    in a worker thread because a student's subject list is its own query.
+    """
+    queryset = User.objects.select_related('student_profile__course', 'lecturer_profile')
+    if request.user.role == 'lecturer':
+        queryset = queryset.prefetch_related('subjects')
+    user = await queryset.aget(pk=request.user.pk)
+    return json_response(await sync_to_async(_serialize)(user))
@@ -0,0 +1,228 @@
+"""
+Stateless JWT authentication for read requests.
+
+Login tokens carry the claims the views check on every request (role,
+staff flags and, for students, the profile id and course/year/semester; see
+CustomTokenObtainPairSerializer.get_token). For safe methods (GET, HEAD,
+OPTIONS) ClaimsJWTAuthentication rebuilds the user from those claims as a
+TokenUser, instead of loading the User and StudentProfile rows. Fields not
+in the claims (email, names, phone number, ...) are deferred: the first
+access loads them with one query, as for a .only() queryset.
+
+Claims can go stale (deactivated account, changed role or course), so each
+process re-checks a user's claims against the database at most once every
+JWT_CLAIMS_CACHE_TTL seconds (one query), and immediately after the user or
+profile is saved in the same process (users/signals.py). When the claims
+no longer match, the request falls back to the normal database-backed user.
+Inactive users are rejected either way.
+
+Writes, and tokens issued before the claims existed, always use the
+database-backed user.
+
+aauthenticate() is the same check for the async read views
+(university_timetable/async_views.py), with the claims query on the async ORM;
+aauthenticate_claims() loads the user for claims the server signed itself
+(event stream tickets, timetable/events.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User, StudentProfile, TokenUser
+
+# Claims added to login tokens, in the order they are compared
+CLAIMS = ('role', 'staff', 'superuser', 'profile', 'course', 'year', 'semester')
+
+_lock = threading.Lock()
+_checked = OrderedDict()  # user id -> (claims tuple or None if inactive/missing, checked_at)
+
+
+def token_claims(user):
+    """Claims describing `user`, for CustomTokenObtainPairSerializer.get_token()."""
+    claims = {'role': user.role, 'staff': user.is_staff, 'superuser': user.is_superuser}
+    profile = getattr(user, 'student_profile', None) if user.role == 'student' else None
+    if profile is not None:
+        claims.update(profile=profile.pk, course=profile.course_id, year=profile.year, semester=profile.semester)
+    return claims
+
+
+def _claims_query(user_id):
+    return User.objects.filter(pk=user_id).values_list(
+        'is_active', 'role', 'is_staff', 'is_superuser',
+        'student_profile__id', 'student_profile__course_id', 'student_profile__year', 'student_profile__semester',
+    )
+
+
+def _claims_from_row(row):
+    if row is None or not row[0]:
+        return None
+    role, staff, superuser, profile, course, year, semester = row[1:]
+    if role != 'student':
+        profile = course = year = semester = None
+    return role, staff, superuser, profile, course, year, semester
+
+
+def _current_claims(user_id):
+    """The user's claims as stored now (one query), or None if inactive or gone."""
+    return _claims_from_row(_claims_query(user_id).first())
+
+
+def _fresh_entry(user_id):
+    entry = _checked.get(user_id)
+    if entry is not None and time.monotonic() - entry[1] < getattr(settings, 'JWT_CLAIMS_CACHE_TTL', 30):
+        return entry
+    return None
+
+
+def _remember(user_id, claims):
+    with _lock:
+        _checked.pop(user_id, None)
+        _checked[user_id] = (claims, time.monotonic())
+        while len(_checked) > getattr(settings, 'JWT_CLAIMS_CACHE_SIZE', 10000):
+            _checked.popitem(last=False)
+    return claims
+
+
+def checked_claims(user_id):
+    """Current claims for a user, re-read from the database when the local copy is older than the TTL."""
+    entry = _fresh_entry(user_id)
+    if entry is not None:
+        return entry[0]
+    return _remember(user_id, _current_claims(user_id))
+
+
+async def achecked_claims(user_id):
+    """checked_claims() with the query on the async ORM."""
+    entry = _fresh_entry(user_id)
+    if entry is not None:
+        return entry[0]
+    return _remember(user_id, _claims_from_row(await _claims_query(user_id).afirst()))
+
+
+def forget_user(user_id):
+    """Drop a user's checked claims so the next request re-reads them."""
+    with _lock:
+        _checked.pop(user_id, None)
+
+
+def _partial(model, **values):
+    """A `model` instance with only `values` loaded; the other fields load on first access."""
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(None, names, [values[name] for name in names])
+
+
+def user_from_claims(user_id, claims):
+    role, staff, superuser, profile_id, course, year, semester = claims
+    user = _partial(TokenUser, id=user_id, role=role, is_staff=staff, is_superuser=superuser, is_active=True)
+    profile = None
+    if profile_id is not None:
+        profile = _partial(StudentProfile, id=profile_id, user_id=user_id, course_id=course,
+                           year=year, semester=semester)
+        profile._state.fields_cache['user'] = user
+    # Pre-fill the reverse one-to-one caches so hasattr(user, 'student_profile') doesn't query
+    user._state.fields_cache['student_profile'] = profile
+    if role != 'lecturer':
+        user._state.fields_cache['lecturer_profile'] = None
+    return user
+
+
+def load_user(user):
+    """The database-backed User for request.user (a no-op unless it's a TokenUser)."""
+    if isinstance(user, TokenUser):
+        return User.objects.get(pk=user.pk)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves safe requests from token claims (see module docstring).
+    """
+
+    def authenticate(self, request):
+        self._safe = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def _claims_user_id(self, validated_token):
+        """The token's user id when its claims may be used, else None."""
+        if (not getattr(settings, 'JWT_CLAIMS_AUTH', False) or not getattr(self, '_safe', False)
+                or api_settings.CHECK_REVOKE_TOKEN or 'role' not in validated_token):
+            return None
+        try:
+            # Tokens carry the id as a string
+            return User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            return None
+
+    def get_user(self, validated_token):
+        user_id = self._claims_user_id(validated_token)
+        if user_id is None:
+            return super().get_user(validated_token)
+        current = checked_claims(user_id)
+        if current is None or current != tuple(validated_token.get(claim) for claim in CLAIMS):
+            # Gone, inactive (super() raises) or claims out of date
+            return super().get_user(validated_token)
+        return user_from_claims(user_id, current)
+
+    async def aget_user(self, validated_token):
+        user_id = self._claims_user_id(validated_token)
+        if user_id is not None:
+            current = await achecked_claims(user_id)
+            if current is not None and current == tuple(validated_token.get(claim) for claim in CLAIMS):
+                return user_from_claims(user_id, current)
+        return await self._aload_user(validated_token)
+
+    async def _aload_user(self, validated_token):
+        """JWTAuthentication.get_user() on the async ORM, with the profiles loaded (no lazy queries later)."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        try:
+            user = await User.objects.select_related('student_profile', 'lecturer_profile').aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+async def aauthenticate(request):
+    """
+    ClaimsJWTAuthentication for async views (a plain HttpRequest).
+    Returns (user, token), or None without a bearer token; raises
+    AuthenticationFailed/InvalidToken like the DRF class.
+    """
+    auth = ClaimsJWTAuthentication()
+    auth._safe = request.method in SAFE_METHODS
+    header = auth.get_header(request)
+    if header is None:
+        return None
+    raw_token = auth.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = auth.get_validated_token(raw_token)
+    return await auth.aget_user(validated_token), validated_token
+
+
+async def aauthenticate_claims(claims):
+    """
+    (user, claims) for token claims vouched for by the server rather than
+    a bearer token, e.g. a signed stream ticket. The user is loaded and
+    checked as for a token; raises AuthenticationFailed/InvalidToken.
+    """
+    return await ClaimsJWTAuthentication()._aload_user(claims), claims
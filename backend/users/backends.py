@@ -0,0 +1,39 @@
+"""
+Authentication backend for the login endpoint.
+
+Same rules as ModelBackend (lookup by USERNAME_FIELD, is_active through
+user_can_authenticate, a hash even for unknown users so timing doesn't
+reveal them), but the user is loaded with its profiles in one query and the
+password is checked on the bounded hashing pool (users/login.py). Logins
+still go through django.contrib.auth.authenticate(), so every entry of
+AUTHENTICATION_BACKENDS is tried and user_login_failed is sent on failure.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .login import check_login_password
+
+
+class LoginBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = User._default_manager.select_related('student_profile__course', 'lecturer_profile').filter(
+            **{User.USERNAME_FIELD: username.strip().lower()}
+        ).first()
+
+        is_correct, must_update = check_login_password(password, user.password if user else None)
+        if not is_correct:
+            return None
+        if must_update:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        if not self.user_can_authenticate(user):
+            # Right password, disabled account: the login view says so instead of "invalid"
+            if request is not None:
+                request.login_inactive = True
+            return None
+        return user
@@ -0,0 +1,144 @@
+"""
+Bulk student enrolment (intake week).
+
+Registering students one by one through UserViewSet costs a password hash,
+a user INSERT, a signal-driven profile INSERT and a profile re-fetch/UPDATE
+per student. This module validates a whole batch up front, hashes the
+passwords in a worker pool and writes users and profiles with two bulk
+INSERTs. bulk_create() does not send post_save, so the StudentProfile
+signal in users/signals.py is skipped and profiles are created here directly.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import StudentProfile
+from .serializers import BulkStudentRowSerializer
+
+User = get_user_model()
+
+
+def hash_passwords(passwords):
+    """
+    Hash a list of raw passwords in parallel, preserving order.
+
+    PBKDF2 runs inside hashlib with the GIL released, so a thread pool
+    scales across cores without pickling anything to worker processes.
+    """
+    workers = getattr(settings, 'BULK_PASSWORD_HASH_WORKERS', None) or os.cpu_count() or 1
+    if len(passwords) <= 1 or workers <= 1:
+        return [make_password(p) for p in passwords]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def bulk_register_students(rows):
+    """
+    Validate and create a batch of student accounts with their profiles.
+
+    Returns a dict with 'created', 'failed' and per-row 'results'
+    (in input order). Invalid rows are reported and skipped; valid rows are
+    inserted together inside one transaction.
+    """
+    from academics.models import Course
+
+    results = [None] * len(rows)
+    valid = []  # (index, validated_data)
+
+    # 1. Per-row field validation (no database access)
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[index] = {'row': index, 'status': 'error', 'errors': {'non_field_errors': ['Row must be an object.']}}
+            continue
+
+        data = dict(row)
+        data['role'] = 'student'  # validate_email() reads the role from initial data
+        if not data.get('username') and data.get('email'):
+            data['username'] = str(data['email']).split('@')[0]
+
+        serializer = BulkStudentRowSerializer(data=data)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'row': index, 'email': row.get('email'), 'status': 'error', 'errors': serializer.errors}
+
+    # 2. Batch-level checks: one query each for existing emails, usernames and courses
+    emails = [data['email'] for _, data in valid]
+    usernames = [data['username'] for _, data in valid]
+    course_ids = {data['course'] for _, data in valid if data.get('course')}
+
+    taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    known_courses = set(Course.objects.filter(id__in=course_ids).values_list('id', flat=True))
+
+    seen_emails = set()
+    seen_usernames = set()
+    accepted = []
+    for index, data in valid:
+        errors = {}
+        if data['email'] in taken_emails:
+            errors['email'] = ['User with this email already exists.']
+        elif data['email'] in seen_emails:
+            errors['email'] = ['Duplicate email in this batch.']
+        if data['username'] in taken_usernames:
+            errors['username'] = ['A user with that username already exists.']
+        elif data['username'] in seen_usernames:
+            errors['username'] = ['Duplicate username in this batch.']
+        if data.get('course') and data['course'] not in known_courses:
+            errors['course'] = [f"Course {data['course']} does not exist."]
+
+        if errors:
+            results[index] = {'row': index, 'email': data['email'], 'status': 'error', 'errors': errors}
+            continue
+
+        seen_emails.add(data['email'])
+        seen_usernames.add(data['username'])
+        accepted.append((index, data))
+
+    # 3. Hash passwords in parallel, then bulk insert users and profiles
+    hashed = hash_passwords([data['password'] for _, data in accepted])
+    batch_size = getattr(settings, 'BULK_REGISTRATION_BATCH_SIZE', 500)
+
+    users = [
+        User(
+            username=data['username'],
+            email=data['email'],
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            role='student',
+            password=password,
+        )
+        for (_, data), password in zip(accepted, hashed)
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+
+        # MySQL cannot return primary keys from a bulk INSERT, so resolve them by email
+        if any(user.pk is None for user in users):
+            ids = dict(User.objects.filter(email__in=[u.email for u in users]).values_list('email', 'id'))
+            for user in users:
+                user.pk = ids[user.email]
+
+        StudentProfile.objects.bulk_create([
+            StudentProfile(
+                user_id=user.pk,
+                course_id=data.get('course'),
+                year=data.get('year', 1),
+                semester=data.get('semester', 1),
+            )
+            for (_, data), user in zip(accepted, users)
+        ], batch_size=batch_size)
+
+    for (index, data), user in zip(accepted, users):
+        results[index] = {'row': index, 'email': data['email'], 'status': 'created', 'id': user.pk}
+
+    return {
+        'created': len(accepted),
+        'failed': len(rows) - len(accepted),
+        'results': results,
+    }
@@ -0,0 +1,101 @@
+"""
+Login hot path helpers (used by CustomTokenObtainPairSerializer).
+
+- check_login_password(): the PBKDF2 check runs in a bounded thread pool
+  (hashlib releases the GIL while hashing, so LOGIN_HASH_WORKERS threads
+  use that many cores). At most LOGIN_HASH_QUEUE checks may wait for a
+  worker; beyond that the login is refused with 429 instead of piling up
+  requests behind the CPU.
+- record_login(): last_login updates are buffered per process and written
+  with one bulk UPDATE at most LOGIN_FLUSH_INTERVAL seconds after the
+  first buffered login (or as soon as LOGIN_FLUSH_SIZE are buffered),
+  instead of one UPDATE per login. A crash loses at most one interval of
+  last_login values.
+"""
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, verify_password
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+_pool_lock = threading.Lock()
+_pool = {'executor': None, 'slots': None}
+
+_flush_lock = threading.Lock()
+_pending = {}  # user id -> last login datetime
+
+
+def _executor():
+    with _pool_lock:
+        if _pool['executor'] is None:
+            workers = getattr(settings, 'LOGIN_HASH_WORKERS', 2)
+            _pool['executor'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+            _pool['slots'] = threading.BoundedSemaphore(workers + getattr(settings, 'LOGIN_HASH_QUEUE', 64))
+        return _pool['executor'], _pool['slots']
+
+
+def check_login_password(password, encoded):
+    """
+    verify_password() on the login pool. Returns (is_correct, must_update);
+    raises Throttled when the pool's queue is full or the check times out.
+    """
+    executor, slots = _executor()
+    if not slots.acquire(blocking=False):
+        raise Throttled(wait=1, detail='Too many logins in progress. Please try again in a moment.')
+    try:
+        # An unusable password still costs one hash (unknown users look like wrong passwords)
+        future = executor.submit(verify_password, password, encoded or UNUSABLE_PASSWORD_PREFIX)
+        return future.result(timeout=getattr(settings, 'LOGIN_HASH_TIMEOUT', 10))
+    except FutureTimeout:
+        raise Throttled(wait=1, detail='Too many logins in progress. Please try again in a moment.')
+    finally:
+        slots.release()
+
+
+def record_login(user):
+    """Note a successful login; last_login is written by the next flush."""
+    now = timezone.now()
+    user.last_login = now
+    with _flush_lock:
+        first = not _pending
+        _pending[user.pk] = now
+        due = len(_pending) >= getattr(settings, 'LOGIN_FLUSH_SIZE', 200)
+    if due:
+        flush_logins()
+    elif first:
+        timer = threading.Timer(getattr(settings, 'LOGIN_FLUSH_INTERVAL', 10), _timed_flush)
+        timer.daemon = True
+        timer.start()
+
+
+def _timed_flush():
+    from django.db import connections
+
+    try:
+        flush_logins()
+    finally:
+        connections.close_all()  # this timer thread's connections only
+
+
+def flush_logins():
+    """Write buffered last_login values in one query. Returns the number of users updated."""
+    from .models import User
+
+    with _flush_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return 0
+    User.objects.bulk_update([User(pk=pk, last_login=when) for pk, when in pending.items()], ['last_login'])
+    return len(pending)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush_logins()
+    except Exception:
+        pass
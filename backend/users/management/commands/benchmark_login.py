@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from users.login import flush_logins
+from users.views import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+BENCH_EMAIL = 'login-benchmark@loadtest.local'
+BENCH_PASSWORD = 'Benchmark@123'
+
+
+class Command(BaseCommand):
+    help = 'Measure logins per second (and per core) through the login serializer, with DB queries per login'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Logins to run (default: 200)')
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1,
+                            help='Concurrent request threads (default: CPU count)')
+        parser.add_argument('--baseline', action='store_true',
+                            help="Also run simplejwt's stock TokenObtainPairSerializer for comparison")
+
+    def handle(self, *args, **options):
+        if options['logins'] < 1 or options['threads'] < 1:
+            raise CommandError('--logins and --threads must be at least 1')
+
+        user = User.objects.filter(email=BENCH_EMAIL).first()
+        if user is None:
+            user = User.objects.create_user(username='login-benchmark', email=BENCH_EMAIL, password=BENCH_PASSWORD,
+                                            role='student', first_name='Login', last_name='Benchmark')
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+        self.stdout.write(f"{options['logins']} logins, {options['threads']} threads, {cores} cores")
+
+        runs = [('login', CustomTokenObtainPairSerializer)]
+        if options['baseline']:
+            runs.append(('stock', TokenObtainPairSerializer))
+        try:
+            for name, serializer_class in runs:
+                rate, queries = self._run(serializer_class, options['logins'], options['threads'])
+                self.stdout.write(
+                    f"{name:<6} {rate:8.1f} logins/s  {rate / cores:8.1f} per core  {queries:5.1f} queries/login"
+                )
+        finally:
+            flush_logins()
+            user.delete()
+
+    def _run(self, serializer_class, logins, threads):
+        """Returns (logins per second, DB queries per login)."""
+        lock = threading.Lock()
+        remaining = [logins]
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            with lock:
+                queries[0] += 1
+            return execute(sql, params, many, context)
+
+        def worker():
+            from django.db import connections
+
+            try:
+                with connection.execute_wrapper(count):
+                    while True:
+                        with lock:
+                            if not remaining[0]:
+                                break
+                            remaining[0] -= 1
+                        serializer = serializer_class(data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+                        if not serializer.is_valid():
+                            raise CommandError(f'Login failed: {serializer.errors}')
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        with connection.execute_wrapper(count):
+            flush_logins()  # the batched last_login write belongs to these logins
+        elapsed = time.perf_counter() - started
+        return logins / elapsed, queries[0] / logins
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = ('Delete expired outstanding/blacklisted JWTs in small chunks. '
+            'Schedule it, e.g. hourly from cron: 0 * * * * python manage.py purge_tokens')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Tokens deleted per transaction (default: 1000)')
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Seconds to sleep between chunks, to leave room for live traffic (default: 0.1)')
+        parser.add_argument('--grace', type=int, default=0,
+                            help='Only purge tokens expired more than this many seconds ago (default: 0)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        cutoff = timezone.now() - timezone.timedelta(seconds=options['grace'])
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff)
+        if options['dry_run']:
+            blacklisted = BlacklistedToken.objects.filter(token__expires_at__lte=cutoff).count()
+            self.stdout.write(f"{expired.count()} expired tokens ({blacklisted} blacklisted) would be deleted")
+            return
+
+        tokens = blacklisted = chunks = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+            # Blacklist rows first, so the token delete has nothing left to cascade
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            tokens += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            chunks += 1
+            if len(ids) < options['chunk_size']:
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {tokens} expired tokens ({blacklisted} blacklisted) in {chunks} chunks"
+        ))
@@ -40,3 +40,29 @@ class StudentProfile(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - Year {self.year}"
+
+
+class TokenUser(User):
+    """
+    A User rebuilt from signed JWT claims by users.authentication, without a
+    database read. Only id, role, staff flags and the student profile's id
+    and course/year/semester come from the token; every other field (email,
+    username, names, ...) is deferred and loaded on first access. It must
+    never be saved.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # The first deferred field read loads all of them in one query, not one query per field
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        return super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+    def save(self, *args, **kwargs):
+        raise TypeError('TokenUser is built from token claims and cannot be saved')
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('TokenUser is built from token claims and cannot be deleted')
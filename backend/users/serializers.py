@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import LecturerProfile, StudentProfile
 import re
 
@@ -102,6 +103,34 @@ class UserSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
+class BulkStudentRowSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk student enrolment.
+    Email/username uniqueness is checked once per batch in users/bulk.py
+    instead of one query per row, so the unique validators are dropped here.
+    """
+    first_name = serializers.CharField(required=True, max_length=150)
+    last_name = serializers.CharField(required=True, max_length=150)
+    course = serializers.IntegerField(required=False, allow_null=True)
+    year = serializers.IntegerField(required=False, default=1, min_value=1, max_value=4)
+    semester = serializers.IntegerField(required=False, default=1, min_value=1, max_value=2)
+
+    class Meta:
+        model = User
+        fields = ['username', 'email', 'password', 'first_name', 'last_name', 'course', 'year', 'semester']
+        extra_kwargs = {
+            'password': {'write_only': True},
+            'email': {'validators': []},
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
+
+    # Same field rules as public registration
+    validate_email = UserSerializer.validate_email
+    validate_password = UserSerializer.validate_password
+    validate_username = UserSerializer.validate_username
+    validate_first_name = UserSerializer.validate_first_name
+    validate_last_name = UserSerializer.validate_last_name
+
 class BasicUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from .authentication import forget_user
 from .models import StudentProfile
 
 User = get_user_model()
@@ -9,3 +10,14 @@ User = get_user_model()
 def create_user_profile(sender, instance, created, **kwargs):
     if created and instance.role == 'student':
         StudentProfile.objects.create(user=instance)
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_user_claims(sender, instance, **kwargs):
+    """Re-check token claims (users/authentication.py) on this user's next request."""
+    forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def forget_profile_claims(sender, instance, **kwargs):
+    forget_user(instance.user_id)
@@ -1,3 +1,189 @@
-from django.test import TestCase
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from academics.models import Course
+from .authentication import ClaimsJWTAuthentication, forget_user, token_claims
+from .models import StudentProfile, TokenUser, User
+from .tokens import BloomFilter, CachedBlacklistRefreshToken, is_blacklisted
+
+
+@override_settings(JWT_CLAIMS_AUTH=True)
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Computing', code='CS')
+        self.student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                                role='student', first_name='Sam')
+        StudentProfile.objects.filter(user=self.student).update(course=self.course, year=2, semester=1,
+                                                                phone_number='0771234567')
+        self.student = User.objects.select_related('student_profile').get(pk=self.student.pk)
+        forget_user(self.student.pk)
+
+    def authenticate(self, user):
+        token = AccessToken.for_user(user)
+        for claim, value in token_claims(user).items():
+            token[claim] = value
+        auth = ClaimsJWTAuthentication()
+        auth._safe = True
+        return auth.get_user(auth.get_validated_token(str(token).encode()))
+
+    def test_claims_user_loads_other_fields_lazily(self):
+        with self.assertNumQueries(1):  # the claims check
+            user = self.authenticate(self.student)
+            self.assertIsInstance(user, TokenUser)
+            profile = user.student_profile
+            self.assertEqual((profile.pk, profile.course_id, profile.year), (self.student.student_profile.pk,
+                                                                             self.course.pk, 2))
+        with self.assertNumQueries(1):  # every deferred user field in one query
+            self.assertEqual((user.email, user.username, user.first_name), ('stu@example.com', 'stu', 'Sam'))
+        with self.assertNumQueries(1):
+            self.assertEqual(profile.phone_number, '0771234567')
+
+    def test_changed_claims_fall_back_to_the_database_user(self):
+        StudentProfile.objects.filter(user=self.student).update(year=3)
+        forget_user(self.student.pk)
+        user = self.authenticate(self.student)
+        self.assertNotIsInstance(user, TokenUser)
+        self.assertEqual(user.student_profile.year, 3)
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        self.assertEqual(bloom.count, 1000)
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)  # target 1%
+
+    def test_adding_twice_counts_once(self):
+        bloom = BloomFilter(10)
+        bloom.add('a')
+        bloom.add('a')
+        self.assertEqual(bloom.count, 1)
+
+
+class CachedBlacklistTests(TestCase):
+    def test_blacklisted_refresh_token_is_rejected(self):
+        user = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                        role='lecturer')
+        token = CachedBlacklistRefreshToken.for_user(user)
+        token.check_blacklist()
+        token.blacklist()
+        self.assertTrue(is_blacklisted(token['jti']))
+        with self.assertRaises(TokenError):
+            CachedBlacklistRefreshToken(str(token))
+        other = CachedBlacklistRefreshToken.for_user(user)
+        self.assertFalse(is_blacklisted(other['jti']))
+
+    def test_entry_from_another_process_is_seen_without_the_stamp(self):
+        user = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                        role='lecturer')
+        token = CachedBlacklistRefreshToken.for_user(user)
+        self.assertFalse(is_blacklisted(token['jti']))
+        # Written by another worker: the stamp in this process's LocMem cache never changes
+        outstanding = OutstandingToken.objects.get(jti=token['jti'])
+        BlacklistedToken.objects.create(token=outstanding)
+        self.assertTrue(is_blacklisted(token['jti']))
+
+
+@override_settings(LOGIN_THROTTLE={'ip': {'burst': 100, 'rate': 0.01}, 'account': {'burst': 5, 'rate': 0.01}})
+class LoginTests(APITestCase):
+    url = '/api/auth/login/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='lec', email='lec@example.com', password='Pw@12345x',
+                                             role='lecturer')
+
+    def login(self, password='Pw@12345x', ip='10.0.0.1', email='LEC@example.com '):
+        return self.client.post(self.url, {'email': email, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_login_returns_tokens_and_user(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertEqual(response.data['user']['email'], 'lec@example.com')
+
+    def test_wrong_password_goes_through_authenticate(self):
+        failed = []
+
+        def on_failure(sender, credentials, request=None, **kwargs):
+            failed.append(credentials)
+        user_login_failed.connect(on_failure)
+        self.addCleanup(user_login_failed.disconnect, on_failure)
+
+        response = self.login(password='wrong-password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid email or password', str(response.data))
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0]['email'], 'lec@example.com')
+
+    def test_inactive_account_is_refused(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIn('inactive', str(self.login().data))
+        # Without the right password an inactive account looks like any other failure
+        self.assertIn('Invalid email or password', str(self.login(password='wrong-password').data))
+
+    def test_account_bucket_is_per_ip(self):
+        for _ in range(5):
+            self.assertEqual(self.login(password='wrong-password').status_code, 400)
+        self.assertEqual(self.login().status_code, 429)
+        # Guessing from one address doesn't lock the owner out elsewhere
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 200)
+
+    @override_settings(LOGIN_THROTTLE={'ip': {'burst': 3, 'rate': 0.01}, 'account': {'burst': 5, 'rate': 0.01}})
+    def test_ip_ceiling_covers_every_account(self):
+        for i in range(3):
+            self.assertEqual(self.login(password='wrong-password', email=f'u{i}@example.com').status_code, 400)
+        self.assertEqual(self.login().status_code, 429)
+
+
+class BulkRegistrationTests(APITestCase):
+    url = '/api/users/bulk_register/'
+
+    def setUp(self):
+        self.course = Course.objects.create(name='Computing', code='CS')
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='Pw@12345x',
+                                              role='admin', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def row(self, name, **extra):
+        return {'email': f'{name}@std.uwu.ac.lk', 'password': 'Pw@12345x', 'first_name': 'Sam',
+                'last_name': 'Perera', 'course': self.course.pk, 'year': 2, **extra}
+
+    def test_valid_rows_are_created_with_profiles(self):
+        response = self.client.post(self.url, {'students': [
+            self.row('abc12345'), self.row('abc12346', semester=2),
+            self.row('abc12345'),               # duplicate in the batch
+            self.row('abc12347', course=9999),  # unknown course
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 2))
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'created', 'error', 'error'])
+        self.assertIn('course', response.data['results'][3]['errors'])
+
+        profile = StudentProfile.objects.select_related('user').get(user__email='abc12346@std.uwu.ac.lk')
+        self.assertEqual((profile.course_id, profile.year, profile.semester), (self.course.pk, 2, 2))
+        self.assertEqual(profile.user.role, 'student')
+        self.assertTrue(profile.user.check_password('Pw@12345x'))
+
+    def test_batch_without_valid_rows_is_rejected(self):
+        self.assertEqual(self.client.post(self.url, {'students': []}, format='json').status_code, 400)
+        response = self.client.post(self.url, {'students': [self.row('abc12345', password='weak')]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertFalse(User.objects.filter(email='abc12345@std.uwu.ac.lk').exists())
+
+    def test_admins_only(self):
+        student = User.objects.create_user(username='stu', email='stu@example.com', password='Pw@12345x',
+                                           role='student')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.post(self.url, {'students': [self.row('abc12345')]}, format='json').status_code,
+                         403)
 
-# Create your tests here.
@@ -0,0 +1,70 @@
+"""
+Token-bucket throttles for the login endpoint.
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens per
+second; each login attempt takes one.
+
+- LoginIPThrottle: every attempt from one client IP, with a ceiling as
+  strict as the generic anon limit, so password guessing from one address
+  stays at about 100 attempts an hour.
+- LoginAccountThrottle: attempts on one account from one IP. Guessing one
+  account is slowed to the refill rate, but someone spamming a victim's
+  email only drains their own bucket: the victim can still log in from
+  anywhere else.
+
+Buckets live in Django's cache (shared when CACHE_BACKEND is). Updates are
+read-modify-write, so concurrent attempts can overdraw a bucket slightly;
+that's acceptable for a rate limit.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None  # LOGIN_THROTTLE key: {'burst': n, 'rate': tokens per second}
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = getattr(settings, 'LOGIN_THROTTLE', {}).get(self.scope)
+        ident = self.get_ident_key(request)
+        if not config or ident is None:
+            return True
+
+        key = f'throttle:login:{self.scope}:{ident}'
+        burst, rate = config['burst'], config['rate']
+        now = time.time()
+        tokens, updated = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self._wait = (1 - tokens) / rate
+            return False
+        # Kept until a full bucket would have refilled anyway
+        cache.set(key, (tokens - 1, now), int(burst / rate) + 1)
+        return True
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    scope = 'account'
+
+    def get_ident_key(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed: cache keys must not contain arbitrary user input
+        return hashlib.sha256(f"{email.strip().lower()}|{self.get_ident(request)}".encode()).hexdigest()
@@ -0,0 +1,182 @@
+"""
+Refresh tokens with a cached blacklist check.
+
+Every refresh (ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION) and every
+logout adds a blacklisted token, and simplejwt checks the blacklist with a
+JOIN query on each refresh. CachedBlacklistRefreshToken answers that check
+from a per-process Bloom filter of blacklisted JTIs instead:
+
+- "not in the filter" means not blacklisted: no query;
+- "maybe" (a real hit or a ~1% false positive) is confirmed with the usual
+  query, and the answer is kept in a bounded LRU.
+
+The filter is loaded once per process (unexpired blacklisted tokens) and
+then kept current by reading only the rows added since the last sync (the
+last SYNC_OVERLAP ids and newer), so the cost doesn't grow with the table.
+With a shared cache (Redis, Memcached, the database cache) a sync runs
+when the stamp in the cache changes (bumped on every blacklist write) and
+at least every TOKEN_BLACKLIST_SYNC_INTERVAL seconds. A process-local cache
+(LocMem, Dummy) can't carry the stamp to other workers, so there every
+check syncs first: a filter miss is only trusted after reading the rows
+added since the last sync, a primary key range that is almost always
+empty. The filter is rebuilt when it fills up and every
+TOKEN_BLACKLIST_REBUILD_AGE seconds, which drops purged tokens.
+
+The tables themselves are kept small by `manage.py purge_tokens`.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+VERSION_KEY = 'users:token_blacklist:version'
+
+# Target false-positive rate of the filter
+BLOOM_ERROR_RATE = 0.01
+
+# Rows re-read below the last seen id on each sync: ids of concurrent
+# transactions can commit out of order
+SYNC_OVERLAP = 50
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        if key in self:
+            return
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+_lock = threading.Lock()
+_state = {
+    'filter': None,
+    'last_id': 0,
+    'version': None,
+    'synced_at': 0.0,
+    'built_at': 0.0,
+}
+_answers = OrderedDict()  # jti -> blacklisted? (confirmed by query)
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _shared_cache():
+    """Whether the version stamp reaches other processes."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _rebuild(version, now):
+    rows = list(BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                .values_list('id', 'token__jti'))
+    capacity = max(getattr(settings, 'TOKEN_BLACKLIST_BLOOM_CAPACITY', 100000), 2 * len(rows))
+    bloom = BloomFilter(capacity)
+    for _, jti in rows:
+        bloom.add(jti)
+    last_id = BlacklistedToken.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    _state.update(filter=bloom, last_id=last_id, version=version, synced_at=now, built_at=now)
+    _answers.clear()
+
+
+def _sync():
+    """Bring this process's filter up to date when it may be stale."""
+    now = time.monotonic()
+    version = _current_version()
+    if (_state['filter'] is not None and version == _state['version'] and _shared_cache()
+            and now - _state['synced_at'] < getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 5)):
+        return
+
+    with _lock:
+        bloom = _state['filter']
+        if (bloom is None or bloom.count >= bloom.capacity
+                or now - _state['built_at'] >= getattr(settings, 'TOKEN_BLACKLIST_REBUILD_AGE', 3600)):
+            _rebuild(version, now)
+            return
+        for row_id, jti in (BlacklistedToken.objects.filter(id__gt=_state['last_id'] - SYNC_OVERLAP)
+                            .order_by('id').values_list('id', 'token__jti')):
+            bloom.add(jti)
+            _answers.pop(jti, None)
+            _state['last_id'] = max(_state['last_id'], row_id)
+        _state.update(version=version, synced_at=now)
+
+
+def is_blacklisted(jti):
+    _sync()
+    if jti not in _state['filter']:
+        return False
+    answer = _answers.get(jti)
+    if answer is None:
+        answer = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        with _lock:
+            _answers[jti] = answer
+            while len(_answers) > getattr(settings, 'TOKEN_BLACKLIST_LRU_SIZE', 10000):
+                _answers.popitem(last=False)
+    else:
+        with _lock:
+            if jti in _answers:
+                _answers.move_to_end(jti)
+    return answer
+
+
+def blacklist_changed(jti=None):
+    """Record a new blacklist entry locally and tell other processes to sync."""
+    with _lock:
+        if jti is not None and _state['filter'] is not None:
+            _state['filter'].add(jti)
+            _answers[jti] = True
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check goes through the per-process filter."""
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_changed(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+class CachedBlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    """SIMPLE_JWT['TOKEN_REFRESH_SERIALIZER']: refresh/rotation with the cached blacklist check."""
+    token_class = CachedBlacklistRefreshToken
@@ -1,12 +1,20 @@
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
-from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.db import IntegrityError
 from .models import LecturerProfile, StudentProfile
 from .serializers import UserSerializer, LecturerProfileSerializer, StudentProfileSerializer
 from django.core.mail import send_mail
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from university_timetable.db_router import ReplicaReadMixin, replica_reads_view
+from .authentication import load_user, token_claims
+from .login import record_login
+from .throttling import LoginIPThrottle, LoginAccountThrottle
+from .tokens import CachedBlacklistRefreshToken
 
 User = get_user_model()
 
@@ -16,48 +24,61 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     Custom JWT serializer that includes user data in login response
     SECURITY: This prevents frontend from decoding JWT
     """
+    token_class = CachedBlacklistRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        # Role/profile claims let read requests skip the user lookup (users/authentication.py)
+        token = super().get_token(user)
+        for claim, value in token_claims(user).items():
+            token[claim] = value
+        return token
     
     def validate(self, attrs):
+        """
+        Single-fetch login through authenticate(): users.backends.LoginBackend
+        loads the user and profiles with one query and checks the password on
+        the bounded hashing pool; last_login is written in batches
+        (users/login.py).
+        """
         # Sanitize email input (User model uses email as USERNAME_FIELD)
-        if 'email' in attrs:
-            attrs['email'] = attrs['email'].strip().lower()
-        
-        # Validate credentials
-        # Check active status first
-        email = attrs.get(User.USERNAME_FIELD) or attrs.get('email')
-        if email:
-            user = User.objects.filter(email=email).first()
-            if user and not user.is_active:
+        email = attrs.get(User.USERNAME_FIELD, '').strip().lower()
+        request = self.context.get('request')
+
+        user = authenticate(request, **{User.USERNAME_FIELD: email, 'password': attrs.get('password')})
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            if getattr(request, 'login_inactive', False):
                 raise serializers.ValidationError(
                     'Your account is inactive. Please contact the admin branch.'
                 )
-
-        try:
-            data = super().validate(attrs)
-        except Exception as e:
-            # If we already caught inactive, it raised above. If here, it's invalid creds
             raise serializers.ValidationError(
                 'Invalid email or password. Please check your credentials and try again.'
             )
+        self.user = user
+
+        refresh = self.get_token(user)
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            record_login(user)
         
         # Add user data to response
         # Backend is the source of truth for user identity
-        user_data = UserSerializer(self.user).data
+        user_data = UserSerializer(user).data
         data['user'] = user_data
         
         # Add role for frontend routing
-        data['role'] = self.user.role
+        data['role'] = user.role
         
         # Add profile status
-        if self.user.role == 'student':
-            data['has_profile'] = hasattr(self.user, 'student_profile')
+        if user.role == 'student':
+            data['has_profile'] = hasattr(user, 'student_profile')
             if data['has_profile']:
-                data['course'] = self.user.student_profile.course.name if self.user.student_profile.course else None
-                data['year'] = self.user.student_profile.year
-        elif self.user.role == 'lecturer':
-            data['has_profile'] = hasattr(self.user, 'lecturer_profile')
+                data['course'] = user.student_profile.course.name if user.student_profile.course else None
+                data['year'] = user.student_profile.year
+        elif user.role == 'lecturer':
+            data['has_profile'] = hasattr(user, 'lecturer_profile')
             if data['has_profile']:
-                data['department'] = self.user.lecturer_profile.department
+                data['department'] = user.lecturer_profile.department
         
         return data
 
@@ -65,10 +86,14 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom login endpoint that returns tokens + user data
+    SECURITY: token-bucket throttles per client IP (as strict as the
+    generic anon limit) and per account + IP (LOGIN_THROTTLE)
     """
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
 
 
+@replica_reads_view
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_current_user(request):
@@ -81,7 +106,7 @@ def get_current_user(request):
     
     Endpoint: GET /api/auth/me/
     """
-    serializer = UserSerializer(request.user)
+    serializer = UserSerializer(load_user(request.user))
     return Response(serializer.data)
 
 
@@ -178,6 +203,38 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk_register(self, request):
+        """
+        Admin-only bulk student enrolment (intake week)
+        Body: {"students": [{email, password, first_name, last_name, username?, course?, year?, semester?}, ...]}
+        Returns per-row results; invalid rows are skipped, valid rows are created together.
+        """
+        from .bulk import bulk_register_students
+
+        rows = request.data.get('students')
+        if not isinstance(rows, list) or not rows:
+            return Response({"error": "'students' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = getattr(settings, 'BULK_REGISTRATION_MAX_ROWS', 5000)
+        if len(rows) > max_rows:
+            return Response(
+                {"error": f"Too many rows in one request (max {max_rows})."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = bulk_register_students(rows)
+        except IntegrityError:
+            # A concurrent registration took one of the emails/usernames after validation
+            return Response(
+                {"error": "Batch conflicted with concurrent registrations. Please retry."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+
     def perform_create(self, serializer):
         """
         SECURITY: Force 'student' role for public registration
@@ -202,11 +259,11 @@ class UserViewSet(viewsets.ModelViewSet):
                 except Course.DoesNotExist:
                     pass
             
-            # Get the profile created by signal and update it
-            profile, created = StudentProfile.objects.get_or_create(user=user)
-            profile.course = course
-            profile.year = year if year else 1
-            profile.save()
+            # Update the profile created by signal in a single UPDATE
+            # (no re-fetch of the row we just inserted)
+            updated = StudentProfile.objects.filter(user=user).update(course=course, year=year if year else 1)
+            if not updated:
+                StudentProfile.objects.create(user=user, course=course, year=year if year else 1)
         else:
             # Admin creating user
             serializer.save()
@@ -222,19 +279,19 @@ class LogoutView(viewsets.ViewSet):
     @action(detail=False, methods=['post'])
     def logout(self, request):
         try:
-            from rest_framework_simplejwt.tokens import RefreshToken
             refresh_token = request.data.get("refresh")
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
             return Response({'status': 'success'}, status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class LecturerProfileViewSet(viewsets.ModelViewSet):
+class LecturerProfileViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = LecturerProfile.objects.all()
     serializer_class = LecturerProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'retrieve')
     
     def get_queryset(self):
         """
@@ -247,10 +304,11 @@ class LecturerProfileViewSet(viewsets.ModelViewSet):
         return LecturerProfile.objects.filter(user=user)
 
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
+class StudentProfileViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = StudentProfile.objects.all()
     serializer_class = StudentProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'retrieve')
     
     def get_queryset(self):
         """